@@ -0,0 +1,120 @@
+import argparse
+import logging
+import statistics
+import threading
+import time
+import uuid
+from confluent_kafka import Producer
+from confluent_kafka.admin import AdminClient, NewTopic
+from src.py.generator.message_generator import MessageGenerator
+from src.py.ingestor.consumer_profiles import PROFILES, build_consumer_config
+from src.py.ingestor.ingestor import Ingestor
+
+"""
+Benchmark comparing the consumer profiles' backlog throughput and trickle latency, fed by the local load generator's
+messages. Needs a running kafka cluster, such as the pipeline's broker on localhost:29092. Run from the repository root
+with `python -m benchmarks.benchmark_consumer_profiles`.
+"""
+
+def create_topic(bootstrap_server: str, partitions: int) -> str:
+    """
+    Creates a uniquely named topic for a benchmark run.
+
+    Returns:
+        str: The name of the topic.
+    """
+    topic_name = f"benchmark-consumer-profiles-{uuid.uuid4().hex[:8]}"
+    admin = AdminClient({"bootstrap.servers": bootstrap_server})
+    admin.create_topics([NewTopic(topic_name, partitions, 1)])[topic_name].result()
+    return topic_name
+
+def produce_backlog(bootstrap_server: str, topic_name: str, message_count: int, user_count: int):
+    """
+    Fills a topic with generated messages.
+    """
+    generator = MessageGenerator(user_count, seed=0)
+    producer = Producer({"bootstrap.servers": bootstrap_server, "linger.ms": 20})
+    timestamp = int(time.time())
+    for _ in range(message_count):
+        key, value = generator.build_message(timestamp)
+        while True:
+            try:
+                producer.produce(topic_name, value, key)
+                break
+            except BufferError:
+                producer.poll(0.1)
+    producer.flush()
+
+def measure_backlog(logger: logging.Logger, bootstrap_server: str, topic_name: str, profile: str, message_count: int, batch_size: int) -> tuple[float, float]:
+    """
+    Drains a topic's backlog from the start with a fresh consumer group.
+
+    Returns:
+        tuple[float, float]: The seconds until the first batch arrived and the messages per second over the whole drain.
+    """
+    tuning_config = build_consumer_config(profile)
+    with Ingestor(logger, bootstrap_server, f"benchmark-{uuid.uuid4().hex[:8]}", "earliest", topic_name, tuning_config=tuning_config) as ingestor:
+        start = time.perf_counter()
+        first_batch = None
+        consumed = 0
+        while consumed < message_count:
+            messages = ingestor.consume_raw_messages(batch_size, 1.0)
+            if messages:
+                first_batch = first_batch or time.perf_counter() - start
+                consumed = consumed + len(messages)
+        return first_batch, consumed / (time.perf_counter() - start)
+
+def measure_trickle(logger: logging.Logger, bootstrap_server: str, topic_name: str, profile: str, message_count: int, interval: float) -> list[float]:
+    """
+    Produces messages one at a time while consuming them, measuring the delay from production to consumption.
+
+    Returns:
+        list[float]: The end to end latency of each message in milliseconds.
+    """
+    tuning_config = build_consumer_config(profile)
+    latencies = []
+    with Ingestor(logger, bootstrap_server, f"benchmark-{uuid.uuid4().hex[:8]}", "latest", topic_name, tuning_config=tuning_config) as ingestor:
+        # Wait for the partition assignment so no trickled message is skipped
+        while not ingestor.consumer.assignment():
+            ingestor.consumer.poll(0.1)
+
+        def trickle():
+            producer = Producer({"bootstrap.servers": bootstrap_server, "linger.ms": 0})
+            for _ in range(message_count):
+                producer.produce(topic_name, str(time.time()).encode("utf-8"))
+                producer.poll(0)
+                time.sleep(interval)
+            producer.flush()
+
+        producer_thread = threading.Thread(target=trickle)
+        producer_thread.start()
+        while len(latencies) < message_count:
+            for message in ingestor.consume_raw_messages(100, 0.1) or []:
+                latencies.append((time.time() - float(message)) * 1000)
+        producer_thread.join()
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the consumer profiles.")
+    parser.add_argument("--bootstrap-server", default="localhost:29092")
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--partitions", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--trickle-messages", type=int, default=200)
+    parser.add_argument("--trickle-interval", type=float, default=0.01)
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES))
+    args = parser.parse_args()
+
+    logger = logging.getLogger("benchmark")
+    backlog_topic = create_topic(args.bootstrap_server, args.partitions)
+    produce_backlog(args.bootstrap_server, backlog_topic, args.messages, args.users)
+    for profile in args.profiles:
+        first_batch, rate = measure_backlog(logger, args.bootstrap_server, backlog_topic, profile, args.messages, args.batch_size)
+        trickle_topic = create_topic(args.bootstrap_server, args.partitions)
+        latencies = measure_trickle(logger, args.bootstrap_server, trickle_topic, profile, args.trickle_messages, args.trickle_interval)
+        print(f"{profile}: backlog {rate:,.0f} msg/s (first batch {first_batch * 1000:.0f} ms), "
+              f"trickle latency p50 {statistics.median(latencies):.1f} ms, p99 {statistics.quantiles(latencies, n=100)[98]:.1f} ms")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
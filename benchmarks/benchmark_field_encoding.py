@@ -0,0 +1,93 @@
+import argparse
+import gc
+import json
+import logging
+import random
+import time
+import tracemalloc
+from src.py.processor.data.activity_data_manager import ActivityDataManager
+from src.py.processor.data.device_data_manager import DeviceDataManager
+from src.py.processor.data.field_encoder import build_field_encoders
+
+"""
+Local benchmark comparing the activity and device data managers holding device types, app versions and locales as the
+per message strings parsing produces against holding them as field encoder codes. Messages are parsed inside the measured
+window and dropped before the retained memory is read, so strings kept alive by the stores are counted. Run from the
+repository root with `python -m benchmarks.benchmark_field_encoding`.
+"""
+
+def build_raw_messages(message_count: int, device_count: int) -> list[str]:
+    """
+    Builds a list of synthetic raw messages.
+
+    Args:
+        message_count (int): The number of messages to build.
+        device_count (int): The number of distinct devices to draw from.
+
+    Returns:
+        list[str]: A list of raw messages as json strings.
+    """
+    generator = random.Random(0)
+    app_versions = [f"{major}.{minor}.{patch}" for major in range(3) for minor in range(10) for patch in range(5)]
+    locales = [f"{first}{second}" for first in "ABCDEFGHIJ" for second in "KLMNOPQRST"]
+    raw_messages = []
+    for _ in range(message_count):
+        device = generator.randrange(device_count)
+        raw_messages.append(json.dumps({"device_id": f"device-{device}", "device_type": generator.choice(["android", "iOS"]), "app_version": generator.choice(app_versions),
+                                        "ip": f"10.{device % 256}.{device // 256 % 256}.{device // 65536}", "locale": generator.choice(locales)}))
+    return raw_messages
+
+def run(logger: logging.Logger, raw_messages: list[str], encoded: bool, traced: bool) -> tuple[float, int]:
+    """
+    Parses every raw message and compiles it into fresh activity and device data managers. Allocations are only traced
+    when asked, as tracing slows allocation heavy code down and would skew the timing.
+
+    Returns:
+        tuple[float, int]: The seconds spent compiling, and the bytes still allocated by the stores once the messages are dropped, 0 if not traced.
+    """
+    gc.collect()
+    if traced:
+        tracemalloc.start()
+    messages = [json.loads(raw_message) for raw_message in raw_messages]
+    activity_data_manager = ActivityDataManager(logger)
+    device_data_manager = DeviceDataManager(logger)
+    field_encoders = build_field_encoders()
+    encode_device_type = field_encoders["device_type"].encode
+    encode_app_version = field_encoders["app_version"].encode
+    encode_locale = field_encoders["locale"].encode
+
+    start = time.perf_counter()
+    for message in messages:
+        device_type, app_version, locale = message["device_type"], message["app_version"], message["locale"]
+        if encoded:
+            device_type, app_version, locale = encode_device_type(device_type), encode_app_version(app_version), encode_locale(locale)
+        device_data_manager.compile_device_data(message["device_id"], device_type, app_version, message["ip"], locale)
+        activity_data_manager.compile_activity_data(device_type, app_version, locale)
+    elapsed = time.perf_counter() - start
+
+    del messages
+    gc.collect()
+    if not traced:
+        return elapsed, 0
+    retained_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return elapsed, retained_bytes
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark field encoding in the activity and device data managers.")
+    parser.add_argument("--messages", type=int, default=500000)
+    parser.add_argument("--devices", type=int, default=200000)
+    args = parser.parse_args()
+
+    logger = logging.getLogger("benchmark")
+    raw_messages = build_raw_messages(args.messages, args.devices)
+    baseline_elapsed, _ = run(logger, raw_messages, encoded=False, traced=False)
+    encoded_elapsed, _ = run(logger, raw_messages, encoded=True, traced=False)
+    _, baseline_bytes = run(logger, raw_messages, encoded=False, traced=True)
+    _, encoded_bytes = run(logger, raw_messages, encoded=True, traced=True)
+    print(f"strings: {baseline_elapsed:.3f}s ({args.messages / baseline_elapsed:,.0f} msg/s), {baseline_bytes / (1024 * 1024):.1f} MiB retained")
+    print(f"codes: {encoded_elapsed:.3f}s ({args.messages / encoded_elapsed:,.0f} msg/s), {encoded_bytes / (1024 * 1024):.1f} MiB retained "
+          f"({baseline_elapsed / encoded_elapsed:.2f}x speed, {encoded_bytes / baseline_bytes:.2f}x memory)")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,65 @@
+import argparse
+import os
+import shutil
+import subprocess
+import time
+from src.py.processor.findings import load_findings_snapshots, merge_throughput
+
+"""
+Benchmark measuring consumer throughput from 1 to N replicas on a single machine, feeding the pipeline from the local load
+generator. Unlike the other benchmarks this drives the full docker compose environment, so docker must be running. Run
+from the repository root with `python -m benchmarks.benchmark_scale_out`.
+"""
+
+COMPOSE_FILE_PATH = "compose.yml"
+ENV_FILE_PATH = os.path.join("src", "config", ".env")
+FINDINGS_DIRECTORY = "findings"
+
+def compose(env: dict[str, str], *args: str):
+    """
+    Runs a docker compose command against the pipeline's compose file.
+
+    Args:
+        env (dict[str, str]): The environment, overriding values from the .env file.
+        args (str): The docker compose command and its arguments.
+    """
+    subprocess.run(["docker", "compose", "-f", COMPOSE_FILE_PATH, "--env-file", ENV_FILE_PATH, *args], env=env, check=True)
+
+def run_replicas(replica_count: int, duration: float, partitions: int, message_limit: int) -> dict:
+    """
+    Runs the pipeline with a number of consumer replicas and measures their combined throughput.
+
+    Returns:
+        dict: The merged throughput of every replica.
+    """
+    shutil.rmtree(FINDINGS_DIRECTORY, ignore_errors=True)
+    os.makedirs(FINDINGS_DIRECTORY)
+    env = dict(os.environ, COMPOSE_PROFILES="load-gen", CONSUMER_REPLICAS=str(replica_count), CONSUMER_MESSAGE_LIMIT=str(message_limit),
+               FINDINGS_OUTPUT_DIR="/usr/src/findings", INBOUND_TOPIC_PARTITIONS=str(partitions), LOGGER_LEVEL="WARNING")
+    try:
+        compose(env, "up", "-d", "--build")
+        time.sleep(duration)
+
+        # Stopping the consumers first lets each replica shut down gracefully and write its findings snapshot
+        compose(env, "stop", "-t", "60", "my-python-consumer")
+    finally:
+        compose(env, "down", "-t", "60")
+    return merge_throughput([snapshot["throughput"] for snapshot in load_findings_snapshots(FINDINGS_DIRECTORY)])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark consumer throughput across replica counts.")
+    parser.add_argument("--replicas", type=int, nargs="+", default=[1, 2, 3, 6])
+    parser.add_argument("--partitions", type=int, default=6)
+    parser.add_argument("--duration", type=float, default=60.0)
+    parser.add_argument("--message-limit", type=int, default=500)
+    args = parser.parse_args()
+
+    baseline = None
+    for replica_count in args.replicas:
+        throughput = run_replicas(replica_count, args.duration, args.partitions, args.message_limit)
+        rate = throughput["messages_per_second"]
+        baseline = baseline or rate
+        print(f"{replica_count} replicas: {throughput["message_count"]} messages ({rate:,.0f} msg/s, {rate / baseline if baseline else 0:.2f}x)")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
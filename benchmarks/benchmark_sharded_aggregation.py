@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from src.py.processor.processor import Processor
+
+"""
+Local benchmark comparing the processor with statistics aggregated in process against aggregating them across shard
+worker processes, each run processing the same raw batches end to end through `Processor.process_raw_messages_async`.
+The time the parent spends routing records to the shards and sending them is reported separately, as it is paid on the
+consumer's loop whatever the shard count. Run from the repository root with `python -m benchmarks.benchmark_sharded_aggregation`.
+"""
+
+def build_raw_messages(message_count: int, user_count: int) -> list[bytes]:
+    """
+    Builds a list of synthetic raw message payloads.
+
+    Args:
+        message_count (int): The number of messages to build.
+        user_count (int): The number of distinct users, devices and ip's to draw from.
+
+    Returns:
+        list[bytes]: A list of raw message payloads.
+    """
+    generator = random.Random(0)
+    messages = []
+    for i in range(message_count):
+        user = generator.randrange(user_count)
+        message = {"user_id": f"user-{user}", "app_version": f"2.{generator.randrange(10)}.0", "device_type": generator.choice(["android", "iOS"]),
+                   "ip": f"10.{user % 256}.{generator.randrange(256)}.{generator.randrange(256)}", "locale": generator.choice(["RU", "US", "DE", "FR"]),
+                   "device_id": f"device-{user}-{generator.randrange(3)}", "timestamp": str(1694479551 + i)}
+        messages.append(json.dumps(message).encode("utf-8"))
+    return messages
+
+async def run_processor(logger: logging.Logger, batches: list[list[bytes]], shard_count: int, slot_count: int) -> tuple[float, float]:
+    """
+    Times processing every batch through the processor, as the consumer does, then collecting the findings.
+
+    Returns:
+        tuple[float, float]: The elapsed time in seconds, and the part of it the parent spent routing records to the shards, 0 without shards.
+    """
+    with Processor(logger, shard_count, slot_count) as processor:
+        routing_time = 0.0
+        if processor.sharded_aggregator:
+            # Time the parent's side of every batch handed to the shards, routing records and sending them down the pipes
+            compile_statistics = processor.sharded_aggregator.compile_statistics
+            def timed_compile_statistics(processed_messages: list[dict[str, str]]):
+                nonlocal routing_time
+                start = time.perf_counter()
+                compile_statistics(processed_messages)
+                routing_time = routing_time + time.perf_counter() - start
+            processor.sharded_aggregator.compile_statistics = timed_compile_statistics
+
+        start = time.perf_counter()
+        for batch in batches:
+            await processor.process_raw_messages_async(batch)
+        processor.collect_findings()
+        return time.perf_counter() - start, routing_time
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark sharded statistic aggregation through the processor.")
+    parser.add_argument("--messages", type=int, default=500000)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--ring-buffer-slots", type=int, default=0, help="The shared memory ring buffer slots used for parsing, 0 to parse through a process pool.")
+    args = parser.parse_args()
+
+    logger = logging.getLogger("benchmark")
+    messages = build_raw_messages(args.messages, args.users)
+    batches = [messages[i:i + args.batch_size] for i in range(0, len(messages), args.batch_size)]
+
+    # Parsing costs the same for every run, so the differences between runs come down to aggregation
+    baseline, _ = await run_processor(logger, batches, 0, args.ring_buffer_slots)
+    print(f"in process: {baseline:.3f}s ({args.messages / baseline:,.0f} msg/s)")
+    for shard_count in args.shards:
+        elapsed, routing_time = await run_processor(logger, batches, shard_count, args.ring_buffer_slots)
+        print(f"{shard_count} shards: {elapsed:.3f}s ({args.messages / elapsed:,.0f} msg/s, {baseline / elapsed:.2f}x), "
+              f"routing in the parent {routing_time:.3f}s ({routing_time / elapsed:.0%} of the run)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
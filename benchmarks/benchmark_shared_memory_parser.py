@@ -0,0 +1,81 @@
+import argparse
+import logging
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from src.py.processor.processor import parse_message
+from src.py.processor.shared_memory_transport import SharedMemoryParser
+
+"""
+Local benchmark comparing message parsing through a process pool, as done by `Processor.process_messages_async`,
+against parsing over the shared memory ring buffer. Run from the repository root with
+`python -m benchmarks.benchmark_shared_memory_parser`.
+"""
+
+def build_raw_messages(message_count: int) -> list[bytes]:
+    """
+    Builds a list of synthetic raw message payloads, with one in ten missing its optional fields.
+
+    Args:
+        message_count (int): The number of messages to build.
+
+    Returns:
+        list[bytes]: A list of raw message payloads.
+    """
+    generator = random.Random(0)
+    messages = []
+    for i in range(message_count):
+        if i % 10 == 0:
+            message = f"{{\"user_id\": \"user-{generator.randrange(100000)}\", \"ip\": \"10.0.{generator.randrange(256)}.{generator.randrange(256)}\", \"device_id\": \"{generator.randrange(1000)}-{generator.randrange(100)}-{generator.randrange(10000)}\", \"timestamp\":\"{1694479551 + i}\"}}"
+        else:
+            message = (f"{{\"user_id\": \"user-{generator.randrange(100000)}\", \"app_version\": \"2.{generator.randrange(10)}.0\", \"device_type\": \"{generator.choice(["android", "iOS"])}\", "
+                       f"\"ip\": \"10.0.{generator.randrange(256)}.{generator.randrange(256)}\", \"locale\": \"{generator.choice(["RU", "US", "DE"])}\", "
+                       f"\"device_id\": \"{generator.randrange(1000)}-{generator.randrange(100)}-{generator.randrange(10000)}\", \"timestamp\":\"{1694479551 + i}\"}}")
+        messages.append(message.encode("utf-8"))
+    return messages
+
+def run_executor(batches: list[list[bytes]]) -> float:
+    """
+    Times parsing every batch through a process pool, decoding payloads in process first like the consumer does.
+
+    Returns:
+        float: The elapsed time in seconds.
+    """
+    start = time.perf_counter()
+    for batch in batches:
+        with ProcessPoolExecutor() as executor:
+            list(executor.map(parse_message, [message.decode("utf-8") for message in batch]))
+    return time.perf_counter() - start
+
+def run_shared_memory(logger: logging.Logger, batches: list[list[bytes]], slot_count: int) -> float:
+    """
+    Times parsing every batch over the shared memory ring buffer.
+
+    Returns:
+        float: The elapsed time in seconds.
+    """
+    with SharedMemoryParser(logger, slot_count, os.cpu_count(), parse_message) as parser:
+        start = time.perf_counter()
+        for batch in batches:
+            parser.parse_messages(batch)
+        return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark shared memory message parsing.")
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--slots", type=int, default=4096)
+    args = parser.parse_args()
+
+    logger = logging.getLogger("benchmark")
+    messages = build_raw_messages(args.messages)
+    batches = [messages[i:i + args.batch_size] for i in range(0, len(messages), args.batch_size)]
+
+    executor_time = run_executor(batches)
+    print(f"process pool: {executor_time:.3f}s ({args.messages / executor_time:,.0f} msg/s)")
+    shared_memory_time = run_shared_memory(logger, batches, args.slots)
+    print(f"shared memory ({args.slots} slots): {shared_memory_time:.3f}s ({args.messages / shared_memory_time:,.0f} msg/s, {executor_time / shared_memory_time:.2f}x)")
+
+if __name__ == "__main__":
+    main()
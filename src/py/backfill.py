@@ -0,0 +1,122 @@
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+from datetime import datetime, timezone
+from src.py.metrics.progress_meter import ProgressMeter
+from src.py.metrics.throughput_meter import ThroughputMeter
+from src.py.processor.deduplicator import Deduplicator
+from src.py.processor.findings import save_findings_snapshot
+from src.py.processor.processor import Processor
+
+"""
+This script rebuilds the pipeline's statistics from an offset or timestamp range of the inbound topic, such as after a
+bug fix, without resetting the consumer group or producing any processed messages. Run from the root of the repository
+with `python -m src.py.backfill --start-time 2024-01-01T00:00:00` against the broker's external listener.
+"""
+
+# Name the backfill's findings snapshot is written under
+BACKFILL_REPLICA = "backfill"
+
+# Flag to control the main loop
+running = True
+
+# Setup logger with console handler and formatting
+logger = logging.getLogger("backfill")
+logger.setLevel(logging.INFO)
+ch = logging.StreamHandler()
+ch.setLevel(logging.INFO)
+formatter = logging.Formatter("[%(levelname)s | %(name)s] %(asctime)s - %(message)s")
+ch.setFormatter(formatter)
+logger.addHandler(ch)
+
+def signal_handler(sig, frame):
+    """
+    Handle termination signals to stop the backfill early.
+    """
+    global running
+    logger.info("Received termination signal. Stopping backfill...")
+    running = False
+
+def parse_timestamp_ms(value: str) -> int:
+    """
+    Parses a range bound given as epoch milliseconds or an ISO 8601 time, taken as UTC when no timezone is given.
+
+    Args:
+        value (str): The range bound.
+
+    Returns:
+        int: The range bound as epoch milliseconds.
+    """
+    if value.isdigit():
+        return int(value)
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+async def main() -> int:
+    """
+    Reads the requested range of the inbound topic through the processor and writes out the resulting findings.
+
+    Returns:
+        int: The exit code, 1 if the backfill was stopped before reading the whole range.
+    """
+    parser = argparse.ArgumentParser(description="Rebuild the pipeline's statistics from a range of the inbound topic.")
+    parser.add_argument("--bootstrap-server", default="localhost:29092", help="The kafka broker to read from.")
+    parser.add_argument("--topic", default="user-login", help="The topic to read from.")
+    parser.add_argument("--start-offset", type=int, help="The offset to start reading each partition at, the earliest offset if not given.")
+    parser.add_argument("--end-offset", type=int, help="The offset to stop reading each partition before, the latest offset if not given.")
+    parser.add_argument("--start-time", type=parse_timestamp_ms, help="The time to start reading at, as epoch milliseconds or ISO 8601, taking precedence over --start-offset.")
+    parser.add_argument("--end-time", type=parse_timestamp_ms, help="The time to stop reading before, as epoch milliseconds or ISO 8601, taking precedence over --end-offset.")
+    parser.add_argument("--batch-size", type=int, default=10000, help="The number of messages processed per batch.")
+    parser.add_argument("--shards", type=int, default=os.cpu_count() or 1, help="The number of shard worker processes to aggregate statistics across.")
+    parser.add_argument("--ring-buffer-slots", type=int, default=16384, help="The number of shared memory ring buffer slots used for parsing, 0 to parse through a process pool.")
+    parser.add_argument("--profile", default="high-throughput", help="The consumer profile to read with.")
+    parser.add_argument("--dedup-window", type=int, default=600, help="How far back in event time, in seconds, duplicate login events are dropped, 0 to keep duplicates.")
+    parser.add_argument("--dedup-capacity", type=int, default=1000000, help="The number of distinct login events expected within the deduplication window.")
+    parser.add_argument("--dedup-false-positive-rate", type=float, default=0.001, help="The chance a distinct login event is mistaken for a duplicate.")
+    parser.add_argument("--output-dir", default="findings", help="The directory to write the findings snapshot to.")
+    parser.add_argument("--top", type=int, default=10, help="The number of most active users and ip's to report.")
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    throughput_meter = ThroughputMeter(logger)
+    deduplicator = Deduplicator(logger, args.dedup_window, args.dedup_capacity, args.dedup_false_positive_rate) if args.dedup_window > 0 else None
+
+    # Fork the processor's worker processes before the kafka client library is loaded and starts its threads
+    with Processor(logger, args.shards, args.ring_buffer_slots, deduplicator=deduplicator) as prcsr:
+        from src.py.ingestor.consumer_profiles import build_consumer_config
+        from src.py.ingestor.range_ingestor import RangeIngestor
+
+        with RangeIngestor(logger, args.bootstrap_server, args.topic, args.start_offset, args.end_offset, args.start_time, args.end_time,
+                           build_consumer_config(args.profile)) as ingstr:
+            progress_meter = ProgressMeter(logger, ingstr.total_messages)
+            while running and not ingstr.is_finished():
+                messages = ingstr.consume_raw_messages(args.batch_size, 1.0)
+                if messages:
+                    throughput_meter.start_batch()
+                    await prcsr.process_raw_messages_async(messages)
+
+                    # Nothing is produced in a backfill, rejected messages are only counted
+                    prcsr.drain_rejected_messages()
+                    throughput_meter.end_batch(len(messages))
+                progress_meter.update(ingstr.consumed_messages())
+            finished = ingstr.is_finished()
+
+        findings = prcsr.collect_findings(args.top)
+        prcsr.report_findings(findings)
+        throughput_meter.report()
+
+    if not finished:
+        logger.warning("Backfill stopped before reading the whole range, no findings snapshot was written...")
+        return 1
+    snapshot_path = save_findings_snapshot(args.output_dir, BACKFILL_REPLICA, findings, throughput_meter.snapshot())
+    logger.info(f"Wrote findings snapshot to {snapshot_path}...")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
\ No newline at end of file
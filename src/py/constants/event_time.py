@@ -0,0 +1,7 @@
+"""
+Bounds on event time, guarding time windows against events stamped far in the future. A single such event would
+otherwise move a window forward past every real event seen since, expiring them all at once.
+"""
+
+# How far ahead of the wall clock an event may be stamped, allowing for clock skew between producers
+MAX_FUTURE_SECONDS = 300
\ No newline at end of file
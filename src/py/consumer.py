@@ -1,10 +1,25 @@
-from ingestor.ingestor import Ingestor
-from messenger.messenger import Messenger
+import time
+
+# Taken before anything else is imported so the startup report covers module import time
+process_start_time = time.perf_counter()
+
+from flow.deadline import Deadline
+from flow.delivery_tracker import DeliveryTracker, InFlightBatch
+from flow.flow_controller import FlowController
+from metrics.startup_timer import StartupTimer
+from metrics.throughput_meter import ThroughputMeter
+from processor.data.eviction_policy import EvictionPolicy
+from processor.data.user_features import UserFeatureTracker
+from processor.deduplicator import Deduplicator
+from processor.findings import save_findings_snapshot
 from processor.processor import Processor
 import asyncio
+import functools
 import logging
 import os
 import signal
+import socket
+import sys
 import traceback
 
 """
@@ -12,8 +27,9 @@ This is the main looping block for the data pipeline. This module polls/ingests
 a kafka broker, processes the message, and then stores the processed message in a new topic.
 """
 
-# Flag to control the main loop
+# Flag to control the main loop, and the deadline every step of shutting down shares, counting from when shutdown was requested
 running = True
+shutdown_deadline = Deadline(float(os.environ["SHUTDOWN_DEADLINE_SECONDS"]))
 
 # Setup logger with console handler and formatting
 logger = logging.getLogger("consumer")
@@ -31,38 +47,175 @@ def signal_handler(sig, frame):
     global running
     logger.info("Received termination signal. Shutting down...")
     running = False
+    shutdown_deadline.start()
+
+def build_eviction_policies() -> dict[str, EvictionPolicy]:
+    """
+    Build the data managers' eviction policies from the environment, splitting the memory budget evenly between them.
+    """
+    managers = ("user", "device", "ip")
+    manager_budget = int(float(os.environ["MEMORY_BUDGET_MB"]) * 1024 * 1024 / len(managers))
+    eviction_policies = {}
+    for manager in managers:
+        policy = os.environ[f"{manager.upper()}_EVICTION_POLICY"]
+        if policy == "none" and manager_budget > 0:
+            # A memory budget alone still needs something to evict by
+            policy = "lru"
+        if policy != "none":
+            eviction_policies[manager] = EvictionPolicy(policy, int(os.environ["EVICTION_MAX_ENTRIES"]), int(os.environ["EVICTION_TTL_SECONDS"]), manager_budget)
+    return eviction_policies
+
+def build_deduplicator() -> Deduplicator | None:
+    """
+    Build the processor's deduplicator from the environment, or None if deduplication is disabled.
+    """
+    window_seconds = int(os.environ["DEDUP_WINDOW_SECONDS"])
+    if window_seconds <= 0:
+        return None
+    return Deduplicator(logger, window_seconds, int(os.environ["DEDUP_CAPACITY"]), float(os.environ["DEDUP_FALSE_POSITIVE_RATE"]))
 
-async def main():
+def build_feature_tracker() -> UserFeatureTracker | None:
+    """
+    Build the user feature tracker from the environment, or None if user features are disabled.
+    """
+    window_seconds = int(os.environ["ALERT_WINDOW_SECONDS"])
+    if window_seconds <= 0:
+        return None
+    return UserFeatureTracker(window_seconds, int(os.environ["ALERT_MAX_LOGIN_RATE"]), int(os.environ["ALERT_MAX_DISTINCT_IPS"]), int(os.environ["ALERT_MAX_NEW_DEVICES"]))
+
+def build_replica_index() -> int | None:
+    """
+    Build this replica's stable ordinal from the environment, or None if several replicas run without one.
+    """
+    if os.environ["CONSUMER_REPLICA_INDEX"]:
+        return int(os.environ["CONSUMER_REPLICA_INDEX"])
+    if int(os.environ["CONSUMER_REPLICAS"]) == 1:
+        return 0
+    return None
+
+async def main() -> int:
     """
     Main program loop for running the consumer.
+
+    Returns:
+        int: The exit code, 1 if any message failed delivery or was left undelivered at the shutdown deadline.
     """
+    startup_timer = StartupTimer(logger, process_start_time)
+    startup_timer.mark("modules imported")
 
     # Set up signal handlers for graceful shutdown
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
 
-    with (Ingestor(logger, os.environ["CONSUMER_BOOTSTRAP_SERVER"], os.environ["CONSUMER_GROUP_ID"], os.environ["CONSUMER_AUTO_OFFSET_RESET"], os.environ["CONSUMER_KAFKA_TOPIC"]) as ingstr,
-          Messenger(logger, os.environ["PRODUCER_BOOTSTRAP_SERVER"], os.environ["PRODUCER_CLIENT_ID"], os.environ["PRODUCER_KAFKA_TOPIC"]) as msngr,
-          Processor(logger) as prcsr):
-        logger.info("Starting message consumption from kafka...")
-        while running:
-            # Ingest message from ingestor
-            messages = ingstr.consume_messages(int(os.environ["CONSUMER_MESSAGE_LIMIT"]), float(os.environ["CONSUMER_WAIT_TIME"]))
+    # Replicas share a consumer group, so each needs its own static member id, which has to outlive the container to rejoin
+    # without a rebalance. Container hostnames change whenever containers are recreated, leaving stale members holding
+    # partitions until their session times out, so without a stable ordinal replicas join dynamically instead
+    replica_index = build_replica_index()
+    replica = f"replica-{replica_index}" if replica_index is not None else socket.gethostname()
+    group_instance_id = None
+    if os.environ["CONSUMER_GROUP_INSTANCE_ID"] and replica_index is not None:
+        group_instance_id = f"{os.environ["CONSUMER_GROUP_INSTANCE_ID"]}-{replica_index}"
+    elif os.environ["CONSUMER_GROUP_INSTANCE_ID"]:
+        logger.warning("Joining the consumer group dynamically, as several replicas run without a CONSUMER_REPLICA_INDEX...")
+    throughput_meter = ThroughputMeter(logger)
+    flow_controller = FlowController(logger, int(os.environ["FLOW_CONTROL_HIGH_WATERMARK"]), int(os.environ["FLOW_CONTROL_LOW_WATERMARK"]))
+    delivery_tracker = DeliveryTracker(logger, int(os.environ["DELIVERY_MAX_HELD_BATCHES"]))
+
+    def deliver(batch: InFlightBatch, delivered: bool):
+        # Under flow control a message is only queued when produced, so startup ends with the first delivery instead
+        delivery_tracker.deliver(batch, delivered)
+        if delivered and not startup_timer.reported:
+            startup_timer.mark("first message delivered")
+            startup_timer.report()
+
+    # Fork the processor's worker processes before the kafka client library is loaded and starts its threads
+    with Processor(logger, int(os.environ["PROCESSOR_SHARD_COUNT"]), int(os.environ["PROCESSOR_RING_BUFFER_SLOTS"]), build_eviction_policies(), os.environ["EVICTION_SINK_PATH"] or None,
+                   build_deduplicator(), build_feature_tracker()) as prcsr:
+        startup_timer.mark("processor workers forked")
+
+        # Deferred so the kafka client library is only imported once the workers exist
+        from ingestor.consumer_profiles import build_consumer_config, get_env_overrides
+        from ingestor.ingestor import Ingestor
+        from messenger.messenger import Messenger
+        startup_timer.mark("kafka client imported")
+
+        # Tune fetching with the chosen profile and any librdkafka settings passed through the environment
+        tuning_config = build_consumer_config(os.environ["CONSUMER_PROFILE"], get_env_overrides(os.environ))
+        logger.info(f"Using the {os.environ["CONSUMER_PROFILE"]} consumer profile with settings {tuning_config}...")
+
+        with (Ingestor(logger, os.environ["CONSUMER_BOOTSTRAP_SERVER"], os.environ["CONSUMER_GROUP_ID"], os.environ["CONSUMER_AUTO_OFFSET_RESET"], os.environ["CONSUMER_KAFKA_TOPIC"], group_instance_id, tuning_config,
+                       manual_commit=True, revoke_handler=delivery_tracker.revoke) as ingstr,
+              Messenger(logger, os.environ["PRODUCER_BOOTSTRAP_SERVER"], os.environ["PRODUCER_CLIENT_ID"], os.environ["PRODUCER_KAFKA_TOPIC"], os.environ["PRODUCER_DEAD_LETTER_TOPIC"] or None, os.environ["PRODUCER_KEY_FIELD"] or None,
+                        os.environ["PRODUCER_ALERT_TOPIC"] or None, deadline=shutdown_deadline) as msngr):
+            startup_timer.mark("kafka clients connected")
+            logger.info("Starting message consumption from kafka...")
+            while running:
+                # Hold back fetching while the producer's local queue is backed up, serving delivery callbacks to drain it,
+                # or while the batches awaiting delivery are at their cap
+                if flow_controller.update(msngr.poll()) or delivery_tracker.is_full():
+                    ingstr.pause()
+                else:
+                    ingstr.resume()
+
+                # Ingest message from ingestor
+                messages = ingstr.consume_raw_messages(int(os.environ["CONSUMER_MESSAGE_LIMIT"]), float(os.environ["CONSUMER_WAIT_TIME"]))
+
+                if messages:
+                    startup_timer.mark("first message consumed")
+                    throughput_meter.start_batch()
+                    batch = delivery_tracker.start_batch(ingstr.consumed_offsets, len(messages))
+                    on_delivery = functools.partial(deliver, batch)
+
+                    # Send message to processor for processing
+                    logger.info(f"Processing {len(messages)} ingested messages...")
+                    processed_messages = await prcsr.process_raw_messages_async(messages)
+
+                    # Store processed message in new topic with messenger, a batch finishing after a termination signal is left to the shutdown drain
+                    logger.info(f"Producing {len(processed_messages)} processed messages to kafka...")
+                    msngr.produce_messages(processed_messages, float(os.environ["PRODUCER_WAIT_TIME"]), not flow_controller.enabled and running, on_delivery)
+
+                    # Route any malformed messages to the dead letter topic rather than failing the batch
+                    dead_letter_count = msngr.produce_dead_letters(prcsr.drain_rejected_messages(), os.environ["CONSUMER_KAFKA_TOPIC"], on_delivery)
+                    delivery_tracker.hand_off(batch, len(processed_messages) + dead_letter_count)
+
+                    # Alert on users flagged by their login features, alerts from shard workers arrive a batch or so later
+                    msngr.produce_alerts(prcsr.drain_alerts())
+                    throughput_meter.end_batch(len(messages))
+
+                # Commit the offsets of batches whose messages have all been delivered
+                ingstr.commit_offsets(delivery_tracker.pop_committable_offsets())
+
+                # A failed delivery holds back every later commit, so stop consuming and drain rather than pile up batches to replay
+                if delivery_tracker.has_failed():
+                    logger.error(f"Stopping after {delivery_tracker.failed_count} messages failed delivery, their batches will be consumed again on restart...")
+                    break
+
+            # Drain on shutdown, fetching stops at once and every step after gets what remains of the deadline, started here
+            # if the loop stopped on a failed delivery, and left to the messenger's exit if anything here raises
+            shutdown_deadline.start()
+            ingstr.pause()
 
-            if messages:
-                # Send message to processor for processing
-                logger.info(f"Processing {len(messages)} ingested messages...")
-                processed_messages = await prcsr.process_messages_async(messages)
+            # Gather findings while the shard workers still run, then stop them so the last alerts they raised are drained too
+            findings = prcsr.collect_findings(timeout=shutdown_deadline.remaining())
+            prcsr.close_shards(shutdown_deadline.remaining())
+            msngr.produce_alerts(prcsr.drain_alerts())
+            msngr.drain(shutdown_deadline.remaining())
+            ingstr.commit_offsets(delivery_tracker.pop_committable_offsets(), shutdown_deadline.remaining())
+            delivery_tracker.report()
 
-                # Store processed message in new topic with messenger
-                logger.info(f"Producing {len(processed_messages)} processed messages to kafka...")
-                msngr.produce_messages(processed_messages, float(os.environ["PRODUCER_WAIT_TIME"]))
+        prcsr.report_findings(findings)
+        throughput_meter.report()
+        flow_controller.report(throughput_meter.elapsed_seconds())
 
-        prcsr.report_findings()
+        # Leave this replica's findings behind so the findings of every replica can be merged
+        if os.environ["FINDINGS_OUTPUT_DIR"]:
+            snapshot_path = save_findings_snapshot(os.environ["FINDINGS_OUTPUT_DIR"], replica, findings, throughput_meter.snapshot())
+            logger.info(f"Wrote findings snapshot to {snapshot_path}...")
+    return 1 if delivery_tracker.has_failed() else 0
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        sys.exit(asyncio.run(main()))
     except Exception as e:
         logger.critical("An exception occurred...")
         logger.critical(f"Type: {type(e).__name__}")
@@ -0,0 +1,4 @@
+__all__ = ["FileSink", "FileSource"]
+
+from src.py.files.file_sink import FileSink
+from src.py.files.file_source import FileSource
\ No newline at end of file
@@ -0,0 +1,48 @@
+import bz2
+import gzip
+import lzma
+import os
+from typing import BinaryIO
+
+"""
+Opening of plain files and compressed archives, picking the compression from the file's extension.
+"""
+
+# Default size of bulk reads and of the write buffer, large enough that each system call moves a good share of a file
+DEFAULT_BUFFER_SIZE = 8 * 1024 * 1024
+
+COMPRESSED_EXTENSIONS = (".gz", ".bz2", ".xz")
+
+def is_compressed(path: str) -> bool:
+    """
+    Checks whether a file is a compressed archive, going by its extension.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        bool: Whether the file is gzip, bzip2 or xz compressed.
+    """
+    return os.path.splitext(path)[1].lower() in COMPRESSED_EXTENSIONS
+
+def open_binary_file(path: str, mode: str, buffer_size: int = DEFAULT_BUFFER_SIZE) -> BinaryIO:
+    """
+    Opens a plain file or compressed archive in binary mode. Archives are written at levels favouring speed over size,
+    as they're written and read locally.
+
+    Args:
+        path (str): The path of the file.
+        mode (str): The mode to open the file in, "rb" or "wb".
+        buffer_size (int, optional): The buffer size of plain files. Default is 8 MiB.
+
+    Returns:
+        BinaryIO: The opened file, transparently decompressing or compressing archives.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".gz":
+        return gzip.open(path, mode, compresslevel=6)
+    if extension == ".bz2":
+        return bz2.open(path, mode)
+    if extension == ".xz":
+        return lzma.open(path, mode, preset=1 if "w" in mode else None)
+    return open(path, mode, buffering=buffer_size)
\ No newline at end of file
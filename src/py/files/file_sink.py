@@ -0,0 +1,119 @@
+import json
+import time
+from collections.abc import Callable
+from .compression import DEFAULT_BUFFER_SIZE, open_binary_file
+from logging import Logger
+
+class FileSink:
+    """
+    Sink class for writing processed messages to a local newline delimited json file in place of the messenger, with
+    rejected messages optionally written to a dead letter file alongside. Each batch is serialized and written in one
+    bulk write, and files ending in .gz, .bz2 or .xz are compressed as they are written.
+
+    Args:
+        logger (Logger): The logger instance used to convey information for this class.
+        path (str | None): The path of the file to write processed messages to, None to drop processed messages and only write rejected ones.
+        dead_letter_path (str, optional): The path of the file to write rejected messages to. Default is None, dropping rejected messages.
+        write_size (int, optional): The write buffer size of plain files. Default is 8 MiB.
+
+    Attributes:
+        path (str | None): The path of the file to write processed messages to.
+        dead_letter_path (str | None): The path of the file to write rejected messages to.
+        message_count (int): The number of processed messages written.
+        dead_letter_count (int): The number of rejected messages written.
+    """
+    def __init__(self, logger: Logger, path: str | None, dead_letter_path: str | None = None, write_size: int = DEFAULT_BUFFER_SIZE):
+        self.path = path
+        self.dead_letter_path = dead_letter_path
+        self.write_size = write_size
+        self.message_count = 0
+        self.dead_letter_count = 0
+        self.file = None
+        self.dead_letter_file = None
+        self.logger = logger.getChild("file_sink")
+
+    def __enter__(self):
+        if self.path:
+            self.logger.info(f"Opening {self.path} for writing...")
+            self.file = open_binary_file(self.path, "wb", self.write_size)
+        if self.dead_letter_path:
+            self.logger.info(f"Opening {self.dead_letter_path} for writing dead letters...")
+            self.dead_letter_file = open_binary_file(self.dead_letter_path, "wb", self.write_size)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Closing flushes any buffered writes and completes compressed archives
+        self.logger.info(f"Closing {self.path or "sink"} after writing {self.message_count} messages and {self.dead_letter_count} dead letters...")
+        if self.file:
+            self.file.close()
+        if self.dead_letter_file:
+            self.dead_letter_file.close()
+
+    def poll(self, wait_time: float = 0) -> int:
+        """
+        Does nothing, as writes complete immediately. Kept so a file sink can stand in for the messenger.
+
+        Args:
+            wait_time (float, optional): Unused.
+
+        Returns:
+            int: The number of messages waiting for delivery, always 0.
+        """
+        return 0
+
+    def produce_messages(self, messages: list[dict[str, str]], wait_time: float = 0.1, flush: bool = True, on_delivery: Callable[[bool], None] | None = None):
+        """
+        Writes processed messages to the file as json lines, or drops them if no file is configured.
+
+        Args:
+            messages (list[dict[str, str]]): A list of dictionaries of strings, with each list item representing a message to be written.
+            wait_time (float, optional): Unused, kept so a file sink can stand in for the messenger.
+            flush (bool, optional): Whether to flush the write buffer after the batch. Default is True, disable to let the buffer fill between batches.
+            on_delivery (Callable[[bool], None], optional): Called with True for each message once it is written. Default is None.
+        """
+        if not messages or not self.file:
+            return
+        self.file.write("".join(f"{json.dumps(message)}\n" for message in messages).encode("utf-8"))
+        self.message_count = self.message_count + len(messages)
+        if flush:
+            self.file.flush()
+        self.__report_written(len(messages), on_delivery)
+
+    def produce_dead_letters(self, rejected_messages: list, source_topic: str, on_delivery: Callable[[bool], None] | None = None) -> int:
+        """
+        Writes rejected messages to the dead letter file as json lines, each with the raw message, the rejection reason
+        and error, its source and when it was rejected.
+
+        Args:
+            rejected_messages (list[RejectedMessage]): The rejected messages to write.
+            source_topic (str): The name of the topic, or file, the rejected messages were read from.
+            on_delivery (Callable[[bool], None], optional): Called with True for each rejected message once it is written. Default is None.
+
+        Returns:
+            int: The number of rejected messages written, 0 if they were dropped.
+        """
+        if not rejected_messages:
+            return 0
+        if not self.dead_letter_file:
+            self.logger.warning(f"Dropping {len(rejected_messages)} rejected messages, no dead letter file is configured...")
+            return 0
+
+        rejected_at = int(time.time() * 1000)
+        dead_letters = [{"message": rejected_message.message, "reason": rejected_message.reason, "error": rejected_message.error, "source": source_topic,
+                         "rejected_at": rejected_at} for rejected_message in rejected_messages]
+        self.dead_letter_file.write("".join(f"{json.dumps(dead_letter)}\n" for dead_letter in dead_letters).encode("utf-8"))
+        self.dead_letter_count = self.dead_letter_count + len(rejected_messages)
+        self.__report_written(len(rejected_messages), on_delivery)
+        return len(rejected_messages)
+
+    def __report_written(self, count: int, on_delivery: Callable[[bool], None] | None):
+        """
+        Private helper method for reporting written messages as delivered, as writes complete immediately.
+
+        Args:
+            count (int): The number of messages written.
+            on_delivery (Callable[[bool], None] | None): Called with True for each message written, if given.
+        """
+        if on_delivery:
+            for _ in range(count):
+                on_delivery(True)
\ No newline at end of file
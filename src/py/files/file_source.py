@@ -0,0 +1,108 @@
+import mmap
+import os
+from .compression import DEFAULT_BUFFER_SIZE, is_compressed, open_binary_file
+from logging import Logger
+
+class FileSource:
+    """
+    Source class for reading newline delimited messages, such as json, from a local file in place of the ingestor. Plain
+    files are memory mapped and gzip, bzip2 and xz archives are decompressed as they are read, both in large bulk reads
+    that are split into messages in memory, so large files are read at close to disk speed.
+
+    Args:
+        logger (Logger): The logger instance used to convey information for this class.
+        path (str): The path of the file to read.
+        read_size (int, optional): The number of bytes read at a time. Default is 8 MiB.
+
+    Attributes:
+        path (str): The path of the file to read.
+        read_size (int): The number of bytes read at a time.
+        bytes_read (int): The number of, decompressed, bytes read so far.
+        message_count (int): The number of messages returned so far.
+    """
+    def __init__(self, logger: Logger, path: str, read_size: int = DEFAULT_BUFFER_SIZE):
+        self.path = path
+        self.read_size = read_size
+        self.bytes_read = 0
+        self.message_count = 0
+        self.file = None
+        self.file_map: mmap.mmap | None = None
+        self.reader = None
+        self.remainder = b""
+        self.pending: list[bytes] = []
+        self.pending_index = 0
+        self.exhausted = False
+        self.logger = logger.getChild("file_source")
+
+    def __enter__(self):
+        self.logger.info(f"Opening {self.path} for reading...")
+        if is_compressed(self.path):
+            self.file = open_binary_file(self.path, "rb")
+            self.reader = self.file
+        else:
+            self.file = open(self.path, "rb")
+            # Empty files can't be mapped, and have nothing to read anyway
+            if os.fstat(self.file.fileno()).st_size > 0:
+                self.file_map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+                self.file_map.madvise(mmap.MADV_SEQUENTIAL)
+                self.reader = self.file_map
+            else:
+                self.exhausted = True
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.logger.info(f"Closing {self.path} after reading {self.message_count} messages...")
+        if self.file_map:
+            self.file_map.close()
+        if self.file:
+            self.file.close()
+
+    def is_finished(self) -> bool:
+        """
+        Checks whether every message in the file has been returned.
+
+        Returns:
+            bool: Whether the whole file has been read.
+        """
+        return self.exhausted and self.pending_index >= len(self.pending)
+
+    def consume_raw_messages(self, message_limit: int = 1, wait_time: float = 1.0) -> list[bytes] | None:
+        """
+        Reads the next messages from the file as raw payload bytes, skipping blank lines.
+
+        Args:
+            message_limit (int, optional): The specified limit on number of messages to return. Default limit is 1 message.
+            wait_time (float, optional): Unused, a file never waits for messages to arrive. Kept so a file source can stand in for the ingestor.
+
+        Returns:
+            list[bytes]: A list of message payloads.
+            None: If the whole file has been read.
+        """
+        while len(self.pending) - self.pending_index < message_limit and not self.exhausted:
+            self.__read_chunk()
+
+        messages = self.pending[self.pending_index:self.pending_index + message_limit]
+        self.pending_index = self.pending_index + len(messages)
+        self.message_count = self.message_count + len(messages)
+        return messages or None
+
+    def __read_chunk(self):
+        """
+        Private helper method for reading the next chunk of the file and splitting it into messages, carrying any
+        partial message at the end of the chunk over to the next.
+        """
+        chunk = self.reader.read(self.read_size)
+        self.bytes_read = self.bytes_read + len(chunk)
+        if chunk:
+            lines = (self.remainder + chunk).split(b"\n")
+            self.remainder = lines.pop()
+        else:
+            # The last message may not end with a newline
+            lines = [self.remainder]
+            self.remainder = b""
+            self.exhausted = True
+
+        # Drop the messages already returned before adding more, so pending messages never pile up
+        del self.pending[:self.pending_index]
+        self.pending_index = 0
+        self.pending.extend(line.rstrip(b"\r") for line in lines if line.strip())
\ No newline at end of file
@@ -0,0 +1,5 @@
+__all__ = ["Deadline", "DeliveryTracker", "FlowController", "InFlightBatch"]
+
+from src.py.flow.deadline import Deadline
+from src.py.flow.delivery_tracker import DeliveryTracker, InFlightBatch
+from src.py.flow.flow_controller import FlowController
\ No newline at end of file
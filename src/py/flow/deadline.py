@@ -0,0 +1,44 @@
+import time
+
+class Deadline:
+    """
+    Class for a deadline shared by every step of a shutdown, so each step is given what remains of it rather than a
+    fresh timeout of its own, and the shutdown as a whole takes a bounded time.
+
+    Args:
+        seconds (float): The time in seconds from starting the deadline until it passes.
+
+    Attributes:
+        seconds (float): The time in seconds from starting the deadline until it passes.
+        started_at (float | None): The perf_counter value the deadline was started at, None until started.
+    """
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.started_at: float | None = None
+
+    def start(self):
+        """
+        Starts the deadline, if not already started, so a second request to shut down doesn't extend it.
+        """
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+
+    def remaining(self) -> float:
+        """
+        Gets the time left until the deadline passes, the full deadline if it hasn't been started.
+
+        Returns:
+            float: The seconds remaining, 0 once the deadline has passed.
+        """
+        if self.started_at is None:
+            return self.seconds
+        return max(0.0, self.started_at + self.seconds - time.perf_counter())
+
+    def passed(self) -> bool:
+        """
+        Checks whether the deadline was started and has passed.
+
+        Returns:
+            bool: Whether the deadline has passed.
+        """
+        return self.started_at is not None and self.remaining() == 0.0
\ No newline at end of file
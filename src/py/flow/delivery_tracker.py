@@ -0,0 +1,191 @@
+from collections import deque
+from logging import Logger
+
+class InFlightBatch:
+    """
+    Class for a consumed batch making its way through the pipeline, holding the offsets to commit once every message
+    produced for it is delivered.
+
+    Attributes:
+        offsets (dict[tuple[str, int], int]): The next offset to consume of each topic partition the batch was consumed from.
+        message_count (int): The number of messages consumed.
+        pending_count (int): The number of messages produced for the batch still awaiting delivery.
+        failed_count (int): The number of messages produced for the batch that failed delivery.
+        handed_off (bool): Whether the batch was processed and every message for it handed to the producer.
+    """
+    __slots__ = ("offsets", "message_count", "pending_count", "failed_count", "handed_off")
+
+    def __init__(self, offsets: dict[tuple[str, int], int], message_count: int):
+        self.offsets = offsets
+        self.message_count = message_count
+        self.pending_count = 0
+        self.failed_count = 0
+        self.handed_off = False
+
+class DeliveryTracker:
+    """
+    Tracker class accounting for messages in flight between consumption and delivery, so only the offsets of batches
+    whose output was delivered are committed. Batches are committed in the order they were consumed, a batch still in
+    flight holds back the commits of every batch after it, so a restart replays them rather than losing them. A batch
+    with failed deliveries would hold them back for good, so a failed delivery is fatal, and the batches held back are
+    capped so fetching waits on commits rather than piling up batches to replay.
+
+    Args:
+        logger (Logger): The logger instance used to convey information for this class.
+        max_held_batches (int, optional): The number of uncommitted batches at which the tracker is full. Default is 1000.
+
+    Attributes:
+        batches (deque[InFlightBatch]): The batches not yet committed, oldest first.
+        processing_count (int): The number of consumed messages still being processed or produced.
+        delivering_count (int): The number of produced messages awaiting delivery.
+        delivered_count (int): The total number of produced messages delivered.
+        failed_count (int): The total number of produced messages that failed delivery.
+        committed_count (int): The total number of consumed messages whose offsets were committed.
+        revoked_count (int): The total number of consumed messages dropped uncommitted as their partitions were revoked.
+        max_held_batches (int): The number of uncommitted batches at which the tracker is full.
+    """
+    def __init__(self, logger: Logger, max_held_batches: int = 1000):
+        if max_held_batches < 1:
+            raise ValueError(f"The maximum number of held back batches must be at least 1, got {max_held_batches}")
+        self.logger = logger.getChild("delivery_tracker")
+        self.batches: deque[InFlightBatch] = deque()
+        self.processing_count = 0
+        self.delivering_count = 0
+        self.delivered_count = 0
+        self.failed_count = 0
+        self.committed_count = 0
+        self.revoked_count = 0
+        self.max_held_batches = max_held_batches
+
+    def start_batch(self, offsets: dict[tuple[str, int], int], message_count: int) -> InFlightBatch:
+        """
+        Starts tracking a consumed batch.
+
+        Args:
+            offsets (dict[tuple[str, int], int]): The next offset to consume of each topic partition the batch was consumed from.
+            message_count (int): The number of messages consumed.
+
+        Returns:
+            InFlightBatch: The batch, to hand off once its messages are produced.
+        """
+        batch = InFlightBatch(offsets, message_count)
+        self.batches.append(batch)
+        self.processing_count = self.processing_count + message_count
+        return batch
+
+    def hand_off(self, batch: InFlightBatch, produced_count: int):
+        """
+        Moves a produced batch on to awaiting delivery. Deliveries reported while the batch was being produced were
+        already counted against it, so its pending count settles once the produced count is added.
+
+        Args:
+            batch (InFlightBatch): The produced batch.
+            produced_count (int): The number of messages produced for the batch.
+        """
+        self.processing_count = self.processing_count - batch.message_count
+        self.delivering_count = self.delivering_count + produced_count
+        batch.pending_count = batch.pending_count + produced_count
+        batch.handed_off = True
+
+    def deliver(self, batch: InFlightBatch, delivered: bool):
+        """
+        Records the delivery report of a message produced for a batch.
+
+        Args:
+            batch (InFlightBatch): The batch the message was produced for.
+            delivered (bool): Whether the message was delivered.
+        """
+        batch.pending_count = batch.pending_count - 1
+        self.delivering_count = self.delivering_count - 1
+        if delivered:
+            self.delivered_count = self.delivered_count + 1
+        else:
+            batch.failed_count = batch.failed_count + 1
+            self.failed_count = self.failed_count + 1
+
+    def has_failed(self) -> bool:
+        """
+        Checks whether any message failed delivery, which holds back every later commit for good, so consuming should
+        stop and the delivered batches be committed before exiting.
+
+        Returns:
+            bool: Whether any message failed delivery.
+        """
+        return self.failed_count > 0
+
+    def is_full(self) -> bool:
+        """
+        Checks whether the maximum number of batches are held back uncommitted, so fetching should wait on deliveries.
+
+        Returns:
+            bool: Whether the tracker is full.
+        """
+        return len(self.batches) >= self.max_held_batches
+
+    def pop_committable_offsets(self) -> dict[tuple[str, int], int]:
+        """
+        Takes the offsets of the oldest batches whose messages were all delivered, stopping at the first batch that isn't.
+
+        Returns:
+            dict[tuple[str, int], int]: The offset to commit for each topic partition, empty if nothing can be committed.
+        """
+        offsets = {}
+        while self.batches:
+            batch = self.batches[0]
+            if not batch.handed_off or batch.pending_count or batch.failed_count:
+                break
+            self.batches.popleft()
+            offsets.update(batch.offsets)
+            self.committed_count = self.committed_count + batch.message_count
+        return offsets
+
+    def revoke(self, partitions: list[tuple[str, int]]) -> dict[tuple[str, int], int]:
+        """
+        Releases revoked topic partitions, taking the offsets to commit for them before they're handed to another consumer
+        and dropping them from the batches held back. Offsets only order commits within their own partition, so each revoked
+        partition is committed up to its first batch not yet delivered, rather than stopping at the first such batch overall.
+        Batches left without partitions are dropped, and their messages are consumed again by the partitions' new owner.
+
+        Args:
+            partitions (list[tuple[str, int]]): The revoked topic partitions.
+
+        Returns:
+            dict[tuple[str, int], int]: The offset to commit for each revoked topic partition, empty if nothing can be committed.
+        """
+        revoked = set(partitions)
+        offsets = {}
+        held_back = set()
+        kept_batches = deque()
+        for batch in self.batches:
+            committed = batch.handed_off and not batch.pending_count and not batch.failed_count
+            for key in revoked.intersection(batch.offsets):
+                if committed and key not in held_back:
+                    offsets[key] = batch.offsets[key]
+                else:
+                    held_back.add(key)
+                    committed = False
+                del batch.offsets[key]
+
+            # Drop the batches that only held revoked partitions, counting those whose offsets are committed here
+            if batch.offsets:
+                kept_batches.append(batch)
+            elif committed:
+                self.committed_count = self.committed_count + batch.message_count
+            else:
+                self.revoked_count = self.revoked_count + batch.message_count
+        if len(kept_batches) < len(self.batches):
+            self.logger.info(f"Dropped {len(self.batches) - len(kept_batches)} batches held back for revoked partitions {sorted(revoked)}...")
+        self.batches = kept_batches
+        return offsets
+
+    def report(self):
+        """
+        Reports the messages delivered, failed and left in flight.
+        """
+        held_back_count = sum(batch.message_count for batch in self.batches)
+        self.logger.info(f"Delivered {self.delivered_count} messages with {self.failed_count} failed, committed offsets of {self.committed_count} consumed messages...")
+        if self.revoked_count:
+            self.logger.info(f"Left offsets of {self.revoked_count} consumed messages uncommitted as their partitions were revoked, they were consumed again by the partitions' new owners...")
+        if held_back_count:
+            self.logger.warning(f"Left offsets of {held_back_count} consumed messages uncommitted, with {self.processing_count} still processing and "
+                                f"{self.delivering_count} undelivered, they will be consumed again on restart...")
\ No newline at end of file
@@ -0,0 +1,87 @@
+import time
+from logging import Logger
+
+class FlowController:
+    """
+    Controller class for credit based backpressure between the ingestor and the messenger. The producer's local queue
+    is the credit, once it fills past the high watermark fetching is throttled until it drains below the low watermark,
+    so a slow output broker holds back consumption rather than filling the queue.
+
+    Args:
+        logger (Logger): The logger instance used to convey information for this class.
+        high_watermark (int): The queued message count at which fetching is throttled, 0 disables flow control.
+        low_watermark (int): The queued message count below which throttled fetching resumes.
+
+    Attributes:
+        high_watermark (int): The queued message count at which fetching is throttled.
+        low_watermark (int): The queued message count below which throttled fetching resumes.
+        enabled (bool): Whether flow control is enabled.
+        throttled (bool): Whether fetching is currently throttled.
+        throttle_count (int): The number of times fetching has been throttled.
+        throttled_seconds (float): The seconds spent throttled, up to the last resumption.
+        throttled_at (float | None): The perf_counter value the current throttle began at.
+    """
+    def __init__(self, logger: Logger, high_watermark: int, low_watermark: int):
+        if high_watermark < 0 or low_watermark < 0:
+            raise ValueError(f"Flow control watermarks must not be negative, got {high_watermark} and {low_watermark}")
+        if high_watermark and low_watermark >= high_watermark:
+            raise ValueError(f"The low watermark ({low_watermark}) must be below the high watermark ({high_watermark})")
+        self.logger = logger.getChild("flow_controller")
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.enabled = high_watermark > 0
+        self.throttled = False
+        self.throttle_count = 0
+        self.throttled_seconds = 0.0
+        self.throttled_at: float | None = None
+
+    def update(self, queue_length: int) -> bool:
+        """
+        Updates the throttle with the producer's current queue length. Between the watermarks the throttle keeps its
+        state, so fetching isn't toggled on and off by every delivery report.
+
+        Args:
+            queue_length (int): The number of messages waiting in the producer's local queue.
+
+        Returns:
+            bool: Whether fetching should be throttled.
+        """
+        if not self.enabled:
+            return False
+
+        if not self.throttled and queue_length >= self.high_watermark:
+            self.logger.warning(f"Producer queue holds {queue_length} messages, throttling fetching until it drains below {self.low_watermark}...")
+            self.throttled = True
+            self.throttle_count = self.throttle_count + 1
+            self.throttled_at = time.perf_counter()
+        elif self.throttled and queue_length < self.low_watermark:
+            throttled_for = time.perf_counter() - self.throttled_at
+            self.logger.info(f"Producer queue drained to {queue_length} messages, resuming fetching after {throttled_for:.2f} seconds...")
+            self.throttled = False
+            self.throttled_seconds = self.throttled_seconds + throttled_for
+            self.throttled_at = None
+        return self.throttled
+
+    def total_throttled_seconds(self) -> float:
+        """
+        Gets the time spent throttled, including any throttle still in progress.
+
+        Returns:
+            float: The seconds spent throttled.
+        """
+        if self.throttled_at is None:
+            return self.throttled_seconds
+        return self.throttled_seconds + time.perf_counter() - self.throttled_at
+
+    def report(self, elapsed_seconds: float = 0.0):
+        """
+        Reports the number of throttles and the time spent throttled.
+
+        Args:
+            elapsed_seconds (float, optional): The seconds the pipeline ran for, to report the throttled share of. Default is 0, not reporting a share.
+        """
+        if not self.enabled:
+            return
+        throttled_seconds = self.total_throttled_seconds()
+        share = f" ({throttled_seconds / elapsed_seconds:.1%} of {elapsed_seconds:.2f} seconds)" if elapsed_seconds > 0 else ""
+        self.logger.info(f"Throttled fetching {self.throttle_count} times for {throttled_seconds:.2f} seconds{share}...")
\ No newline at end of file
@@ -0,0 +1,3 @@
+__all__ = ["MessageGenerator"]
+
+from src.py.generator.message_generator import MessageGenerator
\ No newline at end of file
@@ -0,0 +1,64 @@
+import json
+import random
+import uuid
+from src.py.constants import message_keys
+
+class MessageGenerator:
+    """
+    Generator class for building synthetic user login messages in the same shape as the inbound topic's messages. Each user
+    keeps a fixed device, ip and locale, so the consumer's statistics behave as they would on real traffic.
+
+    Args:
+        user_count (int): The number of distinct users to generate logins for.
+        seed (int, optional): The seed for the random number generator. Default is None, seeding from the system.
+        missing_field_rate (float, optional): The fraction of messages built without their device type. Default is 0.05.
+
+    Attributes:
+        users (list[tuple[bytes, dict[str, str]]]): The encoded key and fixed message fields of each user.
+        missing_field_rate (float): The fraction of messages built without their device type.
+    """
+    APP_VERSIONS = ("2.3.0", "2.4.1", "2.5.0", "3.0.0")
+    DEVICE_TYPES = ("android", "iOS")
+    LOCALES = ("RU", "US", "DE", "FR", "IN", "BR", "JP", "ES")
+
+    def __init__(self, user_count: int, seed: int | None = None, missing_field_rate: float = 0.05):
+        if user_count < 1:
+            raise ValueError("The message generator requires at least one user")
+        self.random = random.Random(seed)
+        self.missing_field_rate = missing_field_rate
+        self.users = [self.__build_user() for _ in range(user_count)]
+
+    def __build_user(self) -> tuple[bytes, dict[str, str]]:
+        """
+        Private helper method for building a user's key and fixed message fields.
+
+        Returns:
+            tuple[bytes, dict[str, str]]: The encoded user id and the user's fixed message fields.
+        """
+        user_id = str(uuid.UUID(int=self.random.getrandbits(128), version=4))
+        fields = {
+            message_keys.USER_ID: user_id,
+            message_keys.APP_VERSION: self.random.choice(self.APP_VERSIONS),
+            message_keys.DEVICE_TYPE: self.random.choice(self.DEVICE_TYPES),
+            message_keys.IP_ADDRESS: ".".join(str(self.random.randrange(1, 255)) for _ in range(4)),
+            message_keys.LOCALE: self.random.choice(self.LOCALES),
+            message_keys.DEVICE_ID: f"{self.random.randrange(1000):03}-{self.random.randrange(100):02}-{self.random.randrange(10000):04}"
+        }
+        return user_id.encode("utf-8"), fields
+
+    def build_message(self, timestamp: int) -> tuple[bytes, bytes]:
+        """
+        Builds a login message for a random user.
+
+        Args:
+            timestamp (int): The login timestamp in epoch seconds.
+
+        Returns:
+            tuple[bytes, bytes]: The message key, the user's id, and the message value.
+        """
+        key, fields = self.random.choice(self.users)
+        message = dict(fields)
+        if self.random.random() < self.missing_field_rate:
+            del message[message_keys.DEVICE_TYPE]
+        message[message_keys.TIMESTAMP] = str(timestamp)
+        return key, json.dumps(message).encode("utf-8")
\ No newline at end of file
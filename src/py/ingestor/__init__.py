@@ -1,3 +1,4 @@
-__all__ = ["Ingestor"]
+__all__ = ["Ingestor", "RangeIngestor"]
 
-from src.py.ingestor.ingestor import Ingestor
\ No newline at end of file
+from src.py.ingestor.ingestor import Ingestor
+from src.py.ingestor.range_ingestor import RangeIngestor
\ No newline at end of file
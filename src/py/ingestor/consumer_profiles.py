@@ -0,0 +1,116 @@
+from collections.abc import Mapping
+
+"""
+Named librdkafka consumer performance profiles, and validation of the fetch settings they and any overrides configure.
+"""
+
+# Prefix of environment variables passed through to the consumer as librdkafka settings
+ENV_PREFIX = "KAFKA_CONSUMER_"
+
+# Settings owned by the ingestor's own arguments, which profiles and overrides may not replace
+RESERVED_KEYS = ("bootstrap.servers", "group.id", "group.instance.id", "auto.offset.reset", "enable.auto.commit")
+
+# librdkafka's default maximum message size, which the fetch response size may not go below
+DEFAULT_MESSAGE_MAX_BYTES = 1000000
+
+ASSIGNMENT_STRATEGIES = ("range", "roundrobin", "cooperative-sticky")
+
+# Ranges librdkafka accepts for the integer fetch settings
+INTEGER_RANGES = {
+    "fetch.min.bytes": (1, 100000000),
+    "fetch.max.bytes": (0, 2147483135),
+    "fetch.wait.max.ms": (0, 300000),
+    "max.partition.fetch.bytes": (1, 1000000000),
+    "message.max.bytes": (1000, 1000000000),
+    "queued.min.messages": (1, 10000000),
+    "queued.max.messages.kbytes": (1, 2097151)
+}
+
+PROFILES = {
+    # librdkafka's defaults
+    "default": {},
+    # Hand every message over as soon as it arrives, keeping little prefetched so a rebalance or restart has little to redo
+    "low-latency": {
+        "fetch.min.bytes": 1,
+        "fetch.wait.max.ms": 10,
+        "fetch.max.bytes": 5242880,
+        "max.partition.fetch.bytes": 1048576,
+        "queued.min.messages": 1000,
+        "queued.max.messages.kbytes": 8192,
+        "partition.assignment.strategy": "cooperative-sticky"
+    },
+    # Let the broker build large fetch responses and keep a deep prefetch queue, trading latency for fewer, larger round trips
+    "high-throughput": {
+        "fetch.min.bytes": 1048576,
+        "fetch.wait.max.ms": 500,
+        "fetch.max.bytes": 104857600,
+        "max.partition.fetch.bytes": 10485760,
+        "queued.min.messages": 500000,
+        "queued.max.messages.kbytes": 262144,
+        "partition.assignment.strategy": "roundrobin"
+    }
+}
+
+def get_env_overrides(environ: Mapping[str, str]) -> dict[str, str]:
+    """
+    Collects librdkafka settings from prefixed environment variables, mapping for example KAFKA_CONSUMER_FETCH_WAIT_MAX_MS
+    to fetch.wait.max.ms.
+
+    Args:
+        environ (Mapping[str, str]): The environment variables.
+
+    Returns:
+        dict[str, str]: The librdkafka settings, by key.
+    """
+    return {name[len(ENV_PREFIX):].lower().replace("_", "."): value for name, value in environ.items() if name.startswith(ENV_PREFIX) and len(name) > len(ENV_PREFIX)}
+
+def build_consumer_config(profile: str, overrides: Mapping[str, str | int] | None = None) -> dict[str, str | int]:
+    """
+    Builds and validates the librdkafka settings for a consumer profile, with any overrides applied on top.
+
+    Args:
+        profile (str): The name of the profile, one of "default", "low-latency" or "high-throughput".
+        overrides (Mapping[str, str | int], optional): librdkafka settings replacing the profile's. Default is None, using the profile as is.
+
+    Returns:
+        dict[str, str | int]: The validated librdkafka settings, with integer settings converted to integers.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown consumer profile '{profile}', expected one of {", ".join(PROFILES)}")
+    consumer_config = {**PROFILES[profile], **(overrides or {})}
+
+    for key in consumer_config:
+        if key in RESERVED_KEYS:
+            raise ValueError(f"The consumer setting '{key}' is set by the ingestor and can't be overridden")
+
+    # Convert and range check integer settings, which arrive as strings from the environment
+    for key, (minimum, maximum) in INTEGER_RANGES.items():
+        if key not in consumer_config:
+            continue
+        try:
+            value = int(consumer_config[key])
+        except ValueError:
+            raise ValueError(f"The consumer setting '{key}' must be an integer, got '{consumer_config[key]}'") from None
+        if not minimum <= value <= maximum:
+            raise ValueError(f"The consumer setting '{key}' must be between {minimum} and {maximum}, got {value}")
+        consumer_config[key] = value
+
+    # Check settings against each other, as librdkafka only reports conflicts once the consumer is created
+    fetch_max_bytes = consumer_config.get("fetch.max.bytes")
+    if fetch_max_bytes is not None:
+        message_max_bytes = consumer_config.get("message.max.bytes", DEFAULT_MESSAGE_MAX_BYTES)
+        if fetch_max_bytes < message_max_bytes:
+            raise ValueError(f"The consumer setting 'fetch.max.bytes' ({fetch_max_bytes}) must be at least 'message.max.bytes' ({message_max_bytes})")
+        if consumer_config.get("fetch.min.bytes", 1) > fetch_max_bytes:
+            raise ValueError(f"The consumer setting 'fetch.min.bytes' ({consumer_config["fetch.min.bytes"]}) must not exceed 'fetch.max.bytes' ({fetch_max_bytes})")
+
+    strategy = consumer_config.get("partition.assignment.strategy")
+    if strategy is not None:
+        strategies = [name.strip() for name in str(strategy).split(",")]
+        for name in strategies:
+            if name not in ASSIGNMENT_STRATEGIES:
+                raise ValueError(f"Unknown partition assignment strategy '{name}', expected one of {", ".join(ASSIGNMENT_STRATEGIES)}")
+        if "cooperative-sticky" in strategies and len(strategies) > 1:
+            raise ValueError("The cooperative-sticky partition assignment strategy can't be combined with other strategies")
+
+    return consumer_config
\ No newline at end of file
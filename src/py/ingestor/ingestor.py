@@ -1,4 +1,6 @@
-from confluent_kafka import Consumer, Message
+import time
+from collections.abc import Callable
+from confluent_kafka import Consumer, KafkaException, Message, TopicPartition
 from logging import Logger
 
 class Ingestor:
@@ -10,27 +12,53 @@ class Ingestor:
         bootstrap_server (str): The desired kafka broker to connect to.
         group_id (str): The group identifier for this ingestor.
         auto_offset_reset (str): Offset location for the ingestor to begin reading messages from if no offset is found.
+        topic_name (str): The name of the topic to read from.
+        group_instance_id (str, optional): A static group member identifier, letting a restarted ingestor rejoin its group without a rebalance. Default is None, joining dynamically.
+        tuning_config (dict[str, str | int], optional): Additional librdkafka settings, such as those built for a consumer profile. Default is None, using librdkafka's defaults.
+        manual_commit (bool, optional): Whether offsets are only committed through commit_offsets, once their messages are delivered. Default is False, committing consumed offsets automatically.
+        revoke_handler (Callable[[list[tuple[str, int]]], dict[tuple[str, int], int]], optional): With manual commits, called with the topic partitions a rebalance revokes
+            to get the offsets to commit for them before they're handed to another consumer. Default is None, committing nothing on revocation.
 
     Attributes:
         consumer (Consumer): The internal kafka message consumer.
         topic_name (str): The name of the topic to read from.
+        paused (bool): Whether fetching is paused.
+        consumed_offsets (dict[tuple[str, int], int]): The next offset to consume of each topic partition the last batch was consumed from.
+        commits_in_flight (int): The number of offset commits awaiting their result.
     """
-    def __init__(self, logger: Logger, bootstrap_server: str, group_id: str, auto_offset_reset: str, topic_name: str):
+    def __init__(self, logger: Logger, bootstrap_server: str, group_id: str, auto_offset_reset: str, topic_name: str, group_instance_id: str | None = None,
+                 tuning_config: dict[str, str | int] | None = None, manual_commit: bool = False,
+                 revoke_handler: Callable[[list[tuple[str, int]]], dict[tuple[str, int], int]] | None = None):
         # Create kafka consumer and store topic
         consumer_config = {
             "bootstrap.servers": bootstrap_server,
             "group.id": group_id,
             "auto.offset.reset": auto_offset_reset
         }
+        if group_instance_id:
+            consumer_config["group.instance.id"] = group_instance_id
+        if manual_commit:
+            consumer_config["enable.auto.commit"] = False
+            consumer_config["on_commit"] = self.__on_commit
+        consumer_config.update(tuning_config or {})
 
         self.consumer = Consumer(consumer_config)
         self.topic_name = topic_name
+        self.manual_commit = manual_commit
+        self.revoke_handler = revoke_handler
+        self.paused = False
+        self.consumed_offsets: dict[tuple[str, int], int] = {}
+        self.commits_in_flight = 0
         self.logger = logger.getChild("ingestor")
 
     def __enter__(self):
         # Subscribe consumer to topic
+        # Subscribe consumer to topic, committing what was delivered of revoked partitions when offsets are committed manually
         self.logger.info(f"Subscribing to topic {self.topic_name}...")
-        self.consumer.subscribe([self.topic_name])
+        if self.manual_commit:
+            self.consumer.subscribe([self.topic_name], on_revoke=self.__on_revoke)
+        else:
+            self.consumer.subscribe([self.topic_name])
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
@@ -38,6 +66,44 @@ class Ingestor:
         self.logger.info("Closing consumer kafka connection...")
         self.consumer.close()
 
+    def pause(self):
+        """
+        Pauses fetching from every assigned partition, so consuming returns nothing until fetching is resumed. Safe to
+        call repeatedly, which also pauses any partitions assigned by a rebalance since the last call.
+        """
+        if not self.paused:
+            self.logger.info(f"Pausing fetching from topic {self.topic_name}...")
+            self.paused = True
+        self.consumer.pause(self.consumer.assignment())
+
+    def resume(self):
+        """
+        Resumes fetching from every assigned partition, if paused.
+        """
+        if not self.paused:
+            return
+        self.logger.info(f"Resuming fetching from topic {self.topic_name}...")
+        self.paused = False
+        self.consumer.resume(self.consumer.assignment())
+
+    def commit_offsets(self, offsets: dict[tuple[str, int], int], timeout: float | None = None):
+        """
+        Commits offsets, such as those of batches whose messages were delivered, without blocking on the commit. A failed
+        commit is logged rather than raised, as it only means the messages after the last committed offsets are consumed again.
+
+        Args:
+            offsets (dict[tuple[str, int], int]): The offset to commit for each topic partition.
+            timeout (float, optional): The most time in seconds to wait for every commit in flight to complete, for the final commit on shutdown. Default is None, returning without waiting.
+        """
+        if offsets:
+            try:
+                self.consumer.commit(offsets=[TopicPartition(topic, partition, offset) for (topic, partition), offset in offsets.items()], asynchronous=True)
+                self.commits_in_flight = self.commits_in_flight + 1
+            except KafkaException as e:
+                self.logger.warning(f"Failed to commit offsets {offsets}: {e}")
+        if timeout is not None:
+            self.__wait_for_commits(timeout)
+
     def consume_messages(self, message_limit: int = 1, wait_time: float = 1.0) -> list[str] | None:
         """
         Consumes messages from the kafka cluster.
@@ -50,6 +116,23 @@ class Ingestor:
             list[str]: A list of messages, as strings, of all error free messages consumed. 
             None: If no messages are available.
         """
+        raw_messages = self.consume_raw_messages(message_limit, wait_time)
+        if raw_messages is None:
+            return None
+        return [raw_message.decode("utf-8") for raw_message in raw_messages]
+
+    def consume_raw_messages(self, message_limit: int = 1, wait_time: float = 1.0) -> list[bytes] | None:
+        """
+        Consumes messages from the kafka cluster as raw payload bytes, leaving decoding to the caller.
+
+        Args:
+            message_limit (int, optional): The specified limit on number of messages to return. Default limit is 1 message.
+            wait_time (float, optional): The specified time in seconds to wait when message_limit has not been hit and there are no messages to consume. Default time is 1.
+
+        Returns:
+            list[bytes]: A list of message payloads of all error free messages consumed.
+            None: If no messages are available.
+        """
         try:
             consumed_messages = self.consumer.consume(num_messages=message_limit, timeout=wait_time)
             if consumed_messages:
@@ -61,7 +144,53 @@ class Ingestor:
             self.logger.critical(f"Fatal error consuming messages in ingestor: {e}")
             raise
 
-    def __get_unerrored_messages(self, consumed_messages: list[Message]) -> list[str]:
+    def __wait_for_commits(self, timeout: float):
+        """
+        Private helper method for serving commit callbacks until every commit in flight completes or the timeout passes.
+        Fetching is paused by then, so polling only serves callbacks, and any message it returns is consumed again on restart.
+
+        Args:
+            timeout (float): The most time in seconds to wait.
+        """
+        deadline_at = time.perf_counter() + timeout
+        while self.commits_in_flight and time.perf_counter() < deadline_at:
+            self.consumer.poll(min(0.1, max(0.0, deadline_at - time.perf_counter())))
+        if self.commits_in_flight:
+            self.logger.warning(f"Gave up waiting on {self.commits_in_flight} offset commits after {timeout:.2f} seconds...")
+
+    def __on_revoke(self, consumer: Consumer, partitions: list[TopicPartition]):
+        """
+        Private callback method for partitions revoked by a rebalance, committing the offsets the revoke handler gives for
+        them. The commit is synchronous, as the partitions are handed to another consumer once this returns, and anything
+        left uncommitted is consumed again by it.
+
+        Args:
+            consumer (Consumer): The consumer the partitions were revoked from.
+            partitions (list[TopicPartition]): The revoked partitions.
+        """
+        self.logger.info(f"Partitions {[(partition.topic, partition.partition) for partition in partitions]} revoked by a rebalance...")
+        if self.revoke_handler is None:
+            return
+        offsets = self.revoke_handler([(partition.topic, partition.partition) for partition in partitions])
+        if offsets:
+            try:
+                consumer.commit(offsets=[TopicPartition(topic, partition, offset) for (topic, partition), offset in offsets.items()], asynchronous=False)
+            except KafkaException as e:
+                self.logger.warning(f"Failed to commit offsets {offsets} of revoked partitions: {e}")
+
+    def __on_commit(self, err, partitions: list[TopicPartition]):
+        """
+        Private callback method for the result of an offset commit.
+
+        Args:
+            err: Any error that occurred committing the offsets.
+            partitions (list[TopicPartition]): The partitions whose offsets were committed.
+        """
+        self.commits_in_flight = max(0, self.commits_in_flight - 1)
+        if err is not None:
+            self.logger.warning(f"Failed to commit offsets {[(partition.topic, partition.partition, partition.offset) for partition in partitions]}: {err}")
+
+    def __get_unerrored_messages(self, consumed_messages: list[Message]) -> list[bytes]:
         """
         Private helper method for getting unerrored messages.
 
@@ -69,9 +198,10 @@ class Ingestor:
             consumed_messages (list[Message]): The list of messages consumed.
 
         Returns:
-            list[str]: A list of unerrored messages as strings.
+            list[bytes]: A list of unerrored message payloads.
         """
         unerrored_messages = []
+        consumed_offsets = {}
         for msg in consumed_messages:
             # Check for individual message errors
             if msg.error():
@@ -81,5 +211,7 @@ class Ingestor:
                     # Raise an exception for the fatal error
                     raise Exception(msg.error().str())
             else:
-                unerrored_messages.append(msg.value().decode("utf-8"))
+                unerrored_messages.append(msg.value())
+                consumed_offsets[(msg.topic(), msg.partition())] = msg.offset() + 1
+        self.consumed_offsets = consumed_offsets
         return unerrored_messages
\ No newline at end of file
@@ -0,0 +1,193 @@
+import uuid
+from confluent_kafka import Consumer, KafkaError, Message, TopicPartition
+from logging import Logger
+
+class RangeIngestor:
+    """
+    Ingestion class for reading a fixed offset or timestamp range of a kafka topic, such as for a backfill. Partitions are
+    assigned directly rather than through a subscription, under a throwaway consumer group that never commits offsets,
+    so reading a range leaves the pipeline's consumer group untouched.
+
+    Args:
+        logger (Logger): The logger instance used to convey information for this class.
+        bootstrap_server (str): The desired kafka broker to connect to.
+        topic_name (str): The name of the topic to read from.
+        start_offset (int, optional): The offset to start reading each partition at. Default is None, starting at the earliest offset.
+        end_offset (int, optional): The offset to stop reading each partition before. Default is None, stopping at the latest offset on entry.
+        start_timestamp_ms (int, optional): The epoch time in milliseconds to start reading at, taking precedence over start_offset. Default is None.
+        end_timestamp_ms (int, optional): The epoch time in milliseconds to stop reading before, taking precedence over end_offset. Default is None.
+        tuning_config (dict[str, str | int], optional): Additional librdkafka settings, such as those built for a consumer profile. Default is None, using librdkafka's defaults.
+
+    Attributes:
+        consumer (Consumer): The internal kafka message consumer.
+        topic_name (str): The name of the topic to read from.
+        partition_ranges (dict[int, tuple[int, int]]): The start and exclusive end offsets of each partition being read.
+        positions (dict[int, int]): The offset after the last message read from each partition being read.
+        total_messages (int): The number of offsets across every partition's range.
+    """
+    def __init__(self, logger: Logger, bootstrap_server: str, topic_name: str, start_offset: int | None = None, end_offset: int | None = None,
+                 start_timestamp_ms: int | None = None, end_timestamp_ms: int | None = None, tuning_config: dict[str, str | int] | None = None):
+        consumer_config = {
+            "bootstrap.servers": bootstrap_server,
+            "group.id": f"range-ingestor-{uuid.uuid4().hex}",
+            "enable.auto.commit": False,
+            "enable.auto.offset.store": False,
+            "enable.partition.eof": True
+        }
+        consumer_config.update(tuning_config or {})
+
+        self.consumer = Consumer(consumer_config)
+        self.topic_name = topic_name
+        self.start_offset = start_offset
+        self.end_offset = end_offset
+        self.start_timestamp_ms = start_timestamp_ms
+        self.end_timestamp_ms = end_timestamp_ms
+        self.partition_ranges: dict[int, tuple[int, int]] = {}
+        self.positions: dict[int, int] = {}
+        self.total_messages = 0
+        self.logger = logger.getChild("range_ingestor")
+
+    def __enter__(self):
+        # Resolve the range of each partition, then assign the partitions with anything to read at their start offsets
+        self.partition_ranges = self.__resolve_partition_ranges()
+        self.positions = {partition: start for partition, (start, _) in self.partition_ranges.items()}
+        self.total_messages = sum(end - start for start, end in self.partition_ranges.values())
+        self.logger.info(f"Reading {self.total_messages} messages from {len(self.partition_ranges)} partitions of topic {self.topic_name}...")
+        self.consumer.assign([TopicPartition(self.topic_name, partition, start) for partition, (start, _) in self.partition_ranges.items()])
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Close connection to cluster and cleanup consumer
+        self.logger.info("Closing range consumer kafka connection...")
+        self.consumer.close()
+
+    def is_finished(self) -> bool:
+        """
+        Checks whether every partition has been read to the end of its range.
+
+        Returns:
+            bool: Whether the whole range has been read.
+        """
+        return not self.positions
+
+    def consumed_messages(self) -> int:
+        """
+        Gets the number of offsets read so far across every partition's range.
+
+        Returns:
+            int: The number of offsets read.
+        """
+        return sum(min(self.positions.get(partition, end), end) - start for partition, (start, end) in self.partition_ranges.items())
+
+    def consume_raw_messages(self, message_limit: int = 1, wait_time: float = 1.0) -> list[bytes] | None:
+        """
+        Consumes messages within the range as raw payload bytes, dropping any read past the end of their partition's range.
+
+        Args:
+            message_limit (int, optional): The specified limit on number of messages to return. Default limit is 1 message.
+            wait_time (float, optional): The specified time in seconds to wait when message_limit has not been hit and there are no messages to consume. Default time is 1.
+
+        Returns:
+            list[bytes]: A list of message payloads of all error free messages within the range.
+            None: If no messages are available.
+        """
+        try:
+            consumed_messages = self.consumer.consume(num_messages=message_limit, timeout=wait_time)
+            if not consumed_messages:
+                return None
+            self.logger.debug(f"Consumed {len(consumed_messages)} messages from topic {self.topic_name}...")
+            return self.__get_messages_in_range(consumed_messages)
+        except Exception as e:
+            self.logger.critical(f"Fatal error consuming messages in range ingestor: {e}")
+            raise
+
+    def __get_messages_in_range(self, consumed_messages: list[Message]) -> list[bytes]:
+        """
+        Private helper method for getting the unerrored messages within each partition's range, and finishing
+        partitions as they reach the end of their range.
+
+        Args:
+            consumed_messages (list[Message]): The list of messages consumed.
+
+        Returns:
+            list[bytes]: A list of unerrored message payloads within the range.
+        """
+        messages_in_range = []
+        for msg in consumed_messages:
+            partition = msg.partition()
+            if partition not in self.positions:
+                continue
+            _, end = self.partition_ranges[partition]
+
+            # Check for individual message errors, reaching the end of a partition only means it was read to the end
+            if msg.error():
+                if msg.error().code() == KafkaError._PARTITION_EOF:
+                    self.__finish_partition(partition)
+                    continue
+                self.logger.error(f"Error consuming message from partition {partition}: {msg.error().str()}")
+                if msg.error().fatal():
+                    # Raise an exception for the fatal error
+                    raise Exception(msg.error().str())
+                continue
+
+            if msg.offset() < end:
+                messages_in_range.append(msg.value())
+                self.positions[partition] = msg.offset() + 1
+            if msg.offset() >= end - 1:
+                self.__finish_partition(partition)
+        return messages_in_range
+
+    def __finish_partition(self, partition: int):
+        """
+        Private helper method for stopping reading a partition once it reaches the end of its range.
+
+        Args:
+            partition (int): The partition to stop reading.
+        """
+        self.logger.info(f"Finished reading partition {partition} of topic {self.topic_name}...")
+        del self.positions[partition]
+        self.consumer.pause([TopicPartition(self.topic_name, partition)])
+
+    def __resolve_partition_ranges(self) -> dict[int, tuple[int, int]]:
+        """
+        Private helper method for resolving the start and exclusive end offsets of each partition's range, clamped to
+        the offsets the partition still holds.
+
+        Returns:
+            dict[int, tuple[int, int]]: The start and end offsets of each partition with anything to read.
+        """
+        topic_metadata = self.consumer.list_topics(self.topic_name, timeout=10).topics.get(self.topic_name)
+        if topic_metadata is None or topic_metadata.error is not None:
+            raise ValueError(f"Topic {self.topic_name} is unavailable")
+
+        partition_ranges = {}
+        for partition in sorted(topic_metadata.partitions):
+            low, high = self.consumer.get_watermark_offsets(TopicPartition(self.topic_name, partition), timeout=10)
+            start = self.__resolve_offset(partition, self.start_offset, self.start_timestamp_ms, low, low, high)
+            end = self.__resolve_offset(partition, self.end_offset, self.end_timestamp_ms, high, low, high)
+            if start < end:
+                partition_ranges[partition] = (start, end)
+        return partition_ranges
+
+    def __resolve_offset(self, partition: int, offset: int | None, timestamp_ms: int | None, default: int, low: int, high: int) -> int:
+        """
+        Private helper method for resolving one bound of a partition's range.
+
+        Args:
+            partition (int): The partition the bound is for.
+            offset (int | None): The bound as an offset.
+            timestamp_ms (int | None): The bound as an epoch time in milliseconds, taking precedence over the offset.
+            default (int): The bound when neither an offset nor a timestamp is given.
+            low (int): The partition's earliest offset.
+            high (int): The partition's latest offset.
+
+        Returns:
+            int: The offset of the bound, between the partition's earliest and latest offsets.
+        """
+        if timestamp_ms is not None:
+            # The first offset at or after the timestamp, or the latest offset if every message is older
+            offset = self.consumer.offsets_for_times([TopicPartition(self.topic_name, partition, timestamp_ms)], timeout=10)[0].offset
+            offset = high if offset < 0 else offset
+        elif offset is None:
+            offset = default
+        return min(max(offset, low), high)
\ No newline at end of file
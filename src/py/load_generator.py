@@ -0,0 +1,99 @@
+from confluent_kafka import Producer
+from generator.message_generator import MessageGenerator
+import logging
+import os
+import signal
+import time
+import traceback
+
+"""
+This is a local, high rate load generator standing in for the assessment's data generator. It produces synthetic
+user login messages, keyed by user id, to the inbound kafka topic as fast as the configured rate allows.
+"""
+
+# Flag to control the main loop
+running = True
+
+# Number of messages produced between rate checks and progress reports
+CHUNK_SIZE = 1000
+
+# Setup logger with console handler and formatting
+logger = logging.getLogger("load_generator")
+logger.setLevel(str(os.environ["LOGGER_LEVEL"]))
+ch = logging.StreamHandler()
+ch.setLevel(str(os.environ["LOGGER_LEVEL"]))
+formatter = logging.Formatter("[%(levelname)s | %(name)s] %(asctime)s - %(message)s")
+ch.setFormatter(formatter)
+logger.addHandler(ch)
+
+def signal_handler(sig, frame):
+    """
+    Handle termination signals to allow graceful shutdown.
+    """
+    global running
+    logger.info("Received termination signal. Shutting down...")
+    running = False
+
+def main():
+    """
+    Main program loop for running the load generator.
+    """
+    # Set up signal handlers for graceful shutdown
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+
+    topic_name = os.environ["LOAD_GENERATOR_KAFKA_TOPIC"]
+    rate = float(os.environ["LOAD_GENERATOR_RATE"])
+    message_limit = int(os.environ["LOAD_GENERATOR_MESSAGE_COUNT"])
+    generator = MessageGenerator(int(os.environ["LOAD_GENERATOR_USER_COUNT"]))
+    producer = Producer({
+        "bootstrap.servers": os.environ["LOAD_GENERATOR_BOOTSTRAP_SERVER"],
+        "client.id": "fetch-de-assessment-load-generator",
+        "linger.ms": 20,
+        "compression.type": "lz4"
+    })
+
+    logger.info(f"Producing messages to topic {topic_name} at {f"{rate:.0f} messages per second" if rate > 0 else "the maximum rate"}...")
+    start_time = time.perf_counter()
+    report_time = start_time
+    produced_messages = 0
+    while running and (message_limit <= 0 or produced_messages < message_limit):
+        chunk_size = CHUNK_SIZE if message_limit <= 0 else min(CHUNK_SIZE, message_limit - produced_messages)
+        timestamp = int(time.time())
+        for _ in range(chunk_size):
+            key, value = generator.build_message(timestamp)
+            while True:
+                try:
+                    producer.produce(topic_name, value, key)
+                    break
+                except BufferError:
+                    # Local queue is full, wait for deliveries to make room
+                    producer.poll(0.1)
+        producer.poll(0)
+        produced_messages = produced_messages + chunk_size
+
+        # Hold back until the configured rate catches up with the messages produced
+        now = time.perf_counter()
+        if rate > 0:
+            ahead_seconds = produced_messages / rate - (now - start_time)
+            if ahead_seconds > 0:
+                time.sleep(ahead_seconds)
+                now = time.perf_counter()
+
+        if now - report_time >= 5:
+            logger.info(f"Produced {produced_messages} messages, {produced_messages / (now - start_time):.1f} messages per second...")
+            report_time = now
+
+    producer.flush()
+    logger.info(f"Produced {produced_messages} messages in {time.perf_counter() - start_time:.2f} seconds...")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        logger.critical("An exception occurred...")
+        logger.critical(f"Type: {type(e).__name__}")
+        logger.critical(f"Message: {e}")
+        logger.critical(f"Arguments: {e.args}")
+        logger.critical("Traceback:")
+        traceback.print_exc()
\ No newline at end of file
@@ -0,0 +1,52 @@
+import argparse
+import logging
+import os
+import sys
+from src.py.processor.findings import load_findings_snapshots, log_findings, merge_findings, merge_throughput
+
+"""
+This script merges the findings snapshots left behind by each consumer replica into a single report. Run from the root
+of the repository with `python -m src.py.merge_findings findings` once the replicas have shut down.
+"""
+
+# Setup logger with console handler and formatting
+logger = logging.getLogger("merge_findings")
+logger.setLevel(logging.INFO)
+ch = logging.StreamHandler()
+ch.setLevel(logging.INFO)
+formatter = logging.Formatter("[%(levelname)s | %(name)s] %(asctime)s - %(message)s")
+ch.setFormatter(formatter)
+logger.addHandler(ch)
+
+def main() -> int:
+    """
+    Merges and reports the findings snapshots in a directory.
+
+    Returns:
+        int: The exit code, 1 if no snapshots were found.
+    """
+    parser = argparse.ArgumentParser(description="Merge the findings snapshots of every consumer replica.")
+    parser.add_argument("directory", help="The directory the replicas wrote their findings snapshots to.")
+    parser.add_argument("--top", type=int, default=10, help="The number of most active users and ip's to report.")
+    parser.add_argument("--disjoint-users", action="store_true",
+                        help="Report user findings as exact, when every replica consumed a topic keyed by user id from its first message.")
+    args = parser.parse_args()
+
+    snapshots = load_findings_snapshots(args.directory) if os.path.isdir(args.directory) else []
+    if not snapshots:
+        logger.error(f"No findings snapshots found in {args.directory}...")
+        return 1
+
+    # Report each replica's share of the work, then the combined throughput across the replicas' overlapping windows
+    for snapshot in snapshots:
+        throughput = merge_throughput([snapshot["throughput"]])
+        logger.info(f"Replica {snapshot["replica"]} processed {throughput["message_count"]} messages at {throughput["messages_per_second"]:.1f} messages per second...")
+    throughput = merge_throughput([snapshot["throughput"] for snapshot in snapshots])
+    logger.info(f"{len(snapshots)} replicas processed {throughput["message_count"]} messages at {throughput["messages_per_second"]:.1f} messages per second...")
+
+    # Replicas share devices and ip's, and users unless they're known to be disjoint, so keys seen by several replicas make those findings approximate
+    log_findings(logger, merge_findings([snapshot["findings"] for snapshot in snapshots], args.top, disjoint_keys=False, disjoint_users=args.disjoint_users))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -1,6 +1,15 @@
-from confluent_kafka import Producer
+import json
+import time
+from collections.abc import Callable
+from confluent_kafka import KafkaError, Producer
+from src.py.constants import message_keys
+from src.py.flow.deadline import Deadline
+from .partitioner import partition_for_key
 from logging import Logger
 
+# Message fields that may be used as the key of produced messages
+KEY_FIELDS = (message_keys.USER_ID, message_keys.DEVICE_ID)
+
 class Messenger:
     """
     Messenger class for producing messages and sending them to the kafka cluster.
@@ -9,32 +18,64 @@ class Messenger:
         logger (Logger): The logger instance used to convey information for this class.
         bootstrap_server (str): The desired kafka broker to connect to.
         client_id (str): The client identifier for this messenger.
+        topic_name (str): The name of the topic to send messages to.
+        dead_letter_topic_name (str, optional): The name of the topic to send rejected messages to. Default is None, dropping rejected messages.
+        key_field (str, optional): The message field, "user_id" or "device_id", used to key and partition produced messages. Default is None, producing unkeyed messages.
+        alert_topic_name (str, optional): The name of the topic to send alerts for flagged users to. Default is None, dropping alerts.
+        flush_timeout (float, optional): The most time in seconds to block flushing the producer, or draining it on shutdown. Default is 30.0.
+        deadline (Deadline, optional): The shutdown deadline, which once started bounds flushing, draining and waiting for room in a full queue. Default is None.
 
     Attributes:
         producer (Producer): The internal kafka message producer.
         topic_name (str): The name of the topic to send messages to.
+        dead_letter_topic_name (str | None): The name of the topic to send rejected messages to.
+        key_field (str | None): The message field used to key and partition produced messages.
+        alert_topic_name (str | None): The name of the topic to send alerts for flagged users to.
+        partition_count (int | None): The number of partitions in the topic, looked up on the first keyed batch.
+        queue_full_seconds (float): The seconds spent waiting for room in the producer's full local queue.
+        flush_timeout (float): The most time in seconds to block flushing the producer, or draining it on shutdown.
+        deadline (Deadline | None): The shutdown deadline.
+        dropped_count (int): The number of messages dropped as the producer's queue had no room for them by the shutdown deadline.
     """
-    def __init__(self, logger: Logger, bootstrap_server: str, client_id: str, topic_name: str):
+    def __init__(self, logger: Logger, bootstrap_server: str, client_id: str, topic_name: str, dead_letter_topic_name: str | None = None,
+                 key_field: str | None = None, alert_topic_name: str | None = None, flush_timeout: float = 30.0,
+                 deadline: Deadline | None = None):
+        if key_field is not None and key_field not in KEY_FIELDS:
+            raise ValueError(f"Unknown key field '{key_field}', expected one of {", ".join(KEY_FIELDS)}")
         producer_config = {
             "bootstrap.servers": bootstrap_server,
             "client.id": client_id
         }
+        if key_field:
+            # Match the partitions chosen for each batch below, and the java client, for any message partitioned by librdkafka
+            producer_config["partitioner"] = "murmur2_random"
 
         self.producer = Producer(producer_config)
         self.topic_name = topic_name
+        self.dead_letter_topic_name = dead_letter_topic_name
+        self.key_field = key_field
+        self.alert_topic_name = alert_topic_name
+        self.partition_count: int | None = None
+        self.queue_full_seconds = 0.0
+        self.flush_timeout = flush_timeout
+        self.deadline = deadline
+        self.dropped_count = 0
         self.logger = logger.getChild("messenger")
 
     def __enter__(self):
         # Wait for callbacks on any messages still waiting
         self.logger.info("Setting up producer...")
-        self.producer.flush()
+        self.__flush()
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        # Deliver any straggler messages that haven't been sent
+        # Deliver any straggler messages that haven't been sent within what remains of the deadline, batches are left queued under flow control
         self.logger.info("Shutting down producer...")
-        self.producer.purge()
-        self.producer.flush()
+        if self.queue_full_seconds > 0:
+            self.logger.info(f"Waited {self.queue_full_seconds:.2f} seconds on a full producer queue...")
+        if self.dropped_count:
+            self.logger.warning(f"Dropped {self.dropped_count} messages the full producer queue had no room for by the shutdown deadline...")
+        self.drain(self.__get_flush_timeout())
 
     def callback(self, err, msg):
         """
@@ -44,6 +85,9 @@ class Messenger:
             err: Any error that might occur during message delivery.
             msg: The message associated with this specific callback.
         """
+        if err is not None and err.code() == KafkaError._PURGE_QUEUE:
+            # Purged on shutdown, counted by drain rather than logged one by one
+            return
         if err is not None:
             err_msg = f"Failed to deliver message '{msg.value().decode("utf-8")}' to topic {msg.topic()} and partition {msg.partition()}: {err.str()}"
             self.logger.error(err_msg)
@@ -53,14 +97,55 @@ class Messenger:
         else:
             self.logger.debug(f"Message '{msg.value().decode("utf-8")}' successfully delivered to topic {msg.topic()} and partition {msg.partition()}")
 
-    def produce_messages(self, messages: list[dict[str, str]], wait_time: float = 0.1):
+    def poll(self, wait_time: float = 0) -> int:
+        """
+        Serves delivery callbacks of previously produced messages.
+
+        Args:
+            wait_time (float, optional): A time in seconds describing how long to block when waiting for callbacks. Default is 0, not blocking.
+
+        Returns:
+            int: The number of messages still waiting in the producer's local queue.
+        """
+        self.producer.poll(wait_time)
+        return len(self.producer)
+
+    def drain(self, timeout: float) -> int:
+        """
+        Waits up to a deadline for the messages in the producer's local queue to be delivered, then purges any left
+        over, so shutting down takes a bounded time however backed up the output broker is.
+
+        Args:
+            timeout (float): The time in seconds to wait for queued messages to be delivered.
+
+        Returns:
+            int: The number of messages purged undelivered.
+        """
+        self.logger.info(f"Draining {len(self.producer)} queued messages for up to {timeout:.2f} seconds...")
+        undelivered_count = self.producer.flush(timeout)
+        if undelivered_count:
+            self.logger.warning(f"Purging {undelivered_count} messages left undelivered after the shutdown deadline...")
+            self.producer.purge()
+
+            # Serve the purged messages' delivery callbacks so they are reported as failed
+            self.producer.poll(0)
+        return undelivered_count
+
+    def produce_messages(self, messages: list[dict[str, str]], wait_time: float = 0.1, flush: bool = True, on_delivery: Callable[[bool], None] | None = None):
         """
         Produces messages to a kafka topic.
 
         Args:
             messages (list[dict[str, str]]): A list of dictionaries of strings, with each list item representing a message to be produced.
             wait_time (float): A time in seconds describing how long to block when waiting for callbacks on message production.
+            flush (bool, optional): Whether to block until every queued message is delivered. Default is True, disable when the queue is bounded by flow control instead.
+            on_delivery (Callable[[bool], None], optional): Called with whether each message was delivered, once its delivery is reported. Default is None.
         """
+        callback = self.__build_callback(on_delivery)
+        if self.key_field:
+            self.__produce_keyed_messages(messages, wait_time, flush, callback)
+            return
+
         try:
             self.logger.debug(f"Attempting to produce {len(messages)} processed messages to topic {self.topic_name}...")
             for message in messages:
@@ -70,8 +155,186 @@ class Messenger:
 
                 # Produce the message with callback
                 self.logger.debug(f"Attempting to produce message {message} to topic {self.topic_name}")
-                self.producer.produce(self.topic_name, str(message).encode("utf-8"), callback=self.callback)
-            self.producer.flush()
+                self.__produce(self.topic_name, str(message).encode("utf-8"), callback=callback)
+            if flush:
+                self.__flush()
         except Exception as e:
             self.logger.critical(f"Fatal error producing messages in messenger: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def __flush(self):
+        """
+        Private helper method for waiting up to the flush timeout for every queued message to be delivered, messages
+        still queued after it are left for later polls to deliver.
+        """
+        flush_timeout = self.__get_flush_timeout()
+        undelivered_count = self.producer.flush(flush_timeout)
+        if undelivered_count:
+            self.logger.warning(f"{undelivered_count} messages are still queued after flushing for {flush_timeout:.2f} seconds...")
+
+    def __get_flush_timeout(self) -> float:
+        """
+        Private helper method for getting the most time to block flushing, cut to what remains of the shutdown deadline once started.
+
+        Returns:
+            float: The time in seconds.
+        """
+        if self.deadline and self.deadline.started_at is not None:
+            return min(self.flush_timeout, self.deadline.remaining())
+        return self.flush_timeout
+
+    def __produce_keyed_messages(self, messages: list[dict[str, str]], wait_time: float, flush: bool, callback: Callable):
+        """
+        Private helper method for producing messages keyed by the key field. The batch is grouped by target partition
+        first, so each partition's messages are queued back to back and librdkafka can send them as large batches,
+        while messages sharing a key keep their order on a single partition.
+
+        Args:
+            messages (list[dict[str, str]]): A list of dictionaries of strings, with each list item representing a message to be produced.
+            wait_time (float): A time in seconds describing how long to block when waiting for callbacks on message production.
+            flush (bool): Whether to block until every queued message is delivered.
+            callback (Callable): The delivery callback of each message.
+        """
+        try:
+            self.logger.debug(f"Attempting to produce {len(messages)} processed messages to topic {self.topic_name} keyed by {self.key_field}...")
+            partition_count = self.__get_partition_count()
+
+            # Group messages by target partition, leaving messages without a key to librdkafka
+            partitioned_messages: dict[int | None, list[tuple[bytes | None, bytes]]] = {}
+            for message in messages:
+                key = message.get(self.key_field)
+                key = str(key).encode("utf-8") if key is not None else None
+                partition = partition_for_key(key, partition_count) if key is not None and partition_count else None
+                partitioned_messages.setdefault(partition, []).append((key, str(message).encode("utf-8")))
+
+            for partition, partition_messages in partitioned_messages.items():
+                # Trigger any available callbacks from previous message delivery
+                self.logger.debug(f"Polling for callbacks with wait time {wait_time}")
+                self.producer.poll(wait_time)
+
+                self.logger.debug(f"Attempting to produce {len(partition_messages)} messages to topic {self.topic_name} and partition {partition}")
+                for key, value in partition_messages:
+                    if partition is None:
+                        self.__produce(self.topic_name, value, key, callback=callback)
+                    else:
+                        self.__produce(self.topic_name, value, key, partition, callback=callback)
+            if flush:
+                self.__flush()
+        except Exception as e:
+            self.logger.critical(f"Fatal error producing messages in messenger: {e}")
+            raise
+
+    def __build_callback(self, on_delivery: Callable[[bool], None] | None) -> Callable:
+        """
+        Private helper method for building the delivery callback of a batch, reporting each delivery to on_delivery
+        before the usual handling. Built once per batch rather than per message.
+
+        Args:
+            on_delivery (Callable[[bool], None] | None): Called with whether each message was delivered.
+
+        Returns:
+            Callable: The delivery callback.
+        """
+        if on_delivery is None:
+            return self.callback
+
+        def callback(err, msg):
+            on_delivery(err is None)
+            self.callback(err, msg)
+        return callback
+
+    def __produce(self, *args, callback: Callable | None = None, **kwargs):
+        """
+        Private helper method for producing a single message with the delivery callback. When the producer's local
+        queue is full, delivery callbacks are served to make room and the message is retried, rather than failing the batch.
+        Once the shutdown deadline has passed the message is dropped instead, leaving its batch uncommitted to be consumed
+        again on restart.
+
+        Args:
+            args: The positional arguments of the producer's produce method.
+            callback (Callable, optional): The delivery callback. Default is None, using the callback method.
+            kwargs: The keyword arguments of the producer's produce method.
+        """
+        while True:
+            try:
+                self.producer.produce(*args, callback=callback or self.callback, **kwargs)
+                return
+            except BufferError:
+                if self.deadline and self.deadline.passed():
+                    self.dropped_count = self.dropped_count + 1
+                    return
+                self.logger.debug("Producer queue is full, waiting for deliveries...")
+                waited_at = time.perf_counter()
+                self.producer.poll(0.1)
+                self.queue_full_seconds = self.queue_full_seconds + time.perf_counter() - waited_at
+
+    def __get_partition_count(self) -> int | None:
+        """
+        Private helper method for looking up and caching the number of partitions in the topic.
+
+        Returns:
+            int | None: The number of partitions, or None if the topic's metadata is unavailable.
+        """
+        if self.partition_count is None:
+            topic_metadata = self.producer.list_topics(self.topic_name, timeout=10).topics.get(self.topic_name)
+            if topic_metadata is None or topic_metadata.error is not None or not topic_metadata.partitions:
+                self.logger.warning(f"Partitions of topic {self.topic_name} are unavailable, leaving keyed messages to the producer's partitioner...")
+                return None
+            self.partition_count = len(topic_metadata.partitions)
+        return self.partition_count
+
+    def produce_dead_letters(self, rejected_messages: list, source_topic: str, on_delivery: Callable[[bool], None] | None = None):
+        """
+        Produces a batch of rejected messages to the dead letter topic without waiting on delivery, with the
+        rejection reason, error and source topic as headers so they can be inspected and replayed.
+
+        Args:
+            rejected_messages (list[RejectedMessage]): The rejected messages to produce.
+            source_topic (str): The name of the topic the rejected messages were consumed from.
+            on_delivery (Callable[[bool], None], optional): Called with whether each rejected message was delivered, once its delivery is reported. Default is None.
+
+        Returns:
+            int: The number of rejected messages produced, 0 if they were dropped.
+        """
+        if not rejected_messages:
+            return 0
+        if not self.dead_letter_topic_name:
+            self.logger.warning(f"Dropping {len(rejected_messages)} rejected messages, no dead letter topic is configured...")
+            return 0
+
+        self.logger.debug(f"Attempting to produce {len(rejected_messages)} rejected messages to topic {self.dead_letter_topic_name}...")
+        rejected_at = str(int(time.time() * 1000)).encode("utf-8")
+        callback = self.__build_callback(on_delivery)
+        for rejected_message in rejected_messages:
+            headers = [
+                ("error.reason", rejected_message.reason.encode("utf-8")),
+                ("error.message", rejected_message.error.encode("utf-8")),
+                ("source.topic", source_topic.encode("utf-8")),
+                ("rejected.at", rejected_at)
+            ]
+            self.__produce(self.dead_letter_topic_name, rejected_message.payload(), headers=headers, callback=callback)
+
+        # Serve any delivery callbacks already available without blocking the valid messages
+        self.producer.poll(0)
+        return len(rejected_messages)
+
+    def produce_alerts(self, alerts: list[dict]):
+        """
+        Produces a batch of alerts for flagged users to the alert topic as json, keyed by user so each user's alerts stay
+        in order, without waiting on delivery.
+
+        Args:
+            alerts (list[dict]): The alerts to produce.
+        """
+        if not alerts:
+            return
+        if not self.alert_topic_name:
+            self.logger.warning(f"Dropping {len(alerts)} alerts, no alert topic is configured...")
+            return
+
+        self.logger.debug(f"Attempting to produce {len(alerts)} alerts to topic {self.alert_topic_name}...")
+        for alert in alerts:
+            self.__produce(self.alert_topic_name, json.dumps(alert).encode("utf-8"), alert["user_id"].encode("utf-8"))
+
+        # Serve any delivery callbacks already available without blocking the processed messages
+        self.producer.poll(0)
\ No newline at end of file
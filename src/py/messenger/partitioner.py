@@ -0,0 +1,59 @@
+"""
+Key to partition mapping matching the murmur2 partitioner used by the java client and by librdkafka's "murmur2_random"
+partitioner, so keyed messages land on the same partition whichever client produced them.
+"""
+
+MURMUR2_SEED = 0x9747B28C
+MURMUR2_MULTIPLIER = 0x5BD1E995
+MURMUR2_SHIFT = 24
+UINT32_MASK = 0xFFFFFFFF
+
+def murmur2(data: bytes) -> int:
+    """
+    Hashes a key with the 32 bit murmur2 hash, as implemented by the java client.
+
+    Args:
+        data (bytes): The key to hash.
+
+    Returns:
+        int: The hash as an unsigned 32 bit integer.
+    """
+    length = len(data)
+    hash_value = (MURMUR2_SEED ^ length) & UINT32_MASK
+
+    # Mix in the key four bytes at a time
+    for offset in range(0, length - length % 4, 4):
+        k = int.from_bytes(data[offset:offset + 4], "little")
+        k = (k * MURMUR2_MULTIPLIER) & UINT32_MASK
+        k ^= k >> MURMUR2_SHIFT
+        k = (k * MURMUR2_MULTIPLIER) & UINT32_MASK
+        hash_value = ((hash_value * MURMUR2_MULTIPLIER) & UINT32_MASK) ^ k
+
+    # Mix in the remaining bytes
+    tail = length & ~3
+    remaining = length % 4
+    if remaining == 3:
+        hash_value ^= data[tail + 2] << 16
+    if remaining >= 2:
+        hash_value ^= data[tail + 1] << 8
+    if remaining >= 1:
+        hash_value ^= data[tail]
+        hash_value = (hash_value * MURMUR2_MULTIPLIER) & UINT32_MASK
+
+    hash_value ^= hash_value >> 13
+    hash_value = (hash_value * MURMUR2_MULTIPLIER) & UINT32_MASK
+    hash_value ^= hash_value >> 15
+    return hash_value
+
+def partition_for_key(key: bytes, partition_count: int) -> int:
+    """
+    Chooses the partition for a message key.
+
+    Args:
+        key (bytes): The message key.
+        partition_count (int): The number of partitions in the topic.
+
+    Returns:
+        int: The partition the key maps to.
+    """
+    return (murmur2(key) & 0x7FFFFFFF) % partition_count
\ No newline at end of file
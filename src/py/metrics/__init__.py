@@ -0,0 +1,5 @@
+__all__ = ["ProgressMeter", "StartupTimer", "ThroughputMeter"]
+
+from src.py.metrics.progress_meter import ProgressMeter
+from src.py.metrics.startup_timer import StartupTimer
+from src.py.metrics.throughput_meter import ThroughputMeter
\ No newline at end of file
@@ -0,0 +1,70 @@
+import time
+from logging import Logger
+
+class ProgressMeter:
+    """
+    Meter class for reporting progress through a known amount of work, with the rate so far and an estimate of the time
+    remaining. Reports are rate limited so the meter can be updated after every batch.
+
+    Args:
+        logger (Logger): The logger instance used to convey information for this class.
+        total (int): The amount of work to get through.
+        report_interval (float, optional): The minimum seconds between progress reports. Default is 5 seconds.
+
+    Attributes:
+        total (int): The amount of work to get through.
+        done (int): The amount of work done so far.
+        report_interval (float): The minimum seconds between progress reports.
+        start_time (float): The perf_counter value the meter was created at.
+        reported_at (float | None): The perf_counter value of the last progress report.
+    """
+    def __init__(self, logger: Logger, total: int, report_interval: float = 5.0):
+        self.logger = logger.getChild("progress_meter")
+        self.total = total
+        self.done = 0
+        self.report_interval = report_interval
+        self.start_time = time.perf_counter()
+        self.reported_at: float | None = None
+
+    def update(self, done: int):
+        """
+        Records the amount of work done so far, reporting progress if the report interval has passed.
+
+        Args:
+            done (int): The amount of work done so far.
+        """
+        self.done = done
+        now = time.perf_counter()
+        if self.reported_at is None or now - self.reported_at >= self.report_interval or done >= self.total:
+            self.reported_at = now
+            self.report(now)
+
+    def eta_seconds(self, now: float | None = None) -> float | None:
+        """
+        Estimates the time remaining at the rate so far.
+
+        Args:
+            now (float, optional): The current perf_counter value. Default is None, reading the clock.
+
+        Returns:
+            float | None: The seconds remaining, or None if no work has been done yet to estimate from.
+        """
+        elapsed_seconds = (time.perf_counter() if now is None else now) - self.start_time
+        if self.done <= 0 or elapsed_seconds <= 0:
+            return None
+        return max(self.total - self.done, 0) / (self.done / elapsed_seconds)
+
+    def report(self, now: float | None = None):
+        """
+        Reports the work done, its share of the total, the rate so far and the estimated time remaining.
+
+        Args:
+            now (float, optional): The current perf_counter value. Default is None, reading the clock.
+        """
+        now = time.perf_counter() if now is None else now
+        elapsed_seconds = now - self.start_time
+        rate = self.done / elapsed_seconds if elapsed_seconds > 0 else 0.0
+        share = self.done / self.total if self.total > 0 else 1.0
+        eta_seconds = self.eta_seconds(now)
+        eta = f"{int(eta_seconds // 60)}m {int(eta_seconds % 60):02d}s" if eta_seconds is not None else "unknown"
+        self.logger.info(f"Processed {self.done} of {self.total} messages ({share:.1%}) at {rate:.1f} messages per second, {eta} remaining...")
\ No newline at end of file
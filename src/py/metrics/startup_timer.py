@@ -0,0 +1,46 @@
+import time
+from logging import Logger
+
+class StartupTimer:
+    """
+    Timer class for measuring the consumer's startup path, from process start to the first consumed and delivered message.
+
+    Args:
+        logger (Logger): The logger instance used to convey information for this class.
+        start_time (float, optional): The perf_counter value startup began at. Default is the time of construction.
+
+    Attributes:
+        start_time (float): The perf_counter value startup began at.
+        marks (dict[str, float]): The seconds since start at which each startup milestone was first reached, in the order reached.
+        reported (bool): Whether the startup report has been written.
+    """
+    def __init__(self, logger: Logger, start_time: float | None = None):
+        self.logger = logger.getChild("startup_timer")
+        self.start_time = time.perf_counter() if start_time is None else start_time
+        self.marks: dict[str, float] = {}
+        self.reported = False
+
+    def mark(self, milestone: str):
+        """
+        Records the first time a startup milestone is reached, later calls for the same milestone are ignored.
+
+        Args:
+            milestone (str): The name of the milestone.
+        """
+        if milestone not in self.marks:
+            self.marks[milestone] = time.perf_counter() - self.start_time
+
+    def report(self):
+        """
+        Reports the time to each milestone and the time spent in each phase between milestones, once.
+        """
+        if self.reported:
+            return
+        self.reported = True
+
+        report_msg = "Startup timing:"
+        previous = 0.0
+        for milestone, elapsed in self.marks.items():
+            report_msg = "\n".join([report_msg, f"\t{milestone}: {elapsed * 1000:.1f} ms (+{(elapsed - previous) * 1000:.1f} ms)"])
+            previous = elapsed
+        self.logger.info(report_msg)
\ No newline at end of file
@@ -0,0 +1,74 @@
+import time
+from logging import Logger
+
+class ThroughputMeter:
+    """
+    Meter class for measuring message throughput, from the start of the first batch to the end of the last. Times are
+    taken from the wall clock so the windows of meters in separate replicas can be combined.
+
+    Args:
+        logger (Logger): The logger instance used to convey information for this class.
+
+    Attributes:
+        message_count (int): The number of messages recorded.
+        first_message_at (float | None): The epoch time the first recorded batch started at.
+        last_message_at (float | None): The epoch time the last recorded batch finished at.
+    """
+    def __init__(self, logger: Logger):
+        self.logger = logger.getChild("throughput_meter")
+        self.message_count = 0
+        self.first_message_at: float | None = None
+        self.last_message_at: float | None = None
+
+    def start_batch(self):
+        """
+        Marks the start of a batch, opening the measured window on the first batch.
+        """
+        if self.first_message_at is None:
+            self.first_message_at = time.time()
+
+    def end_batch(self, message_count: int):
+        """
+        Marks the end of a batch, extending the measured window.
+
+        Args:
+            message_count (int): The number of messages in the batch.
+        """
+        self.message_count = self.message_count + message_count
+        self.last_message_at = time.time()
+
+    def elapsed_seconds(self) -> float:
+        """
+        Gets the length of the measured window.
+
+        Returns:
+            float: The seconds from the start of the first batch to the end of the last, 0 if no batch has ended.
+        """
+        if self.first_message_at is None or self.last_message_at is None:
+            return 0.0
+        return self.last_message_at - self.first_message_at
+
+    def messages_per_second(self) -> float:
+        """
+        Gets the throughput over the measured window.
+
+        Returns:
+            float: The messages recorded per second, 0 if no time has been measured.
+        """
+        elapsed_seconds = self.elapsed_seconds()
+        return self.message_count / elapsed_seconds if elapsed_seconds > 0 else 0.0
+
+    def snapshot(self) -> dict:
+        """
+        Builds a json serializable snapshot of the meter.
+
+        Returns:
+            dict: The message count and the epoch times of the measured window.
+        """
+        return {"message_count": self.message_count, "first_message_at": self.first_message_at, "last_message_at": self.last_message_at}
+
+    def report(self):
+        """
+        Reports the messages recorded and the throughput over the measured window.
+        """
+        self.logger.info(f"Processed {self.message_count} messages in {self.elapsed_seconds():.2f} seconds, {self.messages_per_second():.1f} messages per second...")
\ No newline at end of file
@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+from contextlib import nullcontext
+from src.py.files.file_sink import FileSink
+from src.py.files.file_source import FileSource
+from src.py.metrics.throughput_meter import ThroughputMeter
+from src.py.processor.deduplicator import Deduplicator
+from src.py.processor.findings import save_findings_snapshot
+from src.py.processor.processor import Processor
+
+"""
+This script runs the pipeline over local files rather than kafka topics, for load testing, backfills from archived data
+and profiling. Messages are read from a newline delimited json file, processed exactly as the consumer would, and the
+processed messages optionally written to another. Run from the root of the repository with
+`python -m src.py.offline_pipeline user-logins.json.gz --sink processed-user-logins.json.gz`.
+"""
+
+# Name the offline pipeline's findings snapshot is written under
+OFFLINE_REPLICA = "offline"
+
+# Flag to control the main loop
+running = True
+
+# Setup logger with console handler and formatting
+logger = logging.getLogger("offline_pipeline")
+logger.setLevel(logging.INFO)
+ch = logging.StreamHandler()
+ch.setLevel(logging.INFO)
+formatter = logging.Formatter("[%(levelname)s | %(name)s] %(asctime)s - %(message)s")
+ch.setFormatter(formatter)
+logger.addHandler(ch)
+
+def signal_handler(sig, frame):
+    """
+    Handle termination signals to stop reading the file early.
+    """
+    global running
+    logger.info("Received termination signal. Stopping offline pipeline...")
+    running = False
+
+async def main() -> int:
+    """
+    Processes every message in the source file, writing processed messages to the sink file and the findings to a snapshot.
+
+    Returns:
+        int: The exit code, 1 if stopped before reading the whole file.
+    """
+    parser = argparse.ArgumentParser(description="Run the pipeline over local newline delimited json files.")
+    parser.add_argument("source", help="The file to read messages from, optionally .gz, .bz2 or .xz compressed.")
+    parser.add_argument("--sink", help="The file to write processed messages to, optionally .gz, .bz2 or .xz compressed. Processed messages are dropped if not given.")
+    parser.add_argument("--dead-letter-sink", help="The file to write rejected messages to, with or without --sink. Rejected messages are dropped if not given.")
+    parser.add_argument("--batch-size", type=int, default=10000, help="The number of messages processed per batch.")
+    parser.add_argument("--shards", type=int, default=os.cpu_count() or 1, help="The number of shard worker processes to aggregate statistics across.")
+    parser.add_argument("--ring-buffer-slots", type=int, default=16384, help="The number of shared memory ring buffer slots used for parsing, 0 to parse through a process pool.")
+    parser.add_argument("--dedup-window", type=int, default=600, help="How far back in event time, in seconds, duplicate login events are dropped, 0 to keep duplicates.")
+    parser.add_argument("--dedup-capacity", type=int, default=1000000, help="The number of distinct login events expected within the deduplication window.")
+    parser.add_argument("--dedup-false-positive-rate", type=float, default=0.001, help="The chance a distinct login event is mistaken for a duplicate.")
+    parser.add_argument("--output-dir", default="findings", help="The directory to write the findings snapshot to.")
+    parser.add_argument("--top", type=int, default=10, help="The number of most active users and ip's to report.")
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    throughput_meter = ThroughputMeter(logger)
+    deduplicator = Deduplicator(logger, args.dedup_window, args.dedup_capacity, args.dedup_false_positive_rate) if args.dedup_window > 0 else None
+
+    with (Processor(logger, args.shards, args.ring_buffer_slots, deduplicator=deduplicator) as prcsr,
+          FileSource(logger, args.source) as source,
+          FileSink(logger, args.sink, args.dead_letter_sink) if args.sink or args.dead_letter_sink else nullcontext() as sink):
+        while running and not source.is_finished():
+            messages = source.consume_raw_messages(args.batch_size)
+            if not messages:
+                continue
+            throughput_meter.start_batch()
+            processed_messages = await prcsr.process_raw_messages_async(messages)
+
+            # Leave the sink's buffer to fill across batches, it is flushed when the sink closes
+            rejected_messages = prcsr.drain_rejected_messages()
+            if sink:
+                sink.produce_messages(processed_messages, flush=False)
+                sink.produce_dead_letters(rejected_messages, args.source)
+            throughput_meter.end_batch(len(messages))
+        finished = source.is_finished()
+        logger.info(f"Read {source.bytes_read / (1024 * 1024):.1f} MiB from {args.source}...")
+
+        findings = prcsr.collect_findings(args.top)
+        prcsr.report_findings(findings)
+        throughput_meter.report()
+
+    if not finished:
+        logger.warning(f"Stopped before reading the whole of {args.source}, no findings snapshot was written...")
+        return 1
+    snapshot_path = save_findings_snapshot(args.output_dir, OFFLINE_REPLICA, findings, throughput_meter.snapshot())
+    logger.info(f"Wrote findings snapshot to {snapshot_path}...")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
\ No newline at end of file
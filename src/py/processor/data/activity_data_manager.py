@@ -2,39 +2,51 @@ from logging import Logger
 
 class ActivityDataManager:
     """
-    Class for compiling and managing data related to system activity.
+    Class for compiling and managing data related to system activity. Device types, app versions and locales are held as
+    the integer codes assigned by the processor's field encoders, and only decoded when findings are reported.
 
     Args:
         logger (Logger): The logger instance used to convey information for this class.
 
     Attributes:
-        version_activity (dict[str, dict[str, int]]): Dictionary of app versions and the total number of logins for each.
-        locale_activity (dict[str, dict[str, int]]): Dictionary of locales and the total number of logins for each.
+        version_activity (dict[int, dict[int, int]]): Dictionary of app version codes and the total number of logins for each device type code.
+        locale_activity (dict[int, dict[int, int]]): Dictionary of locale codes and the total number of logins for each device type code.
     """
     def __init__(self, logger: Logger):
-        self.version_activity: dict[str, dict[str, int]] = {}
-        self.locale_activity: dict[str, dict[str, int]] = {}
+        self.version_activity: dict[int, dict[int, int]] = {}
+        self.locale_activity: dict[int, dict[int, int]] = {}
         self.logger = logger.getChild("activity_metric_manager")
 
-    async def compile_activity_data_async(self, device_type: str, app_version: str, locale: str):
+    async def compile_activity_data_async(self, device_type: int, app_version: int, locale: int):
         """
         Method for compiling general activity data in the system.
 
         Args:
-            device_type (str): The type of the device being used.
-            app_version (str): The version of the app being used on the device.
-            locale (str): The locale of the device from the login attempt.
+            device_type (int): The code of the type of the device being used.
+            app_version (int): The code of the version of the app being used on the device.
+            locale (int): The code of the locale of the device from the login attempt.
+        """
+        self.compile_activity_data(device_type, app_version, locale)
+
+    def compile_activity_data(self, device_type: int, app_version: int, locale: int):
+        """
+        Method for synchronously compiling general activity data, for callers without an event loop such as shard workers.
+
+        Args:
+            device_type (int): The code of the type of the device being used.
+            app_version (int): The code of the version of the app being used on the device.
+            locale (int): The code of the locale of the device from the login attempt.
         """
         self.__compile_version_activity(device_type, app_version)
         self.__compile_locale_activity(device_type, locale)
 
-    def __compile_version_activity(self, device_type: str, app_version: str):
+    def __compile_version_activity(self, device_type: int, app_version: int):
         """
         Private helper method for compiling app version specific activity data in the system.
 
         Args:
-            device_type (str): The type of the device being used.
-            app_version (str): The version of the app being used on the device.
+            device_type (int): The code of the type of the device being used.
+            app_version (int): The code of the version of the app being used on the device.
         """
         if app_version not in self.version_activity:
             # Initialize new dictionary with current device type entry at app version
@@ -46,13 +58,13 @@ class ActivityDataManager:
             # Update device type entry at app version
             self.version_activity[app_version][device_type] = self.version_activity[app_version][device_type] + 1
 
-    def __compile_locale_activity(self, device_type: str, locale: str):
+    def __compile_locale_activity(self, device_type: int, locale: int):
         """
         Private helper method for compiling specific locale activity data in the system.
 
         Args:
-            device_type (str): The type of the device being used.
-            locale (str): The locale of the device from the login attempt.
+            device_type (int): The code of the type of the device being used.
+            locale (int): The code of the locale of the device from the login attempt.
         """
         if locale not in self.locale_activity:
             # Initialize new dictionary with current device type entry at locale
@@ -1,4 +1,7 @@
+import sys
 from src.py.constants import message_keys
+from .eviction_policy import EvictionPolicy
+from collections.abc import Callable
 from logging import Logger
 
 class DeviceDataManager:
@@ -7,24 +10,48 @@ class DeviceDataManager:
 
     Args:
         logger (Logger): The logger instance used to convey information for this class.
+        eviction_policy (EvictionPolicy, optional): The policy used to bound the number and size of devices kept. Default is None, keeping every device.
+        eviction_sink (Callable[[str, dict], None], optional): A sink evicted devices are flushed to. Default is None, dropping evicted devices.
 
     Attributes:
-        devices (dict[str, dict[str, str]]): Dictionary of dictionaries denoting device information, with the device id as the key.
+        devices (dict[str, dict[str, str | int]]): Dictionary of dictionaries denoting device information, with the device id as the key. Device types,
+            app versions and locales are held as the integer codes assigned by the processor's field encoders.
+        evicted_entries (int): The total number of devices evicted.
+        estimated_bytes (int): The estimated size in bytes of the devices kept, maintained as they are added, updated and evicted.
     """
-    def __init__(self, logger: Logger):
-        self.devices: dict[str, dict[str, str]] = {}
+    def __init__(self, logger: Logger, eviction_policy: EvictionPolicy | None = None, eviction_sink: Callable[[str, dict], None] | None = None):
+        self.devices: dict[str, dict[str, str | int]] = {}
+        self.eviction_policy = eviction_policy
+        self.eviction_sink = eviction_sink
+        self.evicted_entries = 0
+        self.estimated_bytes = 0
         self.logger = logger.getChild("device_metric_manager")
 
-    async def compile_device_data_async(self, device_id: str, device_type: str, app_version: str, ip_address: str,  locale: str):
+    async def compile_device_data_async(self, device_id: str, device_type: int, app_version: int, ip_address: str,  locale: int, timestamp: int = 0):
         """
         Mehtod for compiling general device data into the system.
 
         Args:
             device_id (str): The identifier for the device.
-            device_type (str): The type of the device being used.
-            app_version (str): The version of the app being used on the device.
+            device_type (int): The code of the type of the device being used.
+            app_version (int): The code of the version of the app being used on the device.
             ip_address (str): The ip address of the device's from the login attempt.
-            locale (str): The locale of the device from the login attempt.
+            locale (int): The code of the locale of the device from the login attempt.
+            timestamp (int, optional): The timestamp of the login attempt, used to expire devices. Default is 0.
+        """
+        self.compile_device_data(device_id, device_type, app_version, ip_address, locale, timestamp)
+
+    def compile_device_data(self, device_id: str, device_type: int, app_version: int, ip_address: str,  locale: int, timestamp: int = 0):
+        """
+        Method for synchronously compiling device data into the system, for callers without an event loop such as shard workers.
+
+        Args:
+            device_id (str): The identifier for the device.
+            device_type (int): The code of the type of the device being used.
+            app_version (int): The code of the version of the app being used on the device.
+            ip_address (str): The ip address of the device's from the login attempt.
+            locale (int): The code of the locale of the device from the login attempt.
+            timestamp (int, optional): The timestamp of the login attempt, used to expire devices. Default is 0.
         """
         # Add or update device data based on if device exists
         if device_id not in self.devices:
@@ -32,33 +59,50 @@ class DeviceDataManager:
         else:
             self.__update_device_data(device_id, device_type, app_version, ip_address, locale)
 
-    def __add_new_device_data(self, device_id: str, device_type: str, app_version: str, ip_address: str,  locale: str):
+        # Bound memory by evicting devices according to policy
+        if self.eviction_policy:
+            self.eviction_policy.touch(device_id, timestamp, self.__estimate_entry_size(device_id))
+            for evicted_device_id in self.eviction_policy.pop_evictions():
+                self.__evict_device_data(evicted_device_id)
+
+    def memory_usage(self) -> tuple[int, int]:
+        """
+        Method for reporting the number of devices kept and their estimated size. The size is kept up to date as entries
+        change, so reporting doesn't walk every entry.
+
+        Returns:
+            tuple[int, int]: The number of devices and their estimated size in bytes.
+        """
+        return len(self.devices), self.estimated_bytes
+
+    def __add_new_device_data(self, device_id: str, device_type: int, app_version: int, ip_address: str,  locale: int):
         """
         Private helper method for adding new device data to the system.
 
         Args:
             device_id (str): The identifier for the device.
-            device_type (str): The type of the device being used.
-            app_version (str): The version of the app being used on the device.
+            device_type (int): The code of the type of the device being used.
+            app_version (int): The code of the version of the app being used on the device.
             ip_address (str): The ip address of the device's from the login attempt.
-            locale (str): The locale of the device from the login attempt.
+            locale (int): The code of the locale of the device from the login attempt.
         """
         device_data = {message_keys.DEVICE_TYPE: device_type, 
                        message_keys.APP_VERSION: app_version,
                        message_keys.IP_ADDRESS: ip_address,
                        message_keys.LOCALE: locale}
         self.devices[device_id] = device_data
+        self.estimated_bytes = self.estimated_bytes + self.__estimate_entry_size(device_id)
 
-    def __update_device_data(self, device_id: str, device_type: str, app_version: str, ip_address: str,  locale: str):
+    def __update_device_data(self, device_id: str, device_type: int, app_version: int, ip_address: str,  locale: int):
         """
         Private helper method for updating device data in the system.
 
         Args:
             device_id (str): The identifier for the device.
-            device_type (str): The type of the device being used.
-            app_version (str): The version of the app being used on the device.
+            device_type (int): The code of the type of the device being used.
+            app_version (int): The code of the version of the app being used on the device.
             ip_address (str): The ip address of the device's from the login attempt.
-            locale (str): The locale of the device from the login attempt.
+            locale (int): The code of the locale of the device from the login attempt.
         """
         if self.devices[device_id][message_keys.DEVICE_TYPE] is not device_type:
             self.devices[device_id][message_keys.DEVICE_TYPE] = device_type
@@ -67,7 +111,35 @@ class DeviceDataManager:
             self.devices[device_id][message_keys.APP_VERSION] = app_version
 
         if self.devices[device_id][message_keys.IP_ADDRESS] is not ip_address:
+            # Codes are small integers of a fixed size, so only a new ip address changes the device's size
+            self.estimated_bytes = self.estimated_bytes + sys.getsizeof(ip_address) - sys.getsizeof(self.devices[device_id][message_keys.IP_ADDRESS])
             self.devices[device_id][message_keys.IP_ADDRESS] = ip_address
 
         if self.devices[device_id][message_keys.LOCALE] is not locale:
-            self.devices[device_id][message_keys.LOCALE] = locale
\ No newline at end of file
+            self.devices[device_id][message_keys.LOCALE] = locale
+
+    def __estimate_entry_size(self, device_id: str) -> int:
+        """
+        Private helper method for estimating the size of a device's data in constant time.
+
+        Args:
+            device_id (str): The identifier for the device.
+
+        Returns:
+            int: The estimated size in bytes.
+        """
+        device_data = self.devices[device_id]
+        return sys.getsizeof(device_id) + sys.getsizeof(device_data) + sum(sys.getsizeof(value) for value in device_data.values())
+
+    def __evict_device_data(self, device_id: str):
+        """
+        Private helper method for removing a device's data from the system and flushing it to the eviction sink.
+
+        Args:
+            device_id (str): The identifier for the device.
+        """
+        self.estimated_bytes = self.estimated_bytes - self.__estimate_entry_size(device_id)
+        device_data = self.devices.pop(device_id)
+        self.evicted_entries = self.evicted_entries + 1
+        if self.eviction_sink:
+            self.eviction_sink("device", {message_keys.DEVICE_ID: device_id, **device_data})
\ No newline at end of file
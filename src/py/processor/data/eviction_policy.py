@@ -0,0 +1,133 @@
+import json
+import time
+from collections import OrderedDict
+from src.py.constants.event_time import MAX_FUTURE_SECONDS
+
+class EvictionPolicy:
+    """
+    Class for tracking data manager entries and choosing which to evict, with O(1) bookkeeping per update.
+
+    Entries are kept in an ordered dictionary so the next candidate for eviction is always at the front. The "lru" and
+    "ttl" policies move an entry to the back whenever it is updated, while the "count" policy keeps insertion order.
+    Any policy evicts from the front while the entry count or estimated size is over its limit, and "ttl" additionally
+    evicts front entries last seen more than the ttl before the newest timestamp seen. As timestamps may arrive slightly
+    out of order, ttl eviction is approximate around the cutoff. Timestamps further ahead of the wall clock than the
+    clock skew allowed don't count as the newest seen, so a single far-future event can't expire every entry.
+
+    Args:
+        policy (str): The eviction policy, one of "lru", "ttl" or "count".
+        max_entries (int, optional): The maximum number of entries to keep, 0 for no limit. Default is 0.
+        ttl_seconds (int, optional): The time in seconds after an entry was last seen that it expires, 0 for no expiry. Default is 0.
+        max_bytes (int, optional): The maximum estimated size in bytes of the entries kept, 0 for no limit. Default is 0.
+        max_future_seconds (int, optional): How far ahead of the wall clock a timestamp may be and still count as the newest seen. Default is 300.
+
+    Attributes:
+        entries (OrderedDict[str, list[int]]): The tracked entries, with last seen timestamp as the first item and estimated size as the second.
+        total_bytes (int): The estimated size in bytes of all tracked entries.
+        newest_timestamp (int): The newest timestamp seen, ignoring timestamps too far ahead of the wall clock.
+    """
+    POLICIES = ("lru", "ttl", "count")
+
+    def __init__(self, policy: str, max_entries: int = 0, ttl_seconds: int = 0, max_bytes: int = 0, max_future_seconds: int = MAX_FUTURE_SECONDS):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown eviction policy '{policy}', expected one of {", ".join(self.POLICIES)}")
+        if policy == "ttl" and ttl_seconds <= 0:
+            raise ValueError("The ttl eviction policy requires a positive ttl")
+        if policy != "ttl" and max_entries <= 0 and max_bytes <= 0:
+            raise ValueError(f"The {policy} eviction policy requires a maximum number of entries or bytes")
+        self.policy = policy
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.max_future_seconds = max_future_seconds
+        self.entries: OrderedDict[str, list[int]] = OrderedDict()
+        self.total_bytes = 0
+        self.newest_timestamp = 0
+        self.__move_on_update = policy != "count"
+
+    def clone(self, share: int = 1) -> "EvictionPolicy":
+        """
+        Creates an empty policy with the same settings, optionally splitting the limits into equal shares.
+
+        Args:
+            share (int, optional): The number of shares the entry and byte limits are split into. Default is 1.
+
+        Returns:
+            EvictionPolicy: The new policy.
+        """
+        return EvictionPolicy(self.policy, -(-self.max_entries // share), self.ttl_seconds, -(-self.max_bytes // share), self.max_future_seconds)
+
+    def touch(self, key: str, timestamp: int, size: int):
+        """
+        Records an insert or update of an entry.
+
+        Args:
+            key (str): The key of the entry.
+            timestamp (int): The timestamp of the event updating the entry.
+            size (int): The current estimated size of the entry in bytes.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.entries[key] = [timestamp, size]
+            self.total_bytes = self.total_bytes + size
+        else:
+            if timestamp > entry[0]:
+                entry[0] = timestamp
+            self.total_bytes = self.total_bytes + size - entry[1]
+            entry[1] = size
+            if self.__move_on_update:
+                self.entries.move_to_end(key)
+        if timestamp > self.newest_timestamp and timestamp <= time.time() + self.max_future_seconds:
+            self.newest_timestamp = timestamp
+
+    def pop_evictions(self) -> list[str]:
+        """
+        Removes and returns the keys of entries that should be evicted.
+
+        Returns:
+            list[str]: The keys to evict, oldest first.
+        """
+        evicted_keys = []
+        expiry = self.newest_timestamp - self.ttl_seconds if self.ttl_seconds > 0 else None
+        while self.entries:
+            key, (last_seen, size) = next(iter(self.entries.items()))
+            over_entries = self.max_entries > 0 and len(self.entries) > self.max_entries
+            over_bytes = self.max_bytes > 0 and self.total_bytes > self.max_bytes
+            expired = expiry is not None and last_seen < expiry
+            if not (over_entries or over_bytes or expired):
+                break
+            self.entries.popitem(last=False)
+            self.total_bytes = self.total_bytes - size
+            evicted_keys.append(key)
+        return evicted_keys
+
+class EvictionFileSink:
+    """
+    Sink class for flushing evicted data manager entries to a newline delimited json file, so they are not lost.
+
+    Args:
+        path (str): The path of the file to append evicted entries to.
+
+    Attributes:
+        path (str): The path of the file evicted entries are appended to.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+
+    def __call__(self, manager: str, entry: dict):
+        """
+        Writes an evicted entry to the file.
+
+        Args:
+            manager (str): The name of the data manager the entry was evicted from.
+            entry (dict): The evicted entry.
+        """
+        self.file.write(json.dumps({"manager": manager, **entry}))
+        self.file.write("\n")
+
+    def close(self):
+        """
+        Flushes and closes the file.
+        """
+        self.file.close()
\ No newline at end of file
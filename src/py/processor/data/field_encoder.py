@@ -0,0 +1,80 @@
+from src.py.constants import message_keys
+
+# Low cardinality message fields the data managers store as integer codes
+ENCODED_FIELDS = (message_keys.DEVICE_TYPE, message_keys.APP_VERSION, message_keys.LOCALE)
+
+class FieldEncoder:
+    """
+    Class for dictionary encoding the values of a low cardinality field to small integer codes. Codes are assigned in
+    the order values are first seen, so an encoder can be mirrored in another process by replaying its values in order.
+
+    Attributes:
+        codes (dict[str, int]): Dictionary of values and their codes.
+        values (list[str]): The values, indexed by their codes.
+    """
+    __slots__ = ("codes", "values")
+
+    def __init__(self):
+        self.codes: dict[str, int] = {}
+        self.values: list[str] = []
+
+    def encode(self, value: str) -> int:
+        """
+        Gets the code of a value, assigning the next code to values not seen before.
+
+        Args:
+            value (str): The value to encode.
+
+        Returns:
+            int: The value's code.
+        """
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+    def decode(self, code: int) -> str:
+        """
+        Gets the value of a code.
+
+        Args:
+            code (int): The code to decode.
+
+        Returns:
+            str: The value the code was assigned to.
+        """
+        return self.values[code]
+
+    def extend(self, values: list[str]):
+        """
+        Encodes values in order, mirroring another encoder that saw them.
+
+        Args:
+            values (list[str]): The values to encode.
+        """
+        for value in values:
+            self.encode(value)
+
+def build_field_encoders() -> dict[str, FieldEncoder]:
+    """
+    Builds an empty encoder for each encoded field.
+
+    Returns:
+        dict[str, FieldEncoder]: The encoders by field name.
+    """
+    return {field: FieldEncoder() for field in ENCODED_FIELDS}
+
+def decode_fields(entry: dict, field_encoders: dict[str, FieldEncoder]) -> dict:
+    """
+    Decodes any encoded fields of a data manager entry back to their values, for output.
+
+    Args:
+        entry (dict): The entry, with encoded fields holding codes.
+        field_encoders (dict[str, FieldEncoder]): The encoders by field name.
+
+    Returns:
+        dict: A copy of the entry with encoded fields holding their values.
+    """
+    return {key: field_encoders[key].decode(value) if key in field_encoders else value for key, value in entry.items()}
\ No newline at end of file
@@ -1,3 +1,6 @@
+import sys
+from .eviction_policy import EvictionPolicy
+from collections.abc import Callable
 from logging import Logger
 
 class IpDataManager:
@@ -6,18 +9,36 @@ class IpDataManager:
 
     Args:
         logger (Logger): The logger instance used to convey information for this class.
+        eviction_policy (EvictionPolicy, optional): The policy used to bound the number and size of ip addresses kept. Default is None, keeping every ip address.
+        eviction_sink (Callable[[str, dict], None], optional): A sink evicted ip addresses are flushed to. Default is None, dropping evicted ip addresses.
 
     Attributes:
         ip_logins (dict[str, list[int]]): Dictionary of lists denoting total logins from an ip address as the first item and most recent login as the second, with the ip as the key.
+        evicted_entries (int): The total number of ip addresses evicted.
+        estimated_bytes (int): The estimated size in bytes of the ip addresses kept, maintained as they are added and evicted.
     """
-    def __init__(self, logger: Logger):
+    def __init__(self, logger: Logger, eviction_policy: EvictionPolicy | None = None, eviction_sink: Callable[[str, dict], None] | None = None):
         self.ip_logins: dict[str, list[int, int]] = {}
+        self.eviction_policy = eviction_policy
+        self.eviction_sink = eviction_sink
+        self.evicted_entries = 0
+        self.estimated_bytes = 0
         self.logger = logger.getChild("ip_metric_manager")
 
     async def compile_ip_data_async(self, ip_address: str, timestamp: int):
         """
         Method for compiling ip address data in the system.
 
+        Args:
+            ip_address (str): The ip address from the login attempt.
+            timestamp (int): The timestamp of the login attempt.
+        """
+        self.compile_ip_data(ip_address, timestamp)
+
+    def compile_ip_data(self, ip_address: str, timestamp: int):
+        """
+        Method for synchronously compiling ip address data in the system, for callers without an event loop such as shard workers.
+
         Args:
             ip_address (str): The ip address from the login attempt.
             timestamp (int): The timestamp of the login attempt.
@@ -28,6 +49,22 @@ class IpDataManager:
         else:
             self.__update_ip_data(ip_address, timestamp)
 
+        # Bound memory by evicting ip addresses according to policy
+        if self.eviction_policy:
+            self.eviction_policy.touch(ip_address, timestamp, self.__estimate_entry_size(ip_address))
+            for evicted_ip_address in self.eviction_policy.pop_evictions():
+                self.__evict_ip_data(evicted_ip_address)
+
+    def memory_usage(self) -> tuple[int, int]:
+        """
+        Method for reporting the number of ip addresses kept and their estimated size. The size is kept up to date as entries
+        change, so reporting doesn't walk every entry.
+
+        Returns:
+            tuple[int, int]: The number of ip addresses and their estimated size in bytes.
+        """
+        return len(self.ip_logins), self.estimated_bytes
+
     def __add_new_ip_data(self, ip_address: str, timestamp: int):
         """
         Private helper method for adding new ip address data in the system.
@@ -37,6 +74,7 @@ class IpDataManager:
             timestamp (int): The timestamp of the login attempt.
         """
         self.ip_logins[ip_address] = [1, timestamp]
+        self.estimated_bytes = self.estimated_bytes + self.__estimate_entry_size(ip_address)
 
     def __update_ip_data(self, ip_address: str, timestamp: int):
         """
@@ -49,4 +87,29 @@ class IpDataManager:
         # Update ip address login total and, if needed, most recent login
         self.ip_logins[ip_address][0] = self.ip_logins[ip_address][0] + 1
         if timestamp > self.ip_logins[ip_address][1]:
-            self.ip_logins[ip_address][1] = timestamp
\ No newline at end of file
+            self.ip_logins[ip_address][1] = timestamp
+
+    def __estimate_entry_size(self, ip_address: str) -> int:
+        """
+        Private helper method for estimating the size of an ip address's data in constant time.
+
+        Args:
+            ip_address (str): The ip address.
+
+        Returns:
+            int: The estimated size in bytes.
+        """
+        return sys.getsizeof(ip_address) + sys.getsizeof(self.ip_logins[ip_address])
+
+    def __evict_ip_data(self, ip_address: str):
+        """
+        Private helper method for removing an ip address's data from the system and flushing it to the eviction sink.
+
+        Args:
+            ip_address (str): The ip address.
+        """
+        self.estimated_bytes = self.estimated_bytes - self.__estimate_entry_size(ip_address)
+        login_data = self.ip_logins.pop(ip_address)
+        self.evicted_entries = self.evicted_entries + 1
+        if self.eviction_sink:
+            self.eviction_sink("ip", {"ip": ip_address, "total_logins": login_data[0], "last_login": login_data[1]})
\ No newline at end of file
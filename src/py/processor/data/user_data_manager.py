@@ -1,3 +1,7 @@
+import sys
+from .eviction_policy import EvictionPolicy
+from .user_features import UserFeatures, UserFeatureTracker
+from collections.abc import Callable
 from logging import Logger
 
 class UserDataManager:
@@ -6,17 +10,30 @@ class UserDataManager:
 
     Args:
         logger (Logger): The logger instance used to convey information for this class.
+        eviction_policy (EvictionPolicy, optional): The policy used to bound the number and size of users kept. Default is None, keeping every user.
+        eviction_sink (Callable[[str, dict], None], optional): A sink evicted users are flushed to. Default is None, dropping evicted users.
+        feature_tracker (UserFeatureTracker, optional): The tracker updating users' rolling login features and raising alerts. Default is None, not tracking features.
 
     Attributes:
         user_logins (dict[str, list[int]]): Dictionary of lists denoting total user logins as the first item and most recent login as the second, with the user_id as the key.
         users_and_devices (dict[str, list[str]]): Dictionary of lists denoting user devices, with the user_id as the key.
+        user_features (dict[str, UserFeatures]): Dictionary of users' rolling login features, with the user_id as the key, when features are tracked.
+        evicted_entries (int): The total number of users evicted.
+        estimated_bytes (int): The estimated size in bytes of the users kept, maintained as they are added, updated and evicted.
     """
-    def __init__(self, logger: Logger):
+    def __init__(self, logger: Logger, eviction_policy: EvictionPolicy | None = None, eviction_sink: Callable[[str, dict], None] | None = None,
+                 feature_tracker: UserFeatureTracker | None = None):
         self.user_logins: dict[str, list[int, int]] = {}
         self.users_and_devices: dict[str, list[str]] = {}
+        self.user_features: dict[str, UserFeatures] = {}
+        self.feature_tracker = feature_tracker
+        self.eviction_policy = eviction_policy
+        self.eviction_sink = eviction_sink
+        self.evicted_entries = 0
+        self.estimated_bytes = 0
         self.logger = logger.getChild("user_metric_manager")
 
-    async def compile_user_data_async(self, user_id: str, timestamp: int, device_id: str):
+    async def compile_user_data_async(self, user_id: str, timestamp: int, device_id: str, ip_address: str | None = None):
         """
         Method for compiling user data into the system.
 
@@ -24,12 +41,59 @@ class UserDataManager:
             user_id (str): The identifier for the user.
             timestamp (int): The timestamp of the login attempt.
             device_id (str): The identifier for the device used in the login attempt.
+            ip_address (str, optional): The ip address of the login attempt, used by the user's features. Default is None.
+        """
+        self.compile_user_data(user_id, timestamp, device_id, ip_address)
+
+    def compile_user_data(self, user_id: str, timestamp: int, device_id: str, ip_address: str | None = None):
+        """
+        Method for synchronously compiling user data into the system, for callers without an event loop such as shard workers.
+
+        Args:
+            user_id (str): The identifier for the user.
+            timestamp (int): The timestamp of the login attempt.
+            device_id (str): The identifier for the device used in the login attempt.
+            ip_address (str, optional): The ip address of the login attempt, used by the user's features. Default is None.
         """
         # Add or update user data based on if user exists
+        new_device = False
         if user_id not in self.users_and_devices:
             self.__add_new_user_data(user_id, timestamp, device_id)
         else:
-            self.__update_user_data(user_id, timestamp, device_id)
+            new_device = self.__update_user_data(user_id, timestamp, device_id)
+
+        # Roll the user's features forward, which may flag the user
+        if self.feature_tracker:
+            features = self.user_features.get(user_id)
+            features_size = self.__estimate_features_size(features)
+            features = self.feature_tracker.update(user_id, features, timestamp, ip_address, new_device)
+            self.user_features[user_id] = features
+            self.estimated_bytes = self.estimated_bytes + self.__estimate_features_size(features) - features_size
+
+        # Bound memory by evicting users according to policy
+        if self.eviction_policy:
+            self.eviction_policy.touch(user_id, timestamp, self.__estimate_entry_size(user_id))
+            for evicted_user_id in self.eviction_policy.pop_evictions():
+                self.__evict_user_data(evicted_user_id)
+
+    def drain_alerts(self) -> list[dict]:
+        """
+        Method for taking the alerts raised for flagged users since the last drain.
+
+        Returns:
+            list[dict]: The alerts, oldest first, empty if features aren't tracked.
+        """
+        return self.feature_tracker.drain_alerts() if self.feature_tracker else []
+
+    def memory_usage(self) -> tuple[int, int]:
+        """
+        Method for reporting the number of users kept and their estimated size. The size is kept up to date as entries
+        change, so reporting doesn't walk every entry.
+
+        Returns:
+            tuple[int, int]: The number of users and their estimated size in bytes.
+        """
+        return len(self.user_logins), self.estimated_bytes
 
     def __add_new_user_data(self, user_id: str, timestamp: int, device_id: str):
         """
@@ -45,8 +109,9 @@ class UserDataManager:
 
         # Create a user_and_devices entry
         self.users_and_devices[user_id] = [device_id]
+        self.estimated_bytes = self.estimated_bytes + self.__estimate_login_data_size(user_id)
 
-    def __update_user_data(self, user_id: str, timestamp: int, device_id: str):
+    def __update_user_data(self, user_id: str, timestamp: int, device_id: str) -> bool:
         """
         Private helper method for updating user data in the system.
 
@@ -54,6 +119,9 @@ class UserDataManager:
             user_id (str): The identifier for the user.
             timestamp (int): The timestamp of the login attempt.
             device_id (str): The identifier for the device used in the login attempt.
+
+        Returns:
+            bool: Whether the device is new to the user.
         """
         # Update user login total and, if needed, most recent login
         self.user_logins[user_id][0] = self.user_logins[user_id][0] + 1
@@ -62,4 +130,62 @@ class UserDataManager:
 
         # Check for new user device
         if device_id not in self.users_and_devices[user_id]:
-            self.users_and_devices[user_id].append(device_id)
\ No newline at end of file
+            login_data_size = self.__estimate_login_data_size(user_id)
+            self.users_and_devices[user_id].append(device_id)
+            self.estimated_bytes = self.estimated_bytes + self.__estimate_login_data_size(user_id) - login_data_size
+            return True
+        return False
+
+    def __estimate_entry_size(self, user_id: str) -> int:
+        """
+        Private helper method for estimating the size of a user's data in constant time.
+
+        Args:
+            user_id (str): The identifier for the user.
+
+        Returns:
+            int: The estimated size in bytes.
+        """
+        return self.__estimate_login_data_size(user_id) + self.__estimate_features_size(self.user_features.get(user_id))
+
+    def __estimate_login_data_size(self, user_id: str) -> int:
+        """
+        Private helper method for estimating the size of a user's logins and devices in constant time.
+
+        Args:
+            user_id (str): The identifier for the user.
+
+        Returns:
+            int: The estimated size in bytes.
+        """
+        devices = self.users_and_devices[user_id]
+        return sys.getsizeof(user_id) + sys.getsizeof(self.user_logins[user_id]) + sys.getsizeof(devices) + len(devices) * sys.getsizeof(devices[0])
+
+    def __estimate_features_size(self, features: UserFeatures | None) -> int:
+        """
+        Private helper method for estimating the size of a user's features, holding at most a fixed number of ip addresses.
+
+        Args:
+            features (UserFeatures | None): The user's features, if tracked.
+
+        Returns:
+            int: The estimated size in bytes, 0 without features.
+        """
+        if features is None:
+            return 0
+        return sys.getsizeof(features) + sys.getsizeof(features.recent_ips) + len(features.recent_ips) * sys.getsizeof(0)
+
+    def __evict_user_data(self, user_id: str):
+        """
+        Private helper method for removing a user's data from the system and flushing it to the eviction sink.
+
+        Args:
+            user_id (str): The identifier for the user.
+        """
+        self.estimated_bytes = self.estimated_bytes - self.__estimate_entry_size(user_id)
+        login_data = self.user_logins.pop(user_id)
+        devices = self.users_and_devices.pop(user_id)
+        self.user_features.pop(user_id, None)
+        self.evicted_entries = self.evicted_entries + 1
+        if self.eviction_sink:
+            self.eviction_sink("user", {"user_id": user_id, "total_logins": login_data[0], "last_login": login_data[1], "devices": devices})
\ No newline at end of file
@@ -0,0 +1,185 @@
+import math
+from collections import deque
+
+# Number of recent ip addresses tracked per user, bounding the distinct ip count a user's features can report
+MAX_TRACKED_IPS = 8
+
+# Reasons a user is flagged, with the bit each sets in a user's flags
+LOGIN_RATE = "login_rate"
+DISTINCT_IPS = "distinct_ips"
+NEW_DEVICES = "new_devices"
+ALERT_REASONS = {LOGIN_RATE: 1, DISTINCT_IPS: 2, NEW_DEVICES: 4}
+
+class UserFeatures:
+    """
+    Class for a user's rolling login features, updated in constant time and space per login. Rates are exponentially
+    decayed counts, so each approximates the number of events within the last window without keeping the events.
+
+    Attributes:
+        updated_at (int): The newest login timestamp seen, which the decayed counts are as of.
+        login_rate (float): The decayed number of logins within the window.
+        new_device_rate (float): The decayed number of devices first seen within the window, not counting the user's first device.
+        mean_gap (float): The exponentially weighted mean gap in seconds between logins, 0 before a second login.
+        last_gap (int): The gap in seconds before the latest login, 0 before a second login.
+        recent_ips (list[str | int]): The most recently seen ip addresses, flattened as alternating ip addresses and last seen timestamps.
+        flags (int): The bits of the alert reasons the user is currently flagged for.
+    """
+    __slots__ = ("updated_at", "login_rate", "new_device_rate", "mean_gap", "last_gap", "recent_ips", "flags")
+
+    def __init__(self, timestamp: int):
+        self.updated_at = timestamp
+        self.login_rate = 0.0
+        self.new_device_rate = 0.0
+        self.mean_gap = 0.0
+        self.last_gap = 0
+        self.recent_ips: list[str | int] = []
+        self.flags = 0
+
+class UserFeatureTracker:
+    """
+    Class for updating users' rolling login features and flagging users whose features cross their thresholds. A user
+    raises one alert as they cross a threshold and is re-armed once the feature falls back under it, so alerts stay low
+    volume however long a user stays over. Alerts wait in a bounded queue until drained, dropping the oldest when full.
+
+    Args:
+        window_seconds (int): The length in seconds of the rolling window features cover.
+        max_login_rate (int): The number of logins within the window above which a user is flagged, 0 to not flag on login rate.
+        max_distinct_ips (int): The number of distinct ip addresses within the window above which a user is flagged, 0 to not flag on ip addresses.
+        max_new_devices (int): The number of new devices within the window above which a user is flagged, 0 to not flag on new devices.
+        max_pending_alerts (int, optional): The number of alerts kept waiting to be drained. Default is 10000.
+
+    Attributes:
+        alerts (deque[dict]): The alerts waiting to be drained.
+        alert_count (int): The total number of alerts raised.
+        dropped_alert_count (int): The number of alerts dropped as the queue was full.
+    """
+    def __init__(self, window_seconds: int, max_login_rate: int, max_distinct_ips: int, max_new_devices: int, max_pending_alerts: int = 10000):
+        if window_seconds <= 0:
+            raise ValueError(f"The feature window must be positive, got {window_seconds}")
+        if not 0 <= max_distinct_ips < MAX_TRACKED_IPS:
+            raise ValueError(f"The distinct ip threshold must be between 0 and {MAX_TRACKED_IPS - 1}, got {max_distinct_ips}")
+        self.window_seconds = window_seconds
+        self.max_login_rate = max_login_rate
+        self.max_distinct_ips = max_distinct_ips
+        self.max_new_devices = max_new_devices
+        self.alerts: deque[dict] = deque(maxlen=max_pending_alerts)
+        self.alert_count = 0
+        self.dropped_alert_count = 0
+
+    def update(self, user_id: str, features: UserFeatures | None, timestamp: int, ip_address: str | None, new_device: bool) -> UserFeatures:
+        """
+        Updates a user's features with a login, raising an alert if the user crosses a threshold.
+
+        Args:
+            user_id (str): The identifier for the user.
+            features (UserFeatures | None): The user's features, or None for a user not seen before.
+            timestamp (int): The timestamp of the login.
+            ip_address (str | None): The ip address of the login, if known.
+            new_device (bool): Whether the login is from a device the user hasn't used before.
+
+        Returns:
+            UserFeatures: The user's updated features.
+        """
+        if features is None:
+            features = UserFeatures(timestamp)
+        else:
+            # Decay the counts up to this login, logins arriving out of order are counted without decaying
+            elapsed_seconds = timestamp - features.updated_at
+            if elapsed_seconds > 0:
+                decay = math.exp(-elapsed_seconds / self.window_seconds)
+                features.login_rate = features.login_rate * decay
+                features.new_device_rate = features.new_device_rate * decay
+                features.last_gap = elapsed_seconds
+                features.mean_gap = elapsed_seconds if features.mean_gap == 0 else features.mean_gap * 0.8 + elapsed_seconds * 0.2
+                features.updated_at = timestamp
+            if new_device:
+                features.new_device_rate = features.new_device_rate + 1
+        features.login_rate = features.login_rate + 1
+        if ip_address is not None:
+            self.__track_ip(features, ip_address, timestamp)
+
+        self.__check_thresholds(user_id, features)
+        return features
+
+    def drain_alerts(self) -> list[dict]:
+        """
+        Takes the alerts raised since the last drain.
+
+        Returns:
+            list[dict]: The alerts, oldest first.
+        """
+        alerts = list(self.alerts)
+        self.alerts.clear()
+        return alerts
+
+    def distinct_ips(self, features: UserFeatures) -> int:
+        """
+        Counts the distinct ip addresses a user logged in from within the window.
+
+        Args:
+            features (UserFeatures): The user's features.
+
+        Returns:
+            int: The number of distinct ip addresses, at most the number tracked.
+        """
+        cutoff = features.updated_at - self.window_seconds
+        return sum(1 for last_seen in features.recent_ips[1::2] if last_seen > cutoff)
+
+    def __track_ip(self, features: UserFeatures, ip_address: str, timestamp: int):
+        """
+        Private helper method for recording an ip address as recently seen, replacing the least recently seen ip address
+        once as many as tracked are held.
+
+        Args:
+            features (UserFeatures): The user's features.
+            ip_address (str): The ip address of the login.
+            timestamp (int): The timestamp of the login.
+        """
+        recent_ips = features.recent_ips
+        for i in range(0, len(recent_ips), 2):
+            if recent_ips[i] == ip_address:
+                recent_ips[i + 1] = max(recent_ips[i + 1], timestamp)
+                return
+        if len(recent_ips) < MAX_TRACKED_IPS * 2:
+            recent_ips.extend((ip_address, timestamp))
+            return
+        oldest = min(range(1, len(recent_ips), 2), key=recent_ips.__getitem__)
+        recent_ips[oldest - 1] = ip_address
+        recent_ips[oldest] = timestamp
+
+    def __check_thresholds(self, user_id: str, features: UserFeatures):
+        """
+        Private helper method for flagging a user as they cross a threshold and re-arming them once back under it.
+
+        Args:
+            user_id (str): The identifier for the user.
+            features (UserFeatures): The user's updated features.
+        """
+        distinct_ips = self.distinct_ips(features)
+        over_thresholds = 0
+        if self.max_login_rate and features.login_rate > self.max_login_rate:
+            over_thresholds = over_thresholds | ALERT_REASONS[LOGIN_RATE]
+        if self.max_distinct_ips and distinct_ips > self.max_distinct_ips:
+            over_thresholds = over_thresholds | ALERT_REASONS[DISTINCT_IPS]
+        if self.max_new_devices and features.new_device_rate > self.max_new_devices:
+            over_thresholds = over_thresholds | ALERT_REASONS[NEW_DEVICES]
+
+        # Only thresholds crossed since the last login raise an alert
+        crossed = over_thresholds & ~features.flags
+        features.flags = over_thresholds
+        if not crossed:
+            return
+
+        if len(self.alerts) == self.alerts.maxlen:
+            self.dropped_alert_count = self.dropped_alert_count + 1
+        self.alert_count = self.alert_count + 1
+        self.alerts.append({
+            "user_id": user_id,
+            "timestamp": features.updated_at,
+            "reasons": [reason for reason, bit in ALERT_REASONS.items() if crossed & bit],
+            "login_rate": round(features.login_rate, 2),
+            "distinct_ips": distinct_ips,
+            "new_device_rate": round(features.new_device_rate, 2),
+            "mean_gap_seconds": round(features.mean_gap, 2),
+            "last_gap_seconds": features.last_gap
+        })
\ No newline at end of file
@@ -0,0 +1,181 @@
+import hashlib
+import math
+import time
+from src.py.constants import message_keys
+from src.py.constants.event_time import MAX_FUTURE_SECONDS
+from logging import Logger
+
+# Number of time buckets a deduplication window is split into, older buckets are dropped whole as the window moves on
+DEFAULT_BUCKET_COUNT = 6
+
+class BloomFilter:
+    """
+    Class for a fixed size bloom filter over byte string keys, sized for an expected number of keys and false positive
+    rate. Bit positions are derived from one blake2b digest by double hashing.
+
+    Args:
+        capacity (int): The number of keys the filter is sized for.
+        false_positive_rate (float): The chance a key not added is reported as added, while the filter holds at most its capacity.
+
+    Attributes:
+        bits (bytearray): The filter's bit array.
+        bit_count (int): The number of bits in the filter.
+        hash_count (int): The number of bits set per key.
+        key_count (int): The number of distinct keys added.
+    """
+    __slots__ = ("bits", "bit_count", "hash_count", "key_count")
+
+    def __init__(self, capacity: int, false_positive_rate: float):
+        self.bit_count = max(8, math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.bit_count / capacity * math.log(2)))
+        self.bits = bytearray((self.bit_count + 7) // 8)
+        self.key_count = 0
+
+    def add(self, key: bytes) -> bool:
+        """
+        Adds a key to the filter.
+
+        Args:
+            key (bytes): The key to add.
+
+        Returns:
+            bool: Whether the key was, probably, already in the filter.
+        """
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        first_hash = int.from_bytes(digest[:8], "little")
+        second_hash = int.from_bytes(digest[8:], "little") | 1
+        bits = self.bits
+        present = True
+        for i in range(self.hash_count):
+            bit = (first_hash + i * second_hash) % self.bit_count
+            mask = 1 << (bit & 7)
+            if not bits[bit >> 3] & mask:
+                present = False
+                bits[bit >> 3] |= mask
+        if not present:
+            self.key_count = self.key_count + 1
+        return present
+
+class Deduplicator:
+    """
+    Class for dropping duplicate login events, keyed on their user, device and timestamp, in bounded memory. Keys are
+    held in a ring of bloom filters, each covering a bucket of event time, and as a duplicate shares its original's
+    timestamp only the one filter for its bucket is checked. Once a newer bucket starts the oldest is dropped whole,
+    so memory stays fixed however long the pipeline runs. Events older than the window are let through unchecked, as
+    are events stamped further ahead of the wall clock than the clock skew allowed, which would otherwise move the
+    window past every real event.
+
+    Args:
+        logger (Logger): The logger instance used to convey information for this class.
+        window_seconds (int): How far back in event time, from the newest event seen, duplicates are caught.
+        capacity (int): The number of distinct events expected within a window, sizing the filters.
+        false_positive_rate (float): The chance a distinct event is mistaken for a duplicate and dropped, while within capacity.
+        bucket_count (int, optional): The number of time buckets the window is split into. Default is 6.
+        max_future_seconds (int, optional): How far ahead of the wall clock an event may be stamped and still be checked. Default is 300.
+
+    Attributes:
+        bucket_seconds (int): The seconds of event time each bucket covers.
+        bucket_capacity (int): The number of distinct events each bucket's filter is sized for.
+        buckets (dict[int, BloomFilter]): The filter of each bucket within the window, by bucket index.
+        newest_bucket (int | None): The index of the newest bucket seen.
+        checked_count (int): The number of events checked.
+        duplicate_count (int): The number of events dropped as duplicates.
+        expired_count (int): The number of events let through unchecked as older than the window.
+        future_count (int): The number of events let through unchecked as stamped too far ahead of the wall clock.
+        overfilled_buckets (int): The number of buckets filled past their capacity, which raises their false positive rate.
+    """
+    def __init__(self, logger: Logger, window_seconds: int, capacity: int, false_positive_rate: float, bucket_count: int = DEFAULT_BUCKET_COUNT,
+                 max_future_seconds: int = MAX_FUTURE_SECONDS):
+        if window_seconds <= 0 or capacity <= 0 or bucket_count <= 0:
+            raise ValueError("The deduplication window, capacity and bucket count must be positive")
+        if not 0 < false_positive_rate < 1:
+            raise ValueError(f"The deduplication false positive rate must be between 0 and 1, got {false_positive_rate}")
+        self.logger = logger.getChild("deduplicator")
+        self.bucket_count = bucket_count
+        self.bucket_seconds = math.ceil(window_seconds / bucket_count)
+        self.bucket_capacity = math.ceil(capacity / bucket_count)
+        self.false_positive_rate = false_positive_rate
+        self.max_future_seconds = max_future_seconds
+        self.buckets: dict[int, BloomFilter] = {}
+        self.newest_bucket: int | None = None
+        self.checked_count = 0
+        self.duplicate_count = 0
+        self.expired_count = 0
+        self.future_count = 0
+        self.overfilled_buckets = 0
+
+    def is_duplicate(self, user_id: str, device_id: str, timestamp: int) -> bool:
+        """
+        Checks whether an event was seen before, recording it if not.
+
+        Args:
+            user_id (str): The user of the login event.
+            device_id (str): The device of the login event.
+            timestamp (int): The time of the login event.
+
+        Returns:
+            bool: Whether the event is a duplicate.
+        """
+        self.checked_count = self.checked_count + 1
+        if timestamp > time.time() + self.max_future_seconds:
+            self.future_count = self.future_count + 1
+            return False
+
+        bucket_index = timestamp // self.bucket_seconds
+        if self.newest_bucket is None or bucket_index > self.newest_bucket:
+            self.__advance_window(bucket_index)
+        elif bucket_index <= self.newest_bucket - self.bucket_count:
+            self.expired_count = self.expired_count + 1
+            return False
+
+        bucket = self.buckets.get(bucket_index)
+        if bucket is None:
+            bucket = self.buckets[bucket_index] = BloomFilter(self.bucket_capacity, self.false_positive_rate)
+        duplicate = bucket.add(f"{user_id}\x1f{device_id}\x1f{timestamp}".encode("utf-8"))
+        if duplicate:
+            self.duplicate_count = self.duplicate_count + 1
+        elif bucket.key_count == self.bucket_capacity + 1:
+            self.overfilled_buckets = self.overfilled_buckets + 1
+            self.logger.warning(f"Deduplication bucket {bucket_index} is over its capacity of {self.bucket_capacity} events, raising its false positive rate...")
+        return duplicate
+
+    def drop_duplicates(self, processed_messages: list[dict[str, str]]) -> list[dict[str, str]]:
+        """
+        Drops duplicate events from a batch of processed messages, keeping the first of each in order.
+
+        Args:
+            processed_messages (list[dict[str, str]]): A list of processed messages as dictionaries.
+
+        Returns:
+            list[dict[str, str]]: The processed messages that aren't duplicates.
+        """
+        return [message for message in processed_messages
+                if not self.is_duplicate(message[message_keys.USER_ID], message[message_keys.DEVICE_ID], int(message[message_keys.TIMESTAMP]))]
+
+    def estimated_bytes(self) -> int:
+        """
+        Gets the size of the filters held, bounded by the bucket count.
+
+        Returns:
+            int: The bytes held by the filters' bit arrays.
+        """
+        return sum(len(bucket.bits) for bucket in self.buckets.values())
+
+    def report(self):
+        """
+        Reports the events checked and the duplicate hit rate.
+        """
+        hit_rate = self.duplicate_count / self.checked_count if self.checked_count else 0.0
+        self.logger.info(f"Dropped {self.duplicate_count} duplicates of {self.checked_count} messages checked ({hit_rate:.2%}), "
+                         f"let {self.expired_count} messages older than the window and {self.future_count} from the future through, holding {self.estimated_bytes() / (1024 * 1024):.2f} MiB of filters...")
+
+    def __advance_window(self, bucket_index: int):
+        """
+        Private helper method for moving the window on to a newer bucket, dropping the buckets that fall out of it.
+
+        Args:
+            bucket_index (int): The index of the newest bucket.
+        """
+        self.newest_bucket = bucket_index
+        for expired_index in [index for index in self.buckets if index <= bucket_index - self.bucket_count]:
+            del self.buckets[expired_index]
\ No newline at end of file
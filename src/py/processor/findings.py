@@ -0,0 +1,270 @@
+import heapq
+import json
+import os
+from src.py.constants import message_keys
+from .data.activity_data_manager import ActivityDataManager
+from .data.device_data_manager import DeviceDataManager
+from .data.field_encoder import FieldEncoder
+from .data.ip_data_manager import IpDataManager
+from .data.user_data_manager import UserDataManager
+from datetime import datetime
+from logging import Logger
+
+"""
+Helpers for building and merging statistical findings from the data managers. A findings dictionary is a
+plain, picklable snapshot of the managers' state that can be gathered from any number of shards and merged.
+"""
+
+# Name pattern of the findings snapshot written by each consumer replica
+SNAPSHOT_FILE_PREFIX = "findings-"
+SNAPSHOT_FILE_SUFFIX = ".json"
+
+UNIQUE_USERS = "unique_users"
+UNIQUE_DEVICES = "unique_devices"
+MOST_ACTIVE_USERS = "most_active_users"
+MOST_ACTIVE_IPS = "most_active_ips"
+VERSION_ACTIVITY = "version_activity"
+LOCALE_ACTIVITY = "locale_activity"
+MEMORY_USAGE = "memory_usage"
+APPROXIMATE = "approximate"
+
+def collect_findings(user_data_manager: UserDataManager, device_data_manager: DeviceDataManager, ip_data_manager: IpDataManager,
+                     activity_data_manager: ActivityDataManager, top_n: int = 10, field_encoders: dict[str, FieldEncoder] | None = None) -> dict:
+    """
+    Builds a findings snapshot from a set of data managers.
+
+    Args:
+        user_data_manager (UserDataManager): The data manager holding user data.
+        device_data_manager (DeviceDataManager): The data manager holding device data.
+        ip_data_manager (IpDataManager): The data manager holding ip data.
+        activity_data_manager (ActivityDataManager): The data manager holding activity data.
+        top_n (int, optional): The number of most active users and ip's to keep. Default is 10.
+        field_encoders (dict[str, FieldEncoder], optional): The encoders of the fields the activity data manager holds as codes. Default is None, for managers holding values.
+
+    Returns:
+        dict: The findings snapshot, with most active entries stored as (key, total logins, last login) tuples and memory usage
+        stored as [entries, estimated bytes, evicted entries] lists by data manager name.
+    """
+    most_active_users = heapq.nlargest(top_n, user_data_manager.user_logins.items(), key=lambda item: item[1][0])
+    most_active_ips = heapq.nlargest(top_n, ip_data_manager.ip_logins.items(), key=lambda item: item[1][0])
+    return {
+        UNIQUE_USERS: len(user_data_manager.users_and_devices),
+        UNIQUE_DEVICES: len(device_data_manager.devices),
+        MOST_ACTIVE_USERS: [(user, login_data[0], login_data[1]) for user, login_data in most_active_users],
+        MOST_ACTIVE_IPS: [(ip, login_data[0], login_data[1]) for ip, login_data in most_active_ips],
+        VERSION_ACTIVITY: _decode_activity(activity_data_manager.version_activity, message_keys.APP_VERSION, field_encoders),
+        LOCALE_ACTIVITY: _decode_activity(activity_data_manager.locale_activity, message_keys.LOCALE, field_encoders),
+        MEMORY_USAGE: {
+            "user": [*user_data_manager.memory_usage(), user_data_manager.evicted_entries],
+            "device": [*device_data_manager.memory_usage(), device_data_manager.evicted_entries],
+            "ip": [*ip_data_manager.memory_usage(), ip_data_manager.evicted_entries]
+        }
+    }
+
+def merge_findings(findings_list: list[dict], top_n: int = 10, disjoint_keys: bool = True, disjoint_users: bool = False) -> dict:
+    """
+    Merges findings snapshots. The shards of a sharded aggregation hold disjoint users, devices and ip's, so their
+    snapshots merge exactly. Consumer replicas share devices and ip's, and users too unless every replica consumed a
+    topic keyed by user id from its first message, so a key seen by several replicas is counted by each of them. Their
+    merged unique counts are then upper bounds, and their merged most active entries sum the logins of each replica's
+    most active entries, missing logins of a key that fell outside a replica's top entries. Such findings are listed
+    as approximate in the merged snapshot.
+
+    Args:
+        findings_list (list[dict]): The findings snapshots to merge.
+        top_n (int, optional): The number of most active users and ip's to keep. Default is 10.
+        disjoint_keys (bool, optional): Whether users, devices and ip's are all disjoint across the snapshots, as with shards. Default is True.
+        disjoint_users (bool, optional): Whether users are disjoint across the snapshots when devices and ip's aren't. Default is False.
+
+    Returns:
+        dict: A single merged findings snapshot, listing its approximate findings under "approximate" when keys weren't disjoint.
+    """
+    merged = {
+        UNIQUE_USERS: 0,
+        UNIQUE_DEVICES: 0,
+        MOST_ACTIVE_USERS: [],
+        MOST_ACTIVE_IPS: [],
+        VERSION_ACTIVITY: {},
+        LOCALE_ACTIVITY: {},
+        MEMORY_USAGE: {}
+    }
+    for findings in findings_list:
+        merged[UNIQUE_USERS] = merged[UNIQUE_USERS] + findings[UNIQUE_USERS]
+        merged[UNIQUE_DEVICES] = merged[UNIQUE_DEVICES] + findings[UNIQUE_DEVICES]
+        merged[MOST_ACTIVE_USERS].extend(findings[MOST_ACTIVE_USERS])
+        merged[MOST_ACTIVE_IPS].extend(findings[MOST_ACTIVE_IPS])
+        _merge_activity(merged[VERSION_ACTIVITY], findings[VERSION_ACTIVITY])
+        _merge_activity(merged[LOCALE_ACTIVITY], findings[LOCALE_ACTIVITY])
+        for manager, usage in findings[MEMORY_USAGE].items():
+            merged_usage = merged[MEMORY_USAGE].setdefault(manager, [0] * len(usage))
+            merged[MEMORY_USAGE][manager] = [merged_value + value for merged_value, value in zip(merged_usage, usage)]
+
+    # Keys seen by several snapshots have their logins summed before ranking
+    if not disjoint_keys:
+        merged[APPROXIMATE] = []
+        if not disjoint_users:
+            merged[MOST_ACTIVE_USERS] = _sum_logins(merged[MOST_ACTIVE_USERS])
+            merged[APPROXIMATE].extend([UNIQUE_USERS, MOST_ACTIVE_USERS])
+        merged[MOST_ACTIVE_IPS] = _sum_logins(merged[MOST_ACTIVE_IPS])
+        merged[APPROXIMATE].extend([UNIQUE_DEVICES, MOST_ACTIVE_IPS])
+
+    # With one entry per key, the global top entries are the top of the local top entries
+    merged[MOST_ACTIVE_USERS] = heapq.nlargest(top_n, merged[MOST_ACTIVE_USERS], key=lambda item: item[1])
+    merged[MOST_ACTIVE_IPS] = heapq.nlargest(top_n, merged[MOST_ACTIVE_IPS], key=lambda item: item[1])
+    return merged
+
+def _sum_logins(most_active: list[tuple[str, int, int]]) -> list[tuple[str, int, int]]:
+    """
+    Private helper function for combining most active entries of the same key, summing their total logins and keeping their last login.
+
+    Args:
+        most_active (list[tuple[str, int, int]]): The most active entries, as (key, total logins, last login) tuples.
+
+    Returns:
+        list[tuple[str, int, int]]: One entry for each key.
+    """
+    login_data = {}
+    for key, total_logins, last_login in most_active:
+        merged_total_logins, merged_last_login = login_data.get(key, (0, last_login))
+        login_data[key] = (merged_total_logins + total_logins, max(merged_last_login, last_login))
+    return [(key, total_logins, last_login) for key, (total_logins, last_login) in login_data.items()]
+
+def _decode_activity(activity: dict, activity_field: str, field_encoders: dict[str, FieldEncoder] | None) -> dict[str, dict[str, int]]:
+    """
+    Private helper function for copying nested activity counts, decoding their keys if the data manager holds codes.
+
+    Args:
+        activity (dict): The activity dictionary, keyed by activity field then device type.
+        activity_field (str): The name of the field the activity is keyed by.
+        field_encoders (dict[str, FieldEncoder] | None): The encoders of the encoded fields, if the keys are codes.
+
+    Returns:
+        dict[str, dict[str, int]]: The copied activity dictionary, keyed by values.
+    """
+    if not field_encoders:
+        return {activity_key: dict(device_counts) for activity_key, device_counts in activity.items()}
+    activity_encoder = field_encoders[activity_field]
+    device_type_encoder = field_encoders[message_keys.DEVICE_TYPE]
+    return {activity_encoder.decode(activity_key): {device_type_encoder.decode(device_type): count for device_type, count in device_counts.items()}
+            for activity_key, device_counts in activity.items()}
+
+def _merge_activity(merged_activity: dict[str, dict[str, int]], activity: dict[str, dict[str, int]]):
+    """
+    Private helper function for summing nested activity counts into a merged activity dictionary.
+
+    Args:
+        merged_activity (dict[str, dict[str, int]]): The activity dictionary being merged into.
+        activity (dict[str, dict[str, int]]): The activity dictionary to add.
+    """
+    for activity_key, device_counts in activity.items():
+        merged_device_counts = merged_activity.setdefault(activity_key, {})
+        for device_type, count in device_counts.items():
+            merged_device_counts[device_type] = merged_device_counts.get(device_type, 0) + count
+
+def log_findings(logger: Logger, findings: dict):
+    """
+    Outputs the statistical insights in a findings snapshot via a logger.
+
+    Args:
+        logger (Logger): The logger to output the insights through.
+        findings (dict): The findings snapshot.
+    """
+    # Report total unique users in the system
+    approximate = findings.get(APPROXIMATE, [])
+    if UNIQUE_USERS in approximate:
+        logger.info(f"There are at most {findings[UNIQUE_USERS]} unique users in the system, approximate as users may be counted by more than one replica...")
+    else:
+        logger.info(f"There are {findings[UNIQUE_USERS]} unique users in the system...")
+
+    # Report total unique devices in the system
+    if UNIQUE_DEVICES in approximate:
+        logger.info(f"There are at most {findings[UNIQUE_DEVICES]} unique devices in the system, approximate as devices may be counted by more than one replica...")
+    else:
+        logger.info(f"There are {findings[UNIQUE_DEVICES]} unique devices in the system...")
+
+    # Report 10 most active users
+    active_user_msg = f"Most active users in the system:"
+    if MOST_ACTIVE_USERS in approximate:
+        active_user_msg = f"Most active users in the system, approximate as only each replica's most active users were merged:"
+    for user, total_logins, last_login in findings[MOST_ACTIVE_USERS]:
+        active_user_msg = "\n".join([active_user_msg, f"\tUser: {user}"])
+        active_user_msg = "\n".join([active_user_msg, f"\t\tTotal Logins: {total_logins}"])
+        active_user_msg = "\n".join([active_user_msg, f"\t\tLast Login: {datetime.fromtimestamp(last_login)}"])
+    logger.info(active_user_msg)
+
+    # Report 10 most active ip's
+    active_ip_msg = f"Most active ip's in the system:"
+    if MOST_ACTIVE_IPS in approximate:
+        active_ip_msg = f"Most active ip's in the system, approximate as only each replica's most active ip's were merged:"
+    for ip_address, total_logins, last_login in findings[MOST_ACTIVE_IPS]:
+        active_ip_msg = "\n".join([active_ip_msg, f"\tIP Address: {ip_address}"])
+        active_ip_msg = "\n".join([active_ip_msg, f"\t\tTotal Logins: {total_logins}"])
+        active_ip_msg = "\n".join([active_ip_msg, f"\t\tLast Login: {datetime.fromtimestamp(last_login)}"])
+    logger.info(active_ip_msg)
+
+    # Report version activity
+    logger.info(f"App version activity: {findings[VERSION_ACTIVITY]}")
+
+    # Report locale activity
+    logger.info(f"Locale activity: {findings[LOCALE_ACTIVITY]}")
+
+    # Report memory usage of each data manager
+    for manager, (entries, estimated_bytes, evicted_entries) in findings[MEMORY_USAGE].items():
+        logger.info(f"The {manager} data manager holds {entries} entries using an estimated {estimated_bytes / (1024 * 1024):.2f} MiB, with {evicted_entries} entries evicted...")
+
+def save_findings_snapshot(directory: str, replica: str, findings: dict, throughput: dict) -> str:
+    """
+    Writes a replica's findings and throughput to a json file, so the findings of every replica can be merged once they shut down.
+
+    Args:
+        directory (str): The directory to write the snapshot to.
+        replica (str): The name of the replica, unique within the consumer group.
+        findings (dict): The replica's findings snapshot.
+        throughput (dict): The replica's throughput meter snapshot.
+
+    Returns:
+        str: The path of the written snapshot.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{SNAPSHOT_FILE_PREFIX}{replica}{SNAPSHOT_FILE_SUFFIX}")
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"replica": replica, "throughput": throughput, "findings": findings}, file)
+    return path
+
+def load_findings_snapshots(directory: str) -> list[dict]:
+    """
+    Reads every replica findings snapshot in a directory.
+
+    Args:
+        directory (str): The directory the snapshots were written to.
+
+    Returns:
+        list[dict]: The snapshots, ordered by replica name.
+    """
+    snapshots = []
+    for file_name in sorted(os.listdir(directory)):
+        if file_name.startswith(SNAPSHOT_FILE_PREFIX) and file_name.endswith(SNAPSHOT_FILE_SUFFIX):
+            with open(os.path.join(directory, file_name), encoding="utf-8") as file:
+                snapshots.append(json.load(file))
+    return snapshots
+
+def merge_throughput(throughputs: list[dict]) -> dict:
+    """
+    Merges the throughput meter snapshots of replicas running side by side into one window covering them all.
+
+    Args:
+        throughputs (list[dict]): The throughput meter snapshots to merge.
+
+    Returns:
+        dict: The merged snapshot, with the total message count, the combined window and the messages per second across it.
+    """
+    started = [throughput["first_message_at"] for throughput in throughputs if throughput["first_message_at"] is not None]
+    finished = [throughput["last_message_at"] for throughput in throughputs if throughput["last_message_at"] is not None]
+    message_count = sum(throughput["message_count"] for throughput in throughputs)
+    elapsed_seconds = max(finished) - min(started) if started and finished else 0.0
+    return {
+        "message_count": message_count,
+        "first_message_at": min(started) if started else None,
+        "last_message_at": max(finished) if finished else None,
+        "messages_per_second": message_count / elapsed_seconds if elapsed_seconds > 0 else 0.0
+    }
@@ -1,12 +1,21 @@
 import ast
 import asyncio
+import os
+from collections import Counter
 from concurrent.futures import ProcessPoolExecutor
 from src.py.constants import message_keys
 from .data.activity_data_manager import ActivityDataManager
 from .data.device_data_manager import DeviceDataManager
+from .data.eviction_policy import EvictionFileSink, EvictionPolicy
+from .data.field_encoder import build_field_encoders, decode_fields
 from .data.ip_data_manager import IpDataManager
 from .data.user_data_manager import UserDataManager
-from datetime import datetime
+from .data.user_features import UserFeatureTracker
+from .deduplicator import Deduplicator
+from .findings import collect_findings, log_findings
+from .shared_memory_transport import SharedMemoryParser
+from .sharded_aggregator import ShardedAggregator
+from .validation import PARSE_ERROR, RejectedMessage, validate_message
 from logging import Logger
 
 class Processor:
@@ -15,46 +24,241 @@ class Processor:
 
     Args:
         logger (Logger): The logger instance used to convey information for this class.
+        shard_count (int, optional): The number of shard worker processes to aggregate statistics across. Default is 0, aggregating in process.
+        parser_slot_count (int, optional): The number of shared memory ring buffer slots used to parse raw messages. Default is 0, parsing through a process pool instead.
+        eviction_policies (dict[str, EvictionPolicy], optional): Eviction policies for the "user", "device" and "ip" data managers. Default is None, keeping every entry.
+        eviction_sink_path (str, optional): The path of a newline delimited json file evicted entries are flushed to. Default is None, dropping evicted entries.
+        deduplicator (Deduplicator, optional): The deduplicator dropping duplicate login events before statistics are compiled. Default is None, keeping duplicates.
+        feature_tracker (UserFeatureTracker, optional): The tracker updating users' rolling login features and raising alerts for flagged users. Default is None, not tracking features.
 
     Attributes:
+        field_encoders (dict[str, FieldEncoder]): The encoders mapping device types, app versions and locales to the integer codes the data managers hold.
         activity_data_manager (ActivityDataManager): The data manager for managing activity data.
         device_data_manager (DeviceDataManager): The data manager for managing device data.
         ip_data_manager (IpDataManager): The data manager for managing ip data.
         user_data_manager (UserDataManager): The data manager for managing user data.
+        sharded_aggregator (ShardedAggregator | None): The sharded aggregator used in place of the data managers when sharding is enabled.
+        shared_memory_parser (SharedMemoryParser | None): The shared memory parser used for raw messages when enabled.
+        executor (ProcessPoolExecutor | None): The parsing process pool, forked on entering the processor's context and reused across batches.
+        eviction_sink (EvictionFileSink | None): The file evicted entries are flushed to, opened on entering the processor's context.
+        rejected_messages (list[RejectedMessage]): The messages rejected since the last drain, waiting to be dead lettered.
+        rejection_counts (Counter[str]): The total number of rejected messages per rejection reason.
+        deduplicator (Deduplicator | None): The deduplicator dropping duplicate login events, when enabled.
+        alert_count (int): The total number of alerts drained for flagged users.
     """
-    def __init__(self, logger: Logger):
+    def __init__(self, logger: Logger, shard_count: int = 0, parser_slot_count: int = 0, eviction_policies: dict[str, EvictionPolicy] | None = None,
+                 eviction_sink_path: str | None = None, deduplicator: Deduplicator | None = None, feature_tracker: UserFeatureTracker | None = None):
         self.logger = logger.getChild("processor")
+        eviction_policies = eviction_policies or {}
+        # Shard workers open their own eviction sinks, the processor's is only used when aggregating in process
+        self.eviction_sink_path = eviction_sink_path if shard_count == 0 else None
+        self.eviction_sink: EvictionFileSink | None = None
+        manager_eviction_sink = self.__flush_evicted_entry if self.eviction_sink_path else None
+        self.field_encoders = build_field_encoders()
         self.activity_data_manager = ActivityDataManager(self.logger)
-        self.device_data_manager = DeviceDataManager(self.logger)
-        self.ip_data_manager = IpDataManager(self.logger)
-        self.user_data_manager = UserDataManager(self.logger)
+        self.device_data_manager = DeviceDataManager(self.logger, eviction_policies.get("device"), manager_eviction_sink)
+        self.ip_data_manager = IpDataManager(self.logger, eviction_policies.get("ip"), manager_eviction_sink)
+        self.user_data_manager = UserDataManager(self.logger, eviction_policies.get("user"), manager_eviction_sink, feature_tracker)
         self.activity_manager_async_lock = asyncio.Lock()
         self.device_manager_async_lock = asyncio.Lock()
         self.ip_manager_async_lock = asyncio.Lock()
         self.user_manager_async_lock = asyncio.Lock()
+        self.sharded_aggregator = ShardedAggregator(self.logger, shard_count, eviction_policies, eviction_sink_path, feature_tracker) if shard_count > 0 else None
+        self.shared_memory_parser = SharedMemoryParser(self.logger, parser_slot_count, os.cpu_count(), parse_and_validate_message) if parser_slot_count > 0 else None
+        self.executor: ProcessPoolExecutor | None = None
+        self.rejected_messages: list[RejectedMessage] = []
+        self.rejection_counts: Counter[str] = Counter()
+        self.deduplicator = deduplicator
+        self.alert_count = 0
 
     def __enter__(self):
+        if self.eviction_sink_path:
+            self.eviction_sink = EvictionFileSink(self.eviction_sink_path)
+        if self.sharded_aggregator:
+            self.sharded_aggregator.start()
+        if self.shared_memory_parser:
+            self.shared_memory_parser.start()
+        else:
+            # Fork the parsing pool up front and run a no-op on every worker so the first batch doesn't pay for it
+            self.logger.info("Starting parsing process pool...")
+            worker_count = os.cpu_count() or 1
+            self.executor = ProcessPoolExecutor(worker_count)
+            list(self.executor.map(int, range(worker_count)))
         return self
 
     def __exit__(self, exc_type, exc_value, traceback):
-        pass
+        if self.executor:
+            self.executor.shutdown()
+            self.executor = None
+        if self.shared_memory_parser:
+            self.shared_memory_parser.close()
+        if self.sharded_aggregator:
+            self.sharded_aggregator.close()
+            if self.sharded_aggregator.pending_alerts:
+                self.logger.warning(f"Dropping {len(self.sharded_aggregator.pending_alerts)} alerts raised by the shard workers that were never drained...")
+        if self.eviction_sink:
+            self.eviction_sink.close()
+            self.eviction_sink = None
 
     async def process_messages_async(self, messages: list[str]) -> list[dict[str, str]]:
         """
         Asynchronously and concurrently processes raw messages from kafka and reports some relevant findings based on the messages' contents.
+        Malformed messages are set aside as rejected rather than failing the batch.
 
         Args:
             messages (list[str]): A list of messages, as strings, to be processed.
 
         Returns:
-            list[dict[str, str]]: A list of processed messages as dictionaries.
+            list[dict[str, str]]: A list of the valid processed messages as dictionaries.
         """
         self.logger.debug(f"Attempting to process {len(messages)} messages...")
-        processed_messages = []
+        processed_messages = self.__drop_duplicates(self.__split_rejected_messages(self.__parse_messages(messages)))
+        await self.__compile_batch_statistics_async(processed_messages)
+        return processed_messages
+
+    async def process_raw_messages_async(self, messages: list[bytes]) -> list[dict[str, str]]:
+        """
+        Asynchronously processes raw message payloads, parsing them over shared memory when the shared memory parser is enabled.
+
+        Args:
+            messages (list[bytes]): A list of raw message payloads to be processed.
+
+        Returns:
+            list[dict[str, str]]: A list of the valid processed messages as dictionaries.
+        """
+        if self.shared_memory_parser:
+            self.logger.debug(f"Attempting to process {len(messages)} raw messages over shared memory...")
+            parse_results = self.shared_memory_parser.parse_messages(messages)
+        else:
+            self.logger.debug(f"Attempting to process {len(messages)} raw messages...")
+            parse_results = self.__parse_messages([message.decode("utf-8", errors="replace") for message in messages])
+
+        # Rejected messages keep the payloads as received, the decoded messages may have had bytes replaced
+        processed_messages = self.__drop_duplicates(self.__split_rejected_messages(parse_results, messages))
+        await self.__compile_batch_statistics_async(processed_messages)
+        return processed_messages
 
-        # Process messages quickly with multiprocessing
+    def drain_rejected_messages(self) -> list[RejectedMessage]:
+        """
+        Method for taking the messages rejected since the last drain, so they can be dead lettered.
+
+        Returns:
+            list[RejectedMessage]: The rejected messages, in the order received.
+        """
+        rejected_messages = self.rejected_messages
+        self.rejected_messages = []
+        return rejected_messages
+
+    def drain_alerts(self) -> list[dict]:
+        """
+        Method for taking the alerts raised for flagged users since the last drain, gathered from the shard workers when sharding is enabled.
+
+        Returns:
+            list[dict]: The alerts, empty if features aren't tracked.
+        """
+        alerts = self.sharded_aggregator.drain_alerts() if self.sharded_aggregator else self.user_data_manager.drain_alerts()
+        self.alert_count = self.alert_count + len(alerts)
+        return alerts
+
+    def __parse_messages(self, messages: list[str]) -> list[dict[str, str] | RejectedMessage]:
+        """
+        Private helper method for parsing and validating messages quickly with multiprocessing, in chunks to cut per message overhead.
+
+        Args:
+            messages (list[str]): The messages to be parsed.
+
+        Returns:
+            list[dict[str, str] | RejectedMessage]: The result of parsing and validating each message, in order.
+        """
+        if self.executor:
+            return list(self.executor.map(parse_and_validate_message, messages, chunksize=self.__get_chunk_size(len(messages))))
         with ProcessPoolExecutor() as executor:
-            processed_messages = list(executor.map(self.process_message, messages))
+            return list(executor.map(parse_and_validate_message, messages, chunksize=self.__get_chunk_size(len(messages))))
+
+    def close_shards(self, timeout: float | None = None):
+        """
+        Method for stopping the shard workers once every batch is compiled, so the alerts they raised last can be drained
+        while they can still be produced. Findings have to be collected beforehand, as they're gathered from the shard workers.
+
+        Args:
+            timeout (float, optional): The most time in seconds to wait for the shard workers to stop. Default is None, waiting for them.
+        """
+        if self.sharded_aggregator:
+            self.sharded_aggregator.close(timeout)
+
+    def __split_rejected_messages(self, parse_results: list[dict[str, str] | RejectedMessage], raw_messages: list[bytes] | None = None) -> list[dict[str, str]]:
+        """
+        Private helper method for setting aside and counting rejected messages, keeping the valid messages in order.
+
+        Args:
+            parse_results (list[dict[str, str] | RejectedMessage]): The results of parsing and validating a batch of messages.
+            raw_messages (list[bytes] | None): The payloads the batch was parsed from, kept on rejected messages when given. Defaults to None.
+
+        Returns:
+            list[dict[str, str]]: The valid processed messages.
+        """
+        processed_messages = [result for result in parse_results if type(result) is dict]
+        if len(processed_messages) == len(parse_results):
+            return processed_messages
+
+        for index, result in enumerate(parse_results):
+            if type(result) is not dict:
+                if raw_messages is not None:
+                    result.raw = raw_messages[index]
+                self.logger.warning(f"Rejected message '{result.message}': {result.error}")
+                self.rejected_messages.append(result)
+                self.rejection_counts[result.reason] += 1
+        return processed_messages
+
+    def __drop_duplicates(self, processed_messages: list[dict[str, str]]) -> list[dict[str, str]]:
+        """
+        Private helper method for dropping duplicate login events, so they are neither counted nor produced.
+
+        Args:
+            processed_messages (list[dict[str, str]]): The valid processed messages.
+
+        Returns:
+            list[dict[str, str]]: The processed messages that aren't duplicates.
+        """
+        if not self.deduplicator:
+            return processed_messages
+        return self.deduplicator.drop_duplicates(processed_messages)
+
+    def __flush_evicted_entry(self, manager: str, entry: dict):
+        """
+        Private helper method for flushing an evicted data manager entry to the eviction sink with its encoded fields decoded.
+        Entries evicted outside the processor's context, with no sink open, are dropped.
+
+        Args:
+            manager (str): The name of the data manager the entry was evicted from.
+            entry (dict): The evicted entry.
+        """
+        if self.eviction_sink:
+            self.eviction_sink(manager, decode_fields(entry, self.field_encoders))
+
+    def __get_chunk_size(self, message_count: int) -> int:
+        """
+        Private helper method for sizing process pool chunks so each worker receives a few chunks per batch.
+
+        Args:
+            message_count (int): The number of messages in the batch.
+
+        Returns:
+            int: The number of messages per chunk.
+        """
+        return max(1, message_count // ((os.cpu_count() or 1) * 4))
+
+    async def __compile_batch_statistics_async(self, processed_messages: list[dict[str, str]]):
+        """
+        Private helper method for compiling statistics for a batch of processed messages.
+
+        Args:
+            processed_messages (list[dict[str, str]]): A list of processed messages as dictionaries.
+        """
+        # Hand the batch to the shard workers when sharding, they own the statistics
+        if self.sharded_aggregator:
+            self.sharded_aggregator.compile_statistics(processed_messages)
+            return
 
         # Create tasks to compile stats concurrently in background
         compile_stat_tasks = []
@@ -62,8 +266,6 @@ class Processor:
             compile_stat_tasks.append(asyncio.create_task(self.compile_statistics_async(processed_message)))
 
         await asyncio.gather(*compile_stat_tasks)
-
-        return processed_messages
     
     def process_message(self, message: str) -> dict[str, str]:
         """
@@ -75,25 +277,8 @@ class Processor:
         Returns:
             dict[str, str]: A dictionary of strings, representing the message content.
         """
-        processed_message = {}
         self.logger.debug(f"Processing message: {message}")
-
-        # Convert message into dictionary
-        processed_message = ast.literal_eval(message)
-
-        # Check for missing device type
-        if message_keys.DEVICE_TYPE not in processed_message:
-            processed_message[message_keys.DEVICE_TYPE] = "unknown device"
-
-        # Check for missing locale
-        if message_keys.LOCALE not in processed_message:
-            processed_message[message_keys.LOCALE] = "unknown locale"
-
-        # Check for missing app version
-        if message_keys.APP_VERSION not in processed_message:
-            processed_message[message_keys.APP_VERSION] = "unknown app version"
-
-        return processed_message
+        return parse_message(message)
     
     async def compile_statistics_async(self, processed_message: dict[str, str]):
         """
@@ -105,18 +290,20 @@ class Processor:
         user_id = processed_message[message_keys.USER_ID]
         timestamp = int(processed_message[message_keys.TIMESTAMP])
         device_id = processed_message[message_keys.DEVICE_ID]
-        device_type = processed_message[message_keys.DEVICE_TYPE]
-        app_version = processed_message[message_keys.APP_VERSION]
         ip_address = processed_message[message_keys.IP_ADDRESS]
-        locale = processed_message[message_keys.LOCALE]
+
+        # Hand low cardinality fields to the data managers as shared integer codes rather than per message strings
+        device_type = self.field_encoders[message_keys.DEVICE_TYPE].encode(processed_message[message_keys.DEVICE_TYPE])
+        app_version = self.field_encoders[message_keys.APP_VERSION].encode(processed_message[message_keys.APP_VERSION])
+        locale = self.field_encoders[message_keys.LOCALE].encode(processed_message[message_keys.LOCALE])
 
         # Wait for resource to unlock, then compile user statistics
         async with self.user_manager_async_lock:
-            await self.user_data_manager.compile_user_data_async(user_id, timestamp, device_id)
+            await self.user_data_manager.compile_user_data_async(user_id, timestamp, device_id, ip_address)
 
         # Wait for resource to unlock, then compile device statistics
         async with self.device_manager_async_lock:
-            await self.device_data_manager.compile_device_data_async(device_id, device_type, app_version, ip_address, locale)
+            await self.device_data_manager.compile_device_data_async(device_id, device_type, app_version, ip_address, locale, timestamp)
 
         # Wait for resource to unlock, then compile ip statistics
         async with self.ip_manager_async_lock:
@@ -126,37 +313,96 @@ class Processor:
         async with self.activity_manager_async_lock:
             await self.activity_data_manager.compile_activity_data_async(device_type, app_version, locale)
 
-    def report_findings(self):
+    def collect_findings(self, top_n: int = 10, timeout: float | None = None) -> dict:
+        """
+        Method for building a findings snapshot, gathered from the shard workers when sharding is enabled.
+
+        Args:
+            top_n (int, optional): The number of most active users and ip's to include. Default is 10.
+            timeout (float, optional): The most time in seconds to wait for the shard workers' findings, leaving out any that don't answer. Default is None, waiting for them.
+
+        Returns:
+            dict: The findings snapshot.
+        """
+        if self.sharded_aggregator:
+            return self.sharded_aggregator.query_findings(top_n, timeout)
+        return collect_findings(self.user_data_manager, self.device_data_manager, self.ip_data_manager, self.activity_data_manager, top_n, self.field_encoders)
+
+    def report_findings(self, findings: dict | None = None):
         """
         Method for outputting statistical insights via the class's internal logger.
+
+        Args:
+            findings (dict, optional): A findings snapshot already collected from the processor. Default is None, collecting a new snapshot.
         """ 
- 
-        # Report total unique users in the system
-        self.logger.info(f"There are {len(self.user_data_manager.users_and_devices)} unique users in the system...")
-
-        # Report total unique devices in the system
-        self.logger.info(f"There are {len(self.device_data_manager.devices)} unique devices in the system...")
-
-        # Report 10 most active users
-        active_user_msg = f"Most active users in the system:"
-        most_active_users = dict(sorted(self.user_data_manager.user_logins.items(), key=lambda item: item[1][0], reverse=True)[:10])
-        for user, login_data in most_active_users.items():
-            active_user_msg = "\n".join([active_user_msg, f"\tUser: {user}"])
-            active_user_msg = "\n".join([active_user_msg, f"\t\tTotal Logins: {login_data[0]}"])
-            active_user_msg = "\n".join([active_user_msg, f"\t\tLast Login: {datetime.fromtimestamp(login_data[1])}"])
-        self.logger.info(active_user_msg)
-
-        # Report 10 most active ip's
-        active_ip_msg = f"Most active ip's in the system:"
-        most_active_ips = dict(sorted(self.ip_data_manager.ip_logins.items(), key=lambda item: item[1][0], reverse=True)[:10])
-        for locale, login_data in most_active_ips.items():
-            active_ip_msg = "\n".join([active_ip_msg, f"\tIP Address: {locale}"])
-            active_ip_msg = "\n".join([active_ip_msg, f"\t\tTotal Logins: {login_data[0]}"])
-            active_ip_msg = "\n".join([active_ip_msg, f"\t\tLast Login: {datetime.fromtimestamp(login_data[1])}"])
-        self.logger.info(active_ip_msg)
-
-        # Report version activity
-        self.logger.info(f"App version activity: {self.activity_data_manager.version_activity}")
-
-        # Report locale activity
-        self.logger.info(f"Locale activity: {self.activity_data_manager.locale_activity}")
\ No newline at end of file
+        log_findings(self.logger, findings or self.collect_findings())
+
+        # Report rejected messages by reason
+        self.logger.info(f"Rejected {sum(self.rejection_counts.values())} messages: {dict(self.rejection_counts)}")
+        if self.deduplicator:
+            self.deduplicator.report()
+        if self.user_data_manager.feature_tracker:
+            self.logger.info(f"Raised {self.alert_count} alerts for flagged users...")
+
+def parse_message(message: str) -> dict[str, str]:
+    """
+    Converts a single raw message into a dictionary and fills in any missing fields. Kept at module level so
+    worker processes receive only the message, not the processor and its data managers.
+
+    Args:
+        message (str): The message to be parsed.
+
+    Returns:
+        dict[str, str]: A dictionary of strings, representing the message content.
+    """
+    # Convert message into dictionary
+    processed_message = ast.literal_eval(message)
+    return _fill_missing_fields(processed_message)
+
+def parse_and_validate_message(message: str) -> dict[str, str] | RejectedMessage:
+    """
+    Converts a single raw message into a dictionary like parse_message, but rejects malformed messages instead of raising,
+    so one bad record can't fail the batch it arrived in.
+
+    Args:
+        message (str): The message to be parsed.
+
+    Returns:
+        dict[str, str]: A dictionary of strings, representing the message content, if the message is valid.
+        RejectedMessage: The rejected message and reason, if the message is malformed.
+    """
+    # Convert message into dictionary, rejecting anything that isn't a literal
+    try:
+        processed_message = ast.literal_eval(message)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError) as e:
+        return RejectedMessage(message, PARSE_ERROR, f"{type(e).__name__}: {e}")
+
+    # Check required keys and timestamp before any statistics are compiled
+    rejection = validate_message(processed_message)
+    if rejection:
+        return RejectedMessage(message, *rejection)
+    return _fill_missing_fields(processed_message)
+
+def _fill_missing_fields(processed_message: dict[str, str]) -> dict[str, str]:
+    """
+    Fills in default values for the optional fields missing from a parsed message.
+
+    Args:
+        processed_message (dict[str, str]): The parsed message.
+
+    Returns:
+        dict[str, str]: The parsed message, with every optional field present.
+    """
+    # Check for missing device type
+    if message_keys.DEVICE_TYPE not in processed_message:
+        processed_message[message_keys.DEVICE_TYPE] = "unknown device"
+
+    # Check for missing locale
+    if message_keys.LOCALE not in processed_message:
+        processed_message[message_keys.LOCALE] = "unknown locale"
+
+    # Check for missing app version
+    if message_keys.APP_VERSION not in processed_message:
+        processed_message[message_keys.APP_VERSION] = "unknown app version"
+
+    return processed_message
\ No newline at end of file
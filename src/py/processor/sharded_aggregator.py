@@ -0,0 +1,259 @@
+import multiprocessing
+import queue
+import signal
+import time
+from src.py.constants import message_keys
+from .data.activity_data_manager import ActivityDataManager
+from .data.device_data_manager import DeviceDataManager
+from .data.eviction_policy import EvictionFileSink, EvictionPolicy
+from .data.field_encoder import ENCODED_FIELDS, FieldEncoder, build_field_encoders, decode_fields
+from .data.ip_data_manager import IpDataManager
+from .data.user_data_manager import UserDataManager
+from .data.user_features import UserFeatureTracker
+from .findings import collect_findings, merge_findings
+from logging import Logger
+from multiprocessing.connection import Connection
+from multiprocessing.queues import Queue
+
+# Commands understood by shard worker processes
+COMPILE_COMMAND = "compile"
+QUERY_COMMAND = "query"
+STOP_COMMAND = "stop"
+
+class ShardedAggregator:
+    """
+    Aggregator class for compiling statistics across several worker processes, each owning a shard of the data managers.
+
+    Records are routed by the hash of their key, user data and activity by user id, device data by device id and ip
+    data by ip address, so every key is owned by exactly one shard. Batches are sent to the workers over pipes and
+    findings are scatter-gathered from every shard and merged on query. Low cardinality fields are sent as integer codes,
+    with each batch carrying the values first encoded since the last, so every shard mirrors the parent's encoders.
+    When user features are tracked, shards put the alerts each batch raises on a queue the parent drains without
+    blocking, so alerts never hold up the batches sent to the shards.
+
+    Args:
+        logger (Logger): The logger instance used to convey information for this class.
+        shard_count (int): The number of shard worker processes to run.
+        eviction_policies (dict[str, EvictionPolicy], optional): Eviction policies by data manager name, with limits split evenly across shards. Default is None, keeping every entry.
+        eviction_sink_path (str, optional): The path evicted entries are flushed to, suffixed with each shard's number. Default is None, dropping evicted entries.
+        feature_tracker (UserFeatureTracker, optional): The tracker each shard copies to update its users' rolling login features. Default is None, not tracking features.
+
+    Attributes:
+        shard_count (int): The number of shard worker processes.
+        connections (list[Connection]): The parent ends of the pipes to each shard worker.
+        workers (list[Process]): The shard worker processes.
+        field_encoders (dict[str, FieldEncoder]): The encoders mapping low cardinality fields to the codes sent to the shards.
+        alert_queue (Queue | None): The queue shards put the alerts raised for flagged users on, when features are tracked.
+        pending_alerts (list[dict]): Alerts taken off the queue while stopping the shards, waiting to be drained.
+    """
+    def __init__(self, logger: Logger, shard_count: int, eviction_policies: dict[str, EvictionPolicy] | None = None, eviction_sink_path: str | None = None,
+                 feature_tracker: UserFeatureTracker | None = None):
+        if shard_count < 1:
+            raise ValueError(f"Shard count must be at least 1, got {shard_count}")
+        self.logger = logger.getChild("sharded_aggregator")
+        self.shard_count = shard_count
+        self.eviction_policies = eviction_policies or {}
+        self.eviction_sink_path = eviction_sink_path
+        self.connections: list[Connection] = []
+        self.workers: list[multiprocessing.Process] = []
+        self.field_encoders: dict[str, FieldEncoder] = build_field_encoders()
+        self.sent_value_counts = {field: 0 for field in ENCODED_FIELDS}
+        self.feature_tracker = feature_tracker
+        self.alert_queue: Queue | None = None
+        self.pending_alerts: list[dict] = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start(self):
+        """
+        Starts the shard worker processes.
+        """
+        self.logger.info(f"Starting {self.shard_count} shard workers...")
+        self.alert_queue = multiprocessing.Queue() if self.feature_tracker else None
+        for shard in range(self.shard_count):
+            parent_connection, worker_connection = multiprocessing.Pipe()
+            eviction_policies = {manager: policy.clone(self.shard_count) for manager, policy in self.eviction_policies.items()}
+            eviction_sink_path = f"{self.eviction_sink_path}.shard-{shard}" if self.eviction_sink_path else None
+            worker = multiprocessing.Process(target=_run_shard_worker, args=(worker_connection, self.logger, eviction_policies, eviction_sink_path,
+                                                                                   self.feature_tracker, self.alert_queue),
+                                             name=f"shard-worker-{shard}", daemon=True)
+            worker.start()
+            worker_connection.close()
+            self.connections.append(parent_connection)
+            self.workers.append(worker)
+
+    def close(self, timeout: float | None = None):
+        """
+        Stops the shard worker processes and closes their pipes, keeping the alerts they raised until they're drained.
+        Closing stopped shards does nothing.
+
+        Args:
+            timeout (float, optional): The most time in seconds to wait for the shards to stop, after which any still running are terminated. Default is None, waiting for them.
+        """
+        if not self.workers:
+            return
+        deadline_at = time.perf_counter() + timeout if timeout is not None else None
+        self.logger.info("Stopping shard workers...")
+        for connection in self.connections:
+            try:
+                connection.send((STOP_COMMAND, None))
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self.workers:
+            # A shard can't exit until its queued alerts are taken, so keep taking them while waiting
+            while self.alert_queue and worker.is_alive() and _remaining_time(deadline_at) != 0.0:
+                self.pending_alerts = self.drain_alerts()
+                worker.join(0.1)
+            worker.join(_remaining_time(deadline_at))
+            if worker.is_alive():
+                self.logger.warning(f"Terminating {worker.name}, which didn't stop within {timeout:.2f} seconds...")
+                worker.terminate()
+                worker.join()
+        for connection in self.connections:
+            connection.close()
+        self.connections = []
+        self.workers = []
+
+    def compile_statistics(self, processed_messages: list[dict[str, str]]):
+        """
+        Routes a batch of processed messages to their owning shards for statistic compilation.
+
+        Args:
+            processed_messages (list[dict[str, str]]): A list of processed messages as dictionaries.
+        """
+        shard_count = self.shard_count
+        encode_device_type = self.field_encoders[message_keys.DEVICE_TYPE].encode
+        encode_app_version = self.field_encoders[message_keys.APP_VERSION].encode
+        encode_locale = self.field_encoders[message_keys.LOCALE].encode
+        batches = [([], [], [], []) for _ in range(shard_count)]
+        for processed_message in processed_messages:
+            user_id = processed_message[message_keys.USER_ID]
+            timestamp = int(processed_message[message_keys.TIMESTAMP])
+            device_id = processed_message[message_keys.DEVICE_ID]
+            device_type = encode_device_type(processed_message[message_keys.DEVICE_TYPE])
+            app_version = encode_app_version(processed_message[message_keys.APP_VERSION])
+            ip_address = processed_message[message_keys.IP_ADDRESS]
+            locale = encode_locale(processed_message[message_keys.LOCALE])
+
+            # Route each record by the key its data manager is indexed on
+            user_batch = batches[hash(user_id) % shard_count]
+            user_batch[0].append((user_id, timestamp, device_id, ip_address))
+            user_batch[3].append((device_type, app_version, locale))
+            batches[hash(device_id) % shard_count][1].append((device_id, device_type, app_version, ip_address, locale, timestamp))
+            batches[hash(ip_address) % shard_count][2].append((ip_address, timestamp))
+
+        # Every shard receives every batch, so the newly encoded values reach all of them in order
+        new_values = {}
+        for field, encoder in self.field_encoders.items():
+            new_values[field] = encoder.values[self.sent_value_counts[field]:]
+            self.sent_value_counts[field] = len(encoder.values)
+
+        for connection, batch in zip(self.connections, batches):
+            connection.send((COMPILE_COMMAND, (new_values, *batch)))
+
+    def drain_alerts(self) -> list[dict]:
+        """
+        Takes the alerts the shards have raised for flagged users since the last drain, without waiting on the shards.
+
+        Returns:
+            list[dict]: The alerts, empty if features aren't tracked.
+        """
+        alerts, self.pending_alerts = self.pending_alerts, []
+        while self.alert_queue:
+            try:
+                alerts.extend(self.alert_queue.get_nowait())
+            except queue.Empty:
+                break
+        return alerts
+
+    def query_findings(self, top_n: int = 10, timeout: float | None = None) -> dict:
+        """
+        Scatter-gathers findings from every shard and merges them. Shards that don't answer in time are left out, so the
+        findings are partial, and the shards should be closed rather than queried again.
+
+        Args:
+            top_n (int, optional): The number of most active users and ip's to report. Default is 10.
+            timeout (float, optional): The most time in seconds to wait for the shards' findings. Default is None, waiting for every shard.
+
+        Returns:
+            dict: The merged findings snapshot.
+        """
+        # Scatter the query first so shards build their findings in parallel
+        deadline_at = time.perf_counter() + timeout if timeout is not None else None
+        for connection in self.connections:
+            connection.send((QUERY_COMMAND, top_n))
+        findings_list = []
+        for shard, connection in enumerate(self.connections):
+            if deadline_at is None or connection.poll(_remaining_time(deadline_at)):
+                findings_list.append(connection.recv())
+            else:
+                self.logger.warning(f"Leaving shard {shard} out of the findings, as it didn't answer within {timeout:.2f} seconds...")
+        return merge_findings(findings_list, top_n)
+
+def _remaining_time(deadline_at: float | None) -> float | None:
+    """
+    Private helper function for getting the time left until a deadline.
+
+    Args:
+        deadline_at (float | None): The perf_counter value of the deadline, if any.
+
+    Returns:
+        float | None: The seconds remaining, 0 once the deadline has passed, or None without a deadline.
+    """
+    if deadline_at is None:
+        return None
+    return max(0.0, deadline_at - time.perf_counter())
+
+def _run_shard_worker(connection: Connection, logger: Logger, eviction_policies: dict[str, EvictionPolicy], eviction_sink_path: str | None,
+                      feature_tracker: UserFeatureTracker | None = None, alert_queue: Queue | None = None):
+    """
+    Main loop of a shard worker process, applying compile batches and answering queries until stopped.
+
+    Args:
+        connection (Connection): The worker end of the pipe to the parent process.
+        logger (Logger): The logger instance passed to the shard's data managers.
+        eviction_policies (dict[str, EvictionPolicy]): The shard's eviction policies by data manager name.
+        eviction_sink_path (str | None): The path the shard flushes evicted entries to, if any.
+        feature_tracker (UserFeatureTracker | None): The shard's copy of the user feature tracker, if features are tracked.
+        alert_queue (Queue | None): The queue the shard puts the alerts raised by each batch on, if features are tracked.
+    """
+    # Shutdown is driven by the parent process, so ignore interrupts sent to the whole process group
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    field_encoders = build_field_encoders()
+    eviction_sink = EvictionFileSink(eviction_sink_path) if eviction_sink_path else None
+    manager_eviction_sink = (lambda manager, entry: eviction_sink(manager, decode_fields(entry, field_encoders))) if eviction_sink else None
+    activity_data_manager = ActivityDataManager(logger)
+    device_data_manager = DeviceDataManager(logger, eviction_policies.get("device"), manager_eviction_sink)
+    ip_data_manager = IpDataManager(logger, eviction_policies.get("ip"), manager_eviction_sink)
+    user_data_manager = UserDataManager(logger, eviction_policies.get("user"), manager_eviction_sink, feature_tracker)
+
+    while True:
+        command, payload = connection.recv()
+        if command == COMPILE_COMMAND:
+            new_values, user_records, device_records, ip_records, activity_records = payload
+            for field, values in new_values.items():
+                field_encoders[field].extend(values)
+            for user_record in user_records:
+                user_data_manager.compile_user_data(*user_record)
+            for device_record in device_records:
+                device_data_manager.compile_device_data(*device_record)
+            for ip_record in ip_records:
+                ip_data_manager.compile_ip_data(*ip_record)
+            for activity_record in activity_records:
+                activity_data_manager.compile_activity_data(*activity_record)
+            alerts = user_data_manager.drain_alerts()
+            if alerts:
+                alert_queue.put(alerts)
+        elif command == QUERY_COMMAND:
+            connection.send(collect_findings(user_data_manager, device_data_manager, ip_data_manager, activity_data_manager, payload, field_encoders))
+        elif command == STOP_COMMAND:
+            break
+    if eviction_sink:
+        eviction_sink.close()
+    connection.close()
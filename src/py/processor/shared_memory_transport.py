@@ -0,0 +1,389 @@
+import multiprocessing
+import queue
+import signal
+import struct
+from collections.abc import Callable
+from src.py.constants import message_keys
+from logging import Logger
+from multiprocessing.shared_memory import SharedMemory
+
+# Fixed order of the fields carried in a parsed record
+RECORD_FIELDS = (message_keys.USER_ID, message_keys.APP_VERSION, message_keys.DEVICE_TYPE, message_keys.IP_ADDRESS,
+                 message_keys.LOCALE, message_keys.DEVICE_ID, message_keys.TIMESTAMP)
+RECORD_FIELD_INDEXES = {field: index for index, field in enumerate(RECORD_FIELDS)}
+
+# Parsed record layout: status, the message's field order as indexes into RECORD_FIELDS, then each field's byte length
+RECORD_HEADER = struct.Struct(f"<B{len(RECORD_FIELDS)}B{len(RECORD_FIELDS)}H")
+RECORD_PARSED = 0
+RECORD_FALLBACK = 1
+UNUSED_FIELD = 0xFF
+
+# Length prefix written before each raw payload in its slot
+PAYLOAD_HEADER = struct.Struct("<I")
+
+# Seconds between checks that the parser workers are still alive while waiting on their results
+WORKER_CHECK_INTERVAL = 1.0
+
+class SharedRingBuffer:
+    """
+    Ring buffer of fixed size slots in shared memory. The owning process tracks the head and tail of the ring,
+    while any process holding the buffer may read and write slots by index.
+
+    Args:
+        slot_count (int): The number of slots in the ring.
+        slot_size (int): The size of each slot in bytes.
+
+    Attributes:
+        slot_count (int): The number of slots in the ring.
+        slot_size (int): The size of each slot in bytes.
+        memory (SharedMemory): The shared memory block backing the slots.
+        head (int): The index of the next slot to be written.
+        used_slots (int): The number of slots written and not yet released.
+    """
+    def __init__(self, slot_count: int, slot_size: int):
+        if slot_count < 1 or slot_size <= PAYLOAD_HEADER.size:
+            raise ValueError(f"Invalid ring buffer dimensions {slot_count}x{slot_size}")
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+        self.memory = SharedMemory(create=True, size=slot_count * slot_size)
+        self.head = 0
+        self.used_slots = 0
+
+    def is_full(self) -> bool:
+        """
+        Checks whether every slot in the ring is in use.
+
+        Returns:
+            bool: True if no slot is free.
+        """
+        return self.used_slots == self.slot_count
+
+    def push(self, payload: bytes) -> int:
+        """
+        Writes a payload into the slot at the head of the ring.
+
+        Args:
+            payload (bytes): The payload to write. Payloads too large for a slot are written empty.
+
+        Returns:
+            int: The index of the slot written.
+        """
+        if self.is_full():
+            raise BufferError("Shared ring buffer is full")
+        slot = self.head
+        self.write_slot(slot, payload)
+        self.head = (self.head + 1) % self.slot_count
+        self.used_slots = self.used_slots + 1
+        return slot
+
+    def release(self, slot_count: int):
+        """
+        Frees the oldest slots in the ring for writing.
+
+        Args:
+            slot_count (int): The number of slots to free.
+        """
+        self.used_slots = self.used_slots - slot_count
+
+    def write_slot(self, slot: int, payload: bytes) -> bool:
+        """
+        Writes a length prefixed payload into a slot.
+
+        Args:
+            slot (int): The index of the slot.
+            payload (bytes): The payload to write.
+
+        Returns:
+            bool: True if the payload fit in the slot, otherwise an empty payload is written.
+        """
+        offset = slot * self.slot_size
+        if len(payload) > self.slot_size - PAYLOAD_HEADER.size:
+            PAYLOAD_HEADER.pack_into(self.memory.buf, offset, 0)
+            return False
+        PAYLOAD_HEADER.pack_into(self.memory.buf, offset, len(payload))
+        self.memory.buf[offset + PAYLOAD_HEADER.size:offset + PAYLOAD_HEADER.size + len(payload)] = payload
+        return True
+
+    def read_slot(self, slot: int) -> bytes:
+        """
+        Reads the payload from a slot.
+
+        Args:
+            slot (int): The index of the slot.
+
+        Returns:
+            bytes: The payload, empty if nothing fit in the slot.
+        """
+        offset = slot * self.slot_size
+        (length,) = PAYLOAD_HEADER.unpack_from(self.memory.buf, offset)
+        return bytes(self.memory.buf[offset + PAYLOAD_HEADER.size:offset + PAYLOAD_HEADER.size + length])
+
+    def close(self, unlink: bool = False):
+        """
+        Closes this process's view of the ring, optionally destroying the shared memory block.
+
+        Args:
+            unlink (bool, optional): Whether to destroy the shared memory block. Only the owning process should unlink. Default is False.
+        """
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+
+class SharedMemoryParser:
+    """
+    Parser class for parsing raw messages in worker processes over shared memory rather than pickled arguments and results.
+
+    Raw payload bytes are written into an input ring buffer and workers are handed only slot ranges. Each worker parses its
+    slots and writes compact fixed layout records into the matching slots of an output ring buffer, which are decoded back
+    into dictionaries in order. Writers block on completed work when the input ring is full. Should a worker die, the
+    parser stops using its workers and parses every message in process from then on, rather than waiting on a task that
+    will never complete.
+
+    Args:
+        logger (Logger): The logger instance used to convey information for this class.
+        slot_count (int): The number of slots in each ring buffer.
+        worker_count (int): The number of parser worker processes.
+        parse_function (Callable[[str], dict[str, str] | object]): The module level function parsing a raw message, run in the workers. Results
+            that are not dictionaries, and messages the workers could not encode, are parsed again in process and returned as is.
+        slot_size (int, optional): The size of each slot in bytes. Default is 1024.
+        task_size (int, optional): The maximum number of slots handed to a worker at once. Default is 256.
+
+    Attributes:
+        input_ring (SharedRingBuffer): The ring buffer raw payloads are written to.
+        output_ring (SharedRingBuffer): The ring buffer parsed records are written to.
+        workers (list[Process]): The parser worker processes.
+        failed (bool): Whether a worker died, so messages are parsed in process.
+    """
+    def __init__(self, logger: Logger, slot_count: int, worker_count: int, parse_function: Callable[[str], dict[str, str] | object],
+                 slot_size: int = 1024, task_size: int = 256):
+        self.logger = logger.getChild("shared_memory_parser")
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+        self.worker_count = worker_count
+        self.parse_function = parse_function
+        self.task_size = task_size
+        self.input_ring: SharedRingBuffer | None = None
+        self.output_ring: SharedRingBuffer | None = None
+        self.task_queue = None
+        self.result_queue = None
+        self.workers: list[multiprocessing.Process] = []
+        self.failed = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start(self):
+        """
+        Creates the ring buffers and starts the parser worker processes.
+        """
+        self.logger.info(f"Starting {self.worker_count} shared memory parser workers with {self.slot_count} slots...")
+        self.input_ring = SharedRingBuffer(self.slot_count, self.slot_size)
+        self.output_ring = SharedRingBuffer(self.slot_count, self.slot_size)
+        self.task_queue = multiprocessing.SimpleQueue()
+        self.result_queue = multiprocessing.Queue()
+        for worker_index in range(self.worker_count):
+            worker = multiprocessing.Process(target=_run_parser_worker, args=(self.input_ring, self.output_ring, self.task_queue, self.result_queue, self.parse_function),
+                                             name=f"parser-worker-{worker_index}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+
+    def close(self):
+        """
+        Stops the parser worker processes and destroys the ring buffers.
+        """
+        self.logger.info("Stopping shared memory parser workers...")
+        for _ in self.workers:
+            self.task_queue.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+        if self.input_ring:
+            self.input_ring.close(unlink=True)
+            self.output_ring.close(unlink=True)
+            self.input_ring = None
+            self.output_ring = None
+
+    def parse_messages(self, messages: list[bytes]) -> list[dict[str, str] | object]:
+        """
+        Parses a batch of raw messages through the parser workers, or in process once a worker has died.
+
+        Args:
+            messages (list[bytes]): The raw message payloads.
+
+        Returns:
+            list[dict[str, str] | object]: A list of parse results, in the order received.
+        """
+        if self.failed:
+            return [self.parse_function(message.decode("utf-8", errors="replace")) for message in messages]
+
+        parsed_messages: list[dict[str, str] | None] = [None] * len(messages)
+        pending_tasks: dict[int, tuple[int, int, int]] = {}
+        completed_tasks: set[int] = set()
+        task_order: list[int] = []
+        next_task = 0
+        message_index = 0
+
+        while message_index < len(messages) or task_order:
+            # Fill free slots and dispatch them as tasks, never letting a task wrap around the end of the ring
+            while message_index < len(messages) and not self.input_ring.is_full():
+                start_slot = self.input_ring.head
+                start_index = message_index
+                while (message_index < len(messages) and not self.input_ring.is_full() and message_index - start_index < self.task_size
+                       and (start_slot + message_index - start_index) < self.slot_count):
+                    self.input_ring.push(messages[message_index])
+                    message_index = message_index + 1
+                pending_tasks[next_task] = (start_slot, message_index - start_index, start_index)
+                task_order.append(next_task)
+                self.task_queue.put((next_task, start_slot, message_index - start_index))
+                next_task = next_task + 1
+
+            # Ring full or batch dispatched, block until a worker finishes a task, giving up on the workers if one dies
+            completed_task = self.__get_completed_task()
+            if completed_task is None:
+                # Tasks are decoded in dispatch order, so every message before the oldest pending task is already parsed
+                first_unparsed = pending_tasks[task_order[0]][2]
+                parsed_messages[first_unparsed:] = [self.parse_function(message.decode("utf-8", errors="replace")) for message in messages[first_unparsed:]]
+                return parsed_messages
+            completed_tasks.add(completed_task)
+
+            # Decode finished tasks in ring order so slots are released oldest first
+            while task_order and task_order[0] in completed_tasks:
+                task = task_order.pop(0)
+                completed_tasks.remove(task)
+                start_slot, count, start_index = pending_tasks.pop(task)
+                for offset in range(count):
+                    parsed_messages[start_index + offset] = self.__decode_record(start_slot + offset, messages[start_index + offset])
+                self.input_ring.release(count)
+
+        return parsed_messages
+
+    def __get_completed_task(self) -> int | None:
+        """
+        Private helper method for waiting on the next finished task, checking the workers are still alive while waiting. If
+        any worker has died, the task it held never completes, so the remaining workers are stopped and the parser fails over
+        to parsing in process.
+
+        Returns:
+            int | None: The identifier of the finished task, or None if a worker died.
+        """
+        while True:
+            try:
+                return self.result_queue.get(timeout=WORKER_CHECK_INTERVAL)
+            except queue.Empty:
+                dead_workers = [worker.name for worker in self.workers if not worker.is_alive()]
+                if dead_workers:
+                    break
+
+        self.logger.error(f"Parser workers {dead_workers} died, parsing messages in process from now on...")
+        self.failed = True
+        for worker in self.workers:
+            worker.terminate()
+            worker.join()
+        self.workers = []
+        self.input_ring.release(self.input_ring.used_slots)
+        return None
+
+    def __decode_record(self, slot: int, message: bytes) -> dict[str, str] | object:
+        """
+        Private helper method for decoding a fixed layout record from the output ring.
+
+        Args:
+            slot (int): The index of the slot holding the record.
+            message (bytes): The raw message payload, parsed in process if the record is a fallback.
+
+        Returns:
+            dict[str, str] | object: The parsed message as a dictionary, or the parse function's result for fallback records.
+        """
+        buffer = self.output_ring.memory.buf
+        offset = slot * self.slot_size
+        header = RECORD_HEADER.unpack_from(buffer, offset)
+        if header[0] != RECORD_PARSED:
+            return self.parse_function(message.decode("utf-8", errors="replace"))
+
+        field_count = len(RECORD_FIELDS)
+        lengths = header[1 + field_count:]
+        position = offset + RECORD_HEADER.size
+        values = []
+        for length in lengths:
+            values.append(str(buffer[position:position + length], "utf-8"))
+            position = position + length
+
+        # Rebuild the dictionary in the message's original key order
+        parsed_message = {}
+        for field_index in header[1:1 + field_count]:
+            if field_index == UNUSED_FIELD:
+                break
+            parsed_message[RECORD_FIELDS[field_index]] = values[field_index]
+        return parsed_message
+
+def encode_record(parsed_message: dict, buffer, offset: int, size: int) -> bool:
+    """
+    Encodes a parsed message as a fixed layout record. Messages with extra keys, non string values or fields too large for
+    the slot are not encoded, so the parent can parse them itself and keep results identical to in process parsing.
+
+    Args:
+        parsed_message (dict): The parsed message.
+        buffer: The buffer to write the record into.
+        offset (int): The offset of the record's slot in the buffer.
+        size (int): The size of the record's slot in bytes.
+
+    Returns:
+        bool: True if the message was encoded.
+    """
+    if len(parsed_message) != len(RECORD_FIELDS):
+        return False
+    order = []
+    for key, value in parsed_message.items():
+        if key not in RECORD_FIELD_INDEXES or type(value) is not str:
+            return False
+        order.append(RECORD_FIELD_INDEXES[key])
+
+    encoded_values = [parsed_message[field].encode("utf-8") for field in RECORD_FIELDS]
+    lengths = [len(encoded_value) for encoded_value in encoded_values]
+    if RECORD_HEADER.size + sum(lengths) > size or max(lengths) > 0xFFFF:
+        return False
+
+    RECORD_HEADER.pack_into(buffer, offset, RECORD_PARSED, *order, *lengths)
+    position = offset + RECORD_HEADER.size
+    for encoded_value in encoded_values:
+        buffer[position:position + len(encoded_value)] = encoded_value
+        position = position + len(encoded_value)
+    return True
+
+def _run_parser_worker(input_ring: SharedRingBuffer, output_ring: SharedRingBuffer, task_queue, result_queue, parse_function: Callable[[str], dict[str, str] | object]):
+    """
+    Main loop of a parser worker process, parsing slot ranges from the input ring into the output ring until stopped.
+
+    Args:
+        input_ring (SharedRingBuffer): The ring buffer holding raw payloads.
+        output_ring (SharedRingBuffer): The ring buffer parsed records are written to.
+        task_queue (SimpleQueue): The queue of (task, start slot, slot count) work items, None to stop.
+        result_queue (Queue): The queue finished task identifiers are put on.
+        parse_function (Callable[[str], dict[str, str] | object]): The function parsing a raw message.
+    """
+    # Shutdown is driven by the parent process, so ignore interrupts sent to the whole process group
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    output_buffer = output_ring.memory.buf
+    fallback_header = RECORD_HEADER.pack(RECORD_FALLBACK, *([UNUSED_FIELD] * len(RECORD_FIELDS)), *([0] * len(RECORD_FIELDS)))
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        task_id, start_slot, count = task
+        for slot in range(start_slot, start_slot + count):
+            offset = slot * output_ring.slot_size
+            try:
+                payload = input_ring.read_slot(slot)
+                parsed_message = parse_function(payload.decode("utf-8")) if payload else None
+                encoded = type(parsed_message) is dict and encode_record(parsed_message, output_buffer, offset, output_ring.slot_size)
+            except Exception:
+                encoded = False
+            if not encoded:
+                output_buffer[offset:offset + RECORD_HEADER.size] = fallback_header
+        result_queue.put(task_id)
+    del output_buffer
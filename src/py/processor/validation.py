@@ -0,0 +1,83 @@
+from src.py.constants import message_keys
+
+"""
+Cheap pre-validation of parsed messages, run before statistics are compiled so a single malformed record
+is rejected on its own rather than failing the batch it arrived in.
+"""
+
+# Keys every message must carry for statistics to be compiled
+REQUIRED_KEYS = (message_keys.USER_ID, message_keys.DEVICE_ID, message_keys.IP_ADDRESS, message_keys.TIMESTAMP)
+
+# Keys that must hold strings when present, as they are hashed, encoded and used as data manager keys
+STRING_KEYS = (message_keys.USER_ID, message_keys.DEVICE_ID, message_keys.IP_ADDRESS, message_keys.DEVICE_TYPE, message_keys.APP_VERSION, message_keys.LOCALE)
+
+# Rejection reasons
+PARSE_ERROR = "parse_error"
+NOT_A_RECORD = "not_a_record"
+INVALID_TIMESTAMP = "invalid_timestamp"
+INVALID_FIELD_TYPE = "invalid_field_type"
+MISSING_KEY_REASONS = {key: f"missing_{key}" for key in REQUIRED_KEYS}
+
+class RejectedMessage:
+    """
+    Class describing a raw message rejected by the processor.
+
+    Args:
+        message (str): The raw message as received.
+        reason (str): The rejection reason, used for counters and dead letter headers.
+        error (str): A description of the specific error.
+        raw (bytes | None): The payload exactly as received, when the message arrived as bytes. Defaults to None.
+
+    Attributes:
+        message (str): The raw message as received, decoded when it arrived as bytes.
+        reason (str): The rejection reason.
+        error (str): A description of the specific error.
+        raw (bytes | None): The payload exactly as received, when the message arrived as bytes.
+    """
+    __slots__ = ("message", "reason", "error", "raw")
+
+    def __init__(self, message: str, reason: str, error: str, raw: bytes | None = None):
+        self.message = message
+        self.reason = reason
+        self.error = error
+        self.raw = raw
+
+    def payload(self) -> bytes:
+        """
+        Gets the message's payload, the original bytes when it arrived as bytes so undecodable payloads are kept as received.
+
+        Returns:
+            bytes: The payload.
+        """
+        return self.raw if self.raw is not None else self.message.encode("utf-8")
+
+    def __eq__(self, other):
+        return isinstance(other, RejectedMessage) and (self.message, self.reason, self.error, self.raw) == (other.message, other.reason, other.error, other.raw)
+
+    def __repr__(self):
+        return f"RejectedMessage({self.message!r}, {self.reason!r}, {self.error!r}, {self.raw!r})"
+
+def validate_message(parsed_message) -> tuple[str, str] | None:
+    """
+    Checks a parsed message carries every required key, string values for its string keys and an integer timestamp.
+
+    Args:
+        parsed_message: The parsed message.
+
+    Returns:
+        tuple[str, str]: The rejection reason and error description, if the message is invalid.
+        None: If the message is valid.
+    """
+    if type(parsed_message) is not dict:
+        return NOT_A_RECORD, f"Expected a record, got {type(parsed_message).__name__}"
+    for key in REQUIRED_KEYS:
+        if key not in parsed_message:
+            return MISSING_KEY_REASONS[key], f"Missing required key '{key}'"
+    for key in STRING_KEYS:
+        if key in parsed_message and type(parsed_message[key]) is not str:
+            return INVALID_FIELD_TYPE, f"Expected a string for key '{key}', got {type(parsed_message[key]).__name__}"
+
+    timestamp = parsed_message[message_keys.TIMESTAMP]
+    if type(timestamp) is int or (type(timestamp) is str and timestamp.isascii() and timestamp.isdigit()):
+        return None
+    return INVALID_TIMESTAMP, f"Invalid timestamp {timestamp!r}"
\ No newline at end of file
@@ -0,0 +1,70 @@
+import gzip
+import json
+from logging import Logger
+from unittest.mock import patch
+from src.py.files.file_sink import FileSink
+from src.py.processor.validation import PARSE_ERROR, RejectedMessage
+
+def test_file_sink_writes_json_lines(tmp_path):
+    # Arrange
+    path = tmp_path / "processed.json.gz"
+    messages = [{"user_id": "user-1", "timestamp": 1}, {"user_id": "user-2", "timestamp": 2}]
+    # Act
+    with FileSink(Logger("consumer"), str(path)) as _sut:
+        _sut.produce_messages(messages[:1], flush=False)
+        _sut.produce_messages(messages[1:])
+        _sut.produce_messages([])
+    # Assert
+    assert [json.loads(line) for line in gzip.decompress(path.read_bytes()).splitlines()] == messages
+    assert _sut.message_count == 2
+    assert _sut.poll() == 0
+
+def test_file_sink_reports_each_write_as_delivered(tmp_path):
+    # Arrange
+    deliveries = []
+    rejected_messages = [RejectedMessage("not a message", PARSE_ERROR, "SyntaxError: invalid syntax")]
+    with FileSink(Logger("consumer"), str(tmp_path / "processed.json"), str(tmp_path / "dead-letters.json")) as _sut:
+        # Act
+        _sut.produce_messages([{"user_id": "user-1"}, {"user_id": "user-2"}], on_delivery=deliveries.append)
+        dead_letter_count = _sut.produce_dead_letters(rejected_messages, "messages.json", deliveries.append)
+    # Assert
+    assert dead_letter_count == 1
+    assert deliveries == [True, True, True]
+
+def test_file_sink_writes_dead_letters(tmp_path):
+    # Arrange
+    path = tmp_path / "processed.json"
+    dead_letter_path = tmp_path / "dead-letters.json"
+    rejected_messages = [RejectedMessage("not a message", PARSE_ERROR, "SyntaxError: invalid syntax")]
+    with (patch("src.py.files.file_sink.time.time", return_value=1694479551.5),
+          FileSink(Logger("consumer"), str(path), str(dead_letter_path)) as _sut):
+        # Act
+        _sut.produce_dead_letters(rejected_messages, "messages.json")
+    # Assert
+    assert json.loads(dead_letter_path.read_text()) == {"message": "not a message", "reason": "parse_error", "error": "SyntaxError: invalid syntax",
+                                                        "source": "messages.json", "rejected_at": 1694479551500}
+    assert path.read_bytes() == b""
+    assert _sut.dead_letter_count == 1
+
+def test_file_sink_without_file_only_writes_dead_letters(tmp_path):
+    # Arrange
+    dead_letter_path = tmp_path / "dead-letters.json"
+    rejected_messages = [RejectedMessage("not a message", PARSE_ERROR, "SyntaxError: invalid syntax")]
+    with FileSink(Logger("consumer"), None, str(dead_letter_path)) as _sut:
+        # Act
+        _sut.produce_messages([{"user_id": "user-1"}])
+        dead_letter_count = _sut.produce_dead_letters(rejected_messages, "messages.json")
+    # Assert
+    assert dead_letter_count == 1
+    assert json.loads(dead_letter_path.read_text())["message"] == "not a message"
+    assert _sut.message_count == 0
+
+def test_file_sink_without_dead_letter_file_drops_rejected_messages(tmp_path):
+    # Arrange
+    rejected_messages = [RejectedMessage("not a message", PARSE_ERROR, "SyntaxError: invalid syntax")]
+    with FileSink(Logger("consumer"), str(tmp_path / "processed.json")) as _sut:
+        # Act
+        dead_letter_count = _sut.produce_dead_letters(rejected_messages, "messages.json")
+    # Assert
+    assert dead_letter_count == 0
+    assert _sut.dead_letter_count == 0
\ No newline at end of file
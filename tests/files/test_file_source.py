@@ -0,0 +1,41 @@
+import bz2
+import gzip
+import lzma
+import pytest
+from logging import Logger
+from src.py.files.file_source import FileSource
+
+MESSAGES = [f'{{"user_id": "user-{i}", "timestamp": {i}}}'.encode("utf-8") for i in range(25)]
+
+@pytest.mark.parametrize("file_name, write", [
+    ("messages.json", lambda path, data: path.write_bytes(data)),
+    ("messages.json.gz", lambda path, data: path.write_bytes(gzip.compress(data))),
+    ("messages.json.bz2", lambda path, data: path.write_bytes(bz2.compress(data))),
+    ("messages.json.xz", lambda path, data: path.write_bytes(lzma.compress(data)))
+])
+def test_file_source_reads_every_message_across_chunks(tmp_path, file_name, write):
+    # Arrange
+    path = tmp_path / file_name
+    write(path, b"\r\n".join(MESSAGES[:10]) + b"\n\n" + b"\n".join(MESSAGES[10:]))
+    batches = []
+    # Act
+    with FileSource(Logger("consumer"), str(path), read_size=64) as _sut:
+        while not _sut.is_finished():
+            batches.append(_sut.consume_raw_messages(10))
+        last_batch = _sut.consume_raw_messages(10)
+    # Assert
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert [message for batch in batches for message in batch] == MESSAGES
+    assert last_batch is None
+    assert _sut.message_count == 25
+
+def test_file_source_empty_file_is_finished(tmp_path):
+    # Arrange
+    path = tmp_path / "empty.json"
+    path.write_bytes(b"")
+    # Act
+    with FileSource(Logger("consumer"), str(path)) as _sut:
+        messages = _sut.consume_raw_messages(10)
+        # Assert
+        assert messages is None
+        assert _sut.is_finished()
\ No newline at end of file
@@ -0,0 +1,26 @@
+from unittest import TestCase
+from unittest.mock import patch
+from src.py.flow.deadline import Deadline
+
+class TestDeadline(TestCase):
+    def test_remaining_counts_down_from_the_first_start(self):
+        # Arrange
+        _sut = Deadline(5.0)
+        with patch("src.py.flow.deadline.time.perf_counter", side_effect=[10.0, 12.0, 13.0, 16.0]):
+            # Act
+            _sut.start()
+            _sut.start()
+            remaining = _sut.remaining()
+            passed = _sut.passed()
+            later_passed = _sut.passed()
+        # Assert
+        self.assertEqual(3.0, remaining)
+        self.assertFalse(passed)
+        self.assertTrue(later_passed)
+
+    def test_unstarted_deadline_has_full_time_remaining(self):
+        # Arrange
+        _sut = Deadline(5.0)
+        # Act / Assert
+        self.assertEqual(5.0, _sut.remaining())
+        self.assertFalse(_sut.passed())
\ No newline at end of file
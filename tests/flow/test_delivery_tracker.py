@@ -0,0 +1,91 @@
+from unittest import TestCase
+from logging import Logger
+from src.py.flow.delivery_tracker import DeliveryTracker
+
+class TestDeliveryTracker(TestCase):
+    def test_commits_batches_in_order_once_delivered(self):
+        # Arrange
+        _sut = DeliveryTracker(Logger("consumer"))
+        first_batch = _sut.start_batch({("topic", 0): 10}, 2)
+        second_batch = _sut.start_batch({("topic", 0): 12, ("topic", 1): 5}, 2)
+        _sut.hand_off(first_batch, 2)
+        _sut.deliver(second_batch, True)
+        _sut.deliver(second_batch, True)
+        _sut.hand_off(second_batch, 2)
+        # Act
+        held_back_offsets = _sut.pop_committable_offsets()
+        _sut.deliver(first_batch, True)
+        _sut.deliver(first_batch, True)
+        offsets = _sut.pop_committable_offsets()
+        # Assert
+        self.assertEqual({}, held_back_offsets)
+        self.assertEqual({("topic", 0): 12, ("topic", 1): 5}, offsets)
+        self.assertEqual((0, 0, 4, 4), (_sut.processing_count, _sut.delivering_count, _sut.delivered_count, _sut.committed_count))
+        self.assertEqual({}, _sut.pop_committable_offsets())
+
+    def test_failed_delivery_holds_back_later_commits(self):
+        # Arrange
+        _sut = DeliveryTracker(Logger("consumer"))
+        failed_batch = _sut.start_batch({("topic", 0): 10}, 1)
+        _sut.hand_off(failed_batch, 1)
+        _sut.deliver(failed_batch, False)
+        delivered_batch = _sut.start_batch({("topic", 0): 11}, 1)
+        _sut.hand_off(delivered_batch, 0)
+        with self.assertLogs(_sut.logger, level="INFO") as lcm:
+            # Act
+            offsets = _sut.pop_committable_offsets()
+            _sut.report()
+        # Assert
+        self.assertEqual({}, offsets)
+        self.assertTrue(_sut.has_failed())
+        self.assertEqual(1, _sut.failed_count)
+        self.assertEqual(["INFO:consumer.delivery_tracker:Delivered 0 messages with 1 failed, committed offsets of 0 consumed messages...",
+                          "WARNING:consumer.delivery_tracker:Left offsets of 2 consumed messages uncommitted, with 0 still processing and 0 undelivered, they will be consumed again on restart..."], lcm.output)
+
+    def test_batch_in_processing_is_counted_and_not_committed(self):
+        # Arrange
+        _sut = DeliveryTracker(Logger("consumer"))
+        # Act
+        _sut.start_batch({("topic", 0): 10}, 3)
+        offsets = _sut.pop_committable_offsets()
+        # Assert
+        self.assertEqual({}, offsets)
+        self.assertEqual(3, _sut.processing_count)
+
+    def test_is_full_once_max_batches_are_held_back(self):
+        # Arrange
+        _sut = DeliveryTracker(Logger("consumer"), max_held_batches=2)
+        first_batch = _sut.start_batch({("topic", 0): 10}, 1)
+        _sut.start_batch({("topic", 0): 11}, 1)
+        # Act
+        full = _sut.is_full()
+        _sut.hand_off(first_batch, 0)
+        _sut.pop_committable_offsets()
+        # Assert
+        self.assertTrue(full)
+        self.assertFalse(_sut.is_full())
+        self.assertFalse(_sut.has_failed())
+
+    def test_initialization_rejects_invalid_max_held_batches(self):
+        # Act / Assert
+        with self.assertRaises(ValueError):
+            DeliveryTracker(Logger("consumer"), max_held_batches=0)
+
+    def test_revoke_commits_delivered_offsets_and_drops_revoked_batches(self):
+        # Arrange
+        _sut = DeliveryTracker(Logger("consumer"))
+        pending_batch = _sut.start_batch({("topic", 0): 10}, 1)
+        _sut.hand_off(pending_batch, 1)
+        delivered_batch = _sut.start_batch({("topic", 0): 12, ("topic", 1): 5}, 2)
+        _sut.hand_off(delivered_batch, 0)
+        revoked_batch = _sut.start_batch({("topic", 1): 7}, 1)
+        _sut.hand_off(revoked_batch, 1)
+        # Act
+        offsets = _sut.revoke([("topic", 1)])
+        _sut.deliver(pending_batch, True)
+        committable_offsets = _sut.pop_committable_offsets()
+        # Assert
+        self.assertEqual({("topic", 1): 5}, offsets)
+        self.assertEqual({("topic", 0): 12}, committable_offsets)
+        self.assertEqual(0, len(_sut.batches))
+        self.assertEqual((3, 1), (_sut.committed_count, _sut.revoked_count))
\ No newline at end of file
@@ -0,0 +1,57 @@
+import pytest
+from unittest import TestCase
+from unittest.mock import patch
+from logging import Logger
+from src.py.flow.flow_controller import FlowController
+
+class TestFlowController(TestCase):
+    def test_throttles_at_high_watermark_and_resumes_below_low_watermark(self):
+        # Arrange
+        logger = Logger("consumer")
+        _sut = FlowController(logger, 100, 20)
+        with patch("src.py.flow.flow_controller.time.perf_counter", side_effect=[10.0, 12.5]):
+            # Act
+            throttles = [_sut.update(queue_length) for queue_length in (50, 100, 60, 20, 19, 60)]
+        # Assert
+        self.assertEqual([False, True, True, True, False, False], throttles)
+        self.assertEqual(1, _sut.throttle_count)
+        self.assertEqual(2.5, _sut.total_throttled_seconds())
+
+    def test_total_throttled_seconds_includes_throttle_in_progress(self):
+        # Arrange
+        logger = Logger("consumer")
+        _sut = FlowController(logger, 100, 20)
+        with patch("src.py.flow.flow_controller.time.perf_counter", side_effect=[10.0, 14.0]):
+            _sut.update(150)
+            # Act
+            throttled_seconds = _sut.total_throttled_seconds()
+        # Assert
+        self.assertEqual(4.0, throttled_seconds)
+
+    def test_disabled_controller_never_throttles(self):
+        # Arrange
+        logger = Logger("consumer")
+        _sut = FlowController(logger, 0, 0)
+        # Act
+        throttled = _sut.update(1000000)
+        # Assert
+        self.assertFalse(_sut.enabled)
+        self.assertFalse(throttled)
+
+    def test_report_includes_throttled_share(self):
+        # Arrange
+        logger = Logger("consumer")
+        _sut = FlowController(logger, 100, 20)
+        _sut.throttle_count = 2
+        _sut.throttled_seconds = 5.0
+        with self.assertLogs(_sut.logger, level="INFO") as lcm:
+            # Act
+            _sut.report(20.0)
+        # Assert
+        self.assertEqual(["INFO:consumer.flow_controller:Throttled fetching 2 times for 5.00 seconds (25.0% of 20.00 seconds)..."], lcm.output)
+
+@pytest.mark.parametrize("high_watermark, low_watermark", [(100, 100), (100, 150), (-1, 0), (100, -1)])
+def test_invalid_watermarks_raise(high_watermark, low_watermark):
+    # Arrange / Act / Assert
+    with pytest.raises(ValueError):
+        FlowController(Logger("consumer"), high_watermark, low_watermark)
\ No newline at end of file
@@ -0,0 +1,32 @@
+import ast
+import pytest
+from src.py.generator.message_generator import MessageGenerator
+from src.py.processor.processor import parse_and_validate_message
+
+def test_build_message_is_keyed_by_user_and_parses():
+    # Arrange
+    _sut = MessageGenerator(5, seed=0, missing_field_rate=0.5)
+    # Act
+    messages = [_sut.build_message(1694479551) for _ in range(100)]
+    # Assert
+    for key, value in messages:
+        parsed_message = parse_and_validate_message(value.decode("utf-8"))
+        assert type(parsed_message) is dict
+        assert parsed_message["user_id"].encode("utf-8") == key
+        assert parsed_message["timestamp"] == "1694479551"
+    assert len({key for key, _ in messages}) == 5
+    assert any("device_type" not in ast.literal_eval(value.decode("utf-8")) for _, value in messages)
+
+def test_users_keep_fixed_fields():
+    # Arrange
+    _sut = MessageGenerator(1, seed=0, missing_field_rate=0)
+    # Act
+    first_message = ast.literal_eval(_sut.build_message(1)[1].decode("utf-8"))
+    second_message = ast.literal_eval(_sut.build_message(2)[1].decode("utf-8"))
+    # Assert
+    assert {**first_message, "timestamp": "2"} == second_message
+
+def test_generator_requires_users():
+    # Act / Assert
+    with pytest.raises(ValueError):
+        MessageGenerator(0)
\ No newline at end of file
@@ -0,0 +1,42 @@
+import pytest
+from src.py.ingestor.consumer_profiles import PROFILES, build_consumer_config, get_env_overrides
+
+def test_every_profile_is_valid():
+    # Act / Assert
+    for profile in PROFILES:
+        assert build_consumer_config(profile) == PROFILES[profile]
+
+def test_default_profile_keeps_librdkafka_defaults():
+    # Act / Assert
+    assert build_consumer_config("default") == {}
+
+def test_overrides_replace_profile_settings_and_convert_integers():
+    # Act
+    result = build_consumer_config("low-latency", {"fetch.wait.max.ms": "50", "check.crcs": "true"})
+    # Assert
+    assert result["fetch.wait.max.ms"] == 50
+    assert result["fetch.min.bytes"] == 1
+    assert result["check.crcs"] == "true"
+
+def test_get_env_overrides_maps_prefixed_variables():
+    # Arrange
+    environ = {"KAFKA_CONSUMER_FETCH_WAIT_MAX_MS": "50", "KAFKA_CONSUMER_": "ignored", "CONSUMER_PROFILE": "default"}
+    # Act
+    result = get_env_overrides(environ)
+    # Assert
+    assert result == {"fetch.wait.max.ms": "50"}
+
+@pytest.mark.parametrize("profile, overrides", [
+    ("balanced", {}),
+    ("default", {"group.id": "other-group"}),
+    ("default", {"fetch.wait.max.ms": "soon"}),
+    ("default", {"queued.max.messages.kbytes": "0"}),
+    ("default", {"fetch.max.bytes": "500000"}),
+    ("high-throughput", {"fetch.max.bytes": "1000000"}),
+    ("default", {"partition.assignment.strategy": "sticky"}),
+    ("default", {"partition.assignment.strategy": "range,cooperative-sticky"})
+])
+def test_invalid_settings_raise(profile, overrides):
+    # Act / Assert
+    with pytest.raises(ValueError):
+        build_consumer_config(profile, overrides)
\ No newline at end of file
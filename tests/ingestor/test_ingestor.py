@@ -2,7 +2,7 @@ from unittest import TestCase
 from unittest.mock import MagicMock, patch
 from logging import Logger
 from src.py.ingestor.ingestor import Ingestor
-from confluent_kafka import Consumer, KafkaError, Message
+from confluent_kafka import Consumer, KafkaError, KafkaException, Message, TopicPartition
 
 def test_ingestor_initialization():
     # Arrange
@@ -19,6 +19,50 @@ def test_ingestor_initialization():
         assert _sut.topic_name == "test-topic"
         assert _sut.logger == logger.getChild("ingestor")
 
+def test_ingestor_initialization_with_static_membership():
+    # Arrange
+    logger = MagicMock(spec=Logger)
+    with patch("src.py.ingestor.ingestor.Consumer") as MockConsumer:
+        # Act
+        _sut = Ingestor(logger, "broker:9092", "test-group", "earliest", "test-topic", "test-instance")
+        # Assert
+        MockConsumer.assert_called_once_with({
+            "bootstrap.servers": "broker:9092",
+            "group.id": "test-group",
+            "auto.offset.reset": "earliest",
+            "group.instance.id": "test-instance"
+        })
+
+def test_ingestor_initialization_with_tuning_config():
+    # Arrange
+    logger = MagicMock(spec=Logger)
+    with patch("src.py.ingestor.ingestor.Consumer") as MockConsumer:
+        # Act
+        _sut = Ingestor(logger, "broker:9092", "test-group", "earliest", "test-topic", tuning_config={"fetch.wait.max.ms": 10})
+        # Assert
+        MockConsumer.assert_called_once_with({
+            "bootstrap.servers": "broker:9092",
+            "group.id": "test-group",
+            "auto.offset.reset": "earliest",
+            "fetch.wait.max.ms": 10
+        })
+
+def test_ingestor_initialization_with_manual_commit():
+    # Arrange
+    logger = MagicMock(spec=Logger)
+    with patch("src.py.ingestor.ingestor.Consumer") as MockConsumer:
+        # Act
+        _sut = Ingestor(logger, "broker:9092", "test-group", "earliest", "test-topic", manual_commit=True)
+        # Assert
+        consumer_config = MockConsumer.call_args.args[0]
+        assert callable(consumer_config.pop("on_commit"))
+        assert consumer_config == {
+            "bootstrap.servers": "broker:9092",
+            "group.id": "test-group",
+            "auto.offset.reset": "earliest",
+            "enable.auto.commit": False
+        }
+
 def test_ingestor_context_manager():
     # Arrange
     logger = MagicMock(spec=Logger)
@@ -46,6 +90,22 @@ def test_ingestor_consume_messages():
         consumer_mock.consume.assert_called_once_with(num_messages=1, timeout=1.0)
         assert messages == ["test message"]
 
+def test_ingestor_consume_raw_messages():
+    # Arrange
+    logger = MagicMock(spec=Logger)
+    consumer_mock = MagicMock(spec=Consumer)
+    message_mock = MagicMock(spec=Message)
+    message_mock.value.return_value = b"test message"
+    message_mock.error.return_value = None
+    with patch("src.py.ingestor.ingestor.Consumer", return_value=consumer_mock):
+        _sut = Ingestor(logger, "broker:9092", "test-group", "earliest", "test-topic")
+        consumer_mock.consume.return_value = [message_mock]
+        # Act
+        messages = _sut.consume_raw_messages(message_limit=1)
+        # Assert
+        consumer_mock.consume.assert_called_once_with(num_messages=1, timeout=1.0)
+        assert messages == [b"test message"]
+
 class TestErroredConsumeMessages(TestCase):
     def test_ingestor_consume_messages_with_error(self):
         # Arrange
@@ -128,3 +188,107 @@ class TestErroredConsumeMessages(TestCase):
                 consumer_mock.consume.assert_called_once()
             self.assertEqual(lcm.output, ["ERROR:consumer.ingestor:Error consuming message corrupted message: Some fatal error", "CRITICAL:consumer.ingestor:Fatal error consuming messages in ingestor: Some fatal error"])
             self.assertEqual("Some fatal error", str(ecm.exception))
+
+def test_ingestor_pause_and_resume():
+    # Arrange
+    logger = MagicMock(spec=Logger)
+    consumer_mock = MagicMock(spec=Consumer)
+    assignment = [MagicMock(), MagicMock()]
+    consumer_mock.assignment.return_value = assignment
+    with patch("src.py.ingestor.ingestor.Consumer", return_value=consumer_mock):
+        _sut = Ingestor(logger, "broker:9092", "test-group", "earliest", "test-topic")
+        # Act
+        _sut.resume()
+        _sut.pause()
+        _sut.pause()
+        paused = _sut.paused
+        _sut.resume()
+        _sut.resume()
+    # Assert
+    assert paused
+    assert not _sut.paused
+    assert consumer_mock.pause.call_count == 2
+    consumer_mock.pause.assert_called_with(assignment)
+    consumer_mock.resume.assert_called_once_with(assignment)
+
+def build_message_mock(partition: int, offset: int) -> MagicMock:
+    message_mock = MagicMock(spec=Message)
+    message_mock.value.return_value = b"test message"
+    message_mock.error.return_value = None
+    message_mock.topic.return_value = "test-topic"
+    message_mock.partition.return_value = partition
+    message_mock.offset.return_value = offset
+    return message_mock
+
+def test_ingestor_tracks_consumed_offsets_and_commits_them():
+    # Arrange
+    logger = MagicMock(spec=Logger)
+    consumer_mock = MagicMock(spec=Consumer)
+    consumer_mock.consume.return_value = [build_message_mock(0, 4), build_message_mock(1, 7), build_message_mock(0, 5)]
+    with patch("src.py.ingestor.ingestor.Consumer", return_value=consumer_mock):
+        _sut = Ingestor(logger, "broker:9092", "test-group", "earliest", "test-topic", manual_commit=True)
+        # Act
+        _sut.consume_raw_messages(message_limit=3)
+        _sut.commit_offsets(_sut.consumed_offsets)
+        _sut.commit_offsets({})
+    # Assert
+    assert _sut.consumed_offsets == {("test-topic", 0): 6, ("test-topic", 1): 8}
+    assert _sut.commits_in_flight == 1
+    consumer_mock.commit.assert_called_once_with(offsets=[TopicPartition("test-topic", 0, 6), TopicPartition("test-topic", 1, 8)], asynchronous=True)
+
+def test_ingestor_waits_for_commits_until_their_callbacks():
+    # Arrange
+    logger = MagicMock(spec=Logger)
+    consumer_mock = MagicMock(spec=Consumer)
+    with patch("src.py.ingestor.ingestor.Consumer", return_value=consumer_mock) as MockConsumer:
+        _sut = Ingestor(logger, "broker:9092", "test-group", "earliest", "test-topic", manual_commit=True)
+        on_commit = MockConsumer.call_args.args[0]["on_commit"]
+        consumer_mock.poll.side_effect = lambda timeout: on_commit(None, [TopicPartition("test-topic", 0, 6)])
+        # Act
+        _sut.commit_offsets({("test-topic", 0): 6}, timeout=5.0)
+    # Assert
+    assert _sut.commits_in_flight == 0
+    consumer_mock.poll.assert_called_once()
+
+def test_ingestor_commits_delivered_offsets_of_revoked_partitions():
+    # Arrange
+    logger = MagicMock(spec=Logger)
+    consumer_mock = MagicMock(spec=Consumer)
+    revoke_handler = MagicMock(return_value={("test-topic", 1): 8})
+    with patch("src.py.ingestor.ingestor.Consumer", return_value=consumer_mock):
+        with Ingestor(logger, "broker:9092", "test-group", "earliest", "test-topic", manual_commit=True, revoke_handler=revoke_handler) as _sut:
+            on_revoke = consumer_mock.subscribe.call_args.kwargs["on_revoke"]
+            # Act
+            on_revoke(consumer_mock, [TopicPartition("test-topic", 1)])
+    # Assert
+    consumer_mock.subscribe.assert_called_once_with(["test-topic"], on_revoke=on_revoke)
+    revoke_handler.assert_called_once_with([("test-topic", 1)])
+    consumer_mock.commit.assert_called_once_with(offsets=[TopicPartition("test-topic", 1, 8)], asynchronous=False)
+
+class TestCommitOffsets(TestCase):
+    def test_failed_commit_is_logged(self):
+        # Arrange
+        logger = Logger("consumer")
+        consumer_mock = MagicMock(spec=Consumer)
+        consumer_mock.commit.side_effect = KafkaException(KafkaError(KafkaError._NO_OFFSET, "No offset stored"))
+        with patch("src.py.ingestor.ingestor.Consumer", return_value=consumer_mock):
+            _sut = Ingestor(logger, "broker:9092", "test-group", "earliest", "test-topic", manual_commit=True)
+            with self.assertLogs(_sut.logger, level="WARNING") as lcm:
+                # Act
+                _sut.commit_offsets({("test-topic", 0): 6})
+        # Assert
+        self.assertEqual(1, len(lcm.output))
+        self.assertTrue(lcm.output[0].startswith("WARNING:consumer.ingestor:Failed to commit offsets {('test-topic', 0): 6}"))
+
+    def test_waiting_on_commits_gives_up_at_timeout(self):
+        # Arrange
+        logger = Logger("consumer")
+        consumer_mock = MagicMock(spec=Consumer)
+        with patch("src.py.ingestor.ingestor.Consumer", return_value=consumer_mock):
+            _sut = Ingestor(logger, "broker:9092", "test-group", "earliest", "test-topic", manual_commit=True)
+            with self.assertLogs(_sut.logger, level="WARNING") as lcm:
+                # Act
+                _sut.commit_offsets({("test-topic", 0): 6}, timeout=0.0)
+        # Assert
+        self.assertEqual(["WARNING:consumer.ingestor:Gave up waiting on 1 offset commits after 0.00 seconds..."], lcm.output)
+        consumer_mock.poll.assert_not_called()
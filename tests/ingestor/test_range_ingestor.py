@@ -0,0 +1,93 @@
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+from logging import Logger
+from src.py.ingestor.range_ingestor import RangeIngestor
+from confluent_kafka import Consumer, KafkaError, Message, TopicPartition
+
+def build_consumer_mock(watermarks: dict[int, tuple[int, int]]) -> MagicMock:
+    consumer_mock = MagicMock(spec=Consumer)
+    consumer_mock.list_topics.return_value.topics = {"test-topic": MagicMock(error=None, partitions={partition: None for partition in watermarks})}
+    consumer_mock.get_watermark_offsets.side_effect = lambda topic_partition, timeout: watermarks[topic_partition.partition]
+    return consumer_mock
+
+def build_message_mock(partition: int, offset: int, value: bytes = b"test message", error: KafkaError | None = None) -> MagicMock:
+    message_mock = MagicMock(spec=Message)
+    message_mock.partition.return_value = partition
+    message_mock.offset.return_value = offset
+    message_mock.value.return_value = value
+    message_mock.error.return_value = error
+    return message_mock
+
+class TestRangeIngestor(TestCase):
+    def test_initialization_uses_throwaway_group_without_commits(self):
+        # Arrange
+        logger = Logger("consumer")
+        with patch("src.py.ingestor.range_ingestor.Consumer") as MockConsumer:
+            # Act
+            _sut = RangeIngestor(logger, "broker:9092", "test-topic", tuning_config={"fetch.wait.max.ms": 500})
+        # Assert
+        consumer_config = MockConsumer.call_args.args[0]
+        self.assertTrue(consumer_config["group.id"].startswith("range-ingestor-"))
+        self.assertFalse(consumer_config["enable.auto.commit"])
+        self.assertFalse(consumer_config["enable.auto.offset.store"])
+        self.assertEqual(500, consumer_config["fetch.wait.max.ms"])
+
+    def test_offset_range_is_clamped_to_partition_watermarks(self):
+        # Arrange
+        logger = Logger("consumer")
+        consumer_mock = build_consumer_mock({0: (0, 100), 1: (50, 80), 2: (0, 5)})
+        with patch("src.py.ingestor.range_ingestor.Consumer", return_value=consumer_mock):
+            # Act
+            with RangeIngestor(logger, "broker:9092", "test-topic", start_offset=10, end_offset=90) as _sut:
+                # Assert
+                self.assertEqual({0: (10, 90), 1: (50, 80)}, _sut.partition_ranges)
+                self.assertEqual(110, _sut.total_messages)
+                consumer_mock.assign.assert_called_once_with([TopicPartition("test-topic", 0, 10), TopicPartition("test-topic", 1, 50)])
+        consumer_mock.close.assert_called_once()
+
+    def test_timestamp_range_is_resolved_per_partition(self):
+        # Arrange
+        logger = Logger("consumer")
+        consumer_mock = build_consumer_mock({0: (0, 100)})
+        consumer_mock.offsets_for_times.side_effect = [[TopicPartition("test-topic", 0, 40)], [TopicPartition("test-topic", 0, -1)]]
+        with patch("src.py.ingestor.range_ingestor.Consumer", return_value=consumer_mock):
+            # Act
+            with RangeIngestor(logger, "broker:9092", "test-topic", start_offset=0, start_timestamp_ms=1000, end_timestamp_ms=2000) as _sut:
+                # Assert
+                self.assertEqual({0: (40, 100)}, _sut.partition_ranges)
+        self.assertEqual([TopicPartition("test-topic", 0, 1000)], consumer_mock.offsets_for_times.call_args_list[0].args[0])
+        self.assertEqual(1000, consumer_mock.offsets_for_times.call_args_list[0].args[0][0].offset)
+        self.assertEqual(2000, consumer_mock.offsets_for_times.call_args_list[1].args[0][0].offset)
+
+    def test_consume_raw_messages_stops_each_partition_at_its_range_end(self):
+        # Arrange
+        logger = Logger("consumer")
+        consumer_mock = build_consumer_mock({0: (0, 100), 1: (0, 100)})
+        consumer_mock.consume.side_effect = [
+            [build_message_mock(0, 8), build_message_mock(1, 8), build_message_mock(0, 9), build_message_mock(1, 9), build_message_mock(0, 10)],
+            [build_message_mock(1, 10, b"", KafkaError(KafkaError._PARTITION_EOF))]
+        ]
+        with patch("src.py.ingestor.range_ingestor.Consumer", return_value=consumer_mock):
+            with RangeIngestor(logger, "broker:9092", "test-topic", start_offset=8, end_offset=10) as _sut:
+                # Act
+                first_messages = _sut.consume_raw_messages(5)
+                second_messages = _sut.consume_raw_messages(5)
+                # Assert
+                self.assertEqual([b"test message"] * 4, first_messages)
+                self.assertEqual([], second_messages)
+                self.assertTrue(_sut.is_finished())
+                self.assertEqual(4, _sut.consumed_messages())
+        self.assertEqual(2, consumer_mock.pause.call_count)
+
+    def test_consumed_messages_counts_partial_progress(self):
+        # Arrange
+        logger = Logger("consumer")
+        consumer_mock = build_consumer_mock({0: (0, 100), 1: (0, 100)})
+        consumer_mock.consume.return_value = [build_message_mock(0, 0), build_message_mock(0, 1), build_message_mock(1, 0)]
+        with patch("src.py.ingestor.range_ingestor.Consumer", return_value=consumer_mock):
+            with RangeIngestor(logger, "broker:9092", "test-topic") as _sut:
+                # Act
+                _sut.consume_raw_messages(3)
+                # Assert
+                self.assertEqual(3, _sut.consumed_messages())
+                self.assertFalse(_sut.is_finished())
\ No newline at end of file
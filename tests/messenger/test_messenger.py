@@ -1,7 +1,12 @@
+import ast
+import pytest
 from unittest import TestCase
 from unittest.mock import MagicMock, patch
 from logging import Logger
+from src.py.flow.deadline import Deadline
 from src.py.messenger.messenger import Messenger
+from src.py.messenger.partitioner import partition_for_key
+from src.py.processor.validation import PARSE_ERROR, RejectedMessage
 from confluent_kafka import KafkaError, Message, Producer
 
 def test_initialization():
@@ -22,13 +27,28 @@ def test_messenger_context_manager():
     # Arrange
     logger = Logger("consumer")
     producer_mock = MagicMock(spec=Producer)
+    producer_mock.flush.return_value = 0
     with patch("src.py.messenger.messenger.Producer", return_value=producer_mock):
         # Act
-        with Messenger(logger, "broker:9092", "test-client-id", "test-topic") as _sut:
+        with Messenger(logger, "broker:9092", "test-client-id", "test-topic", flush_timeout=5.0) as _sut:
             # Assert
-            producer_mock.flush.assert_called_once()
-        producer_mock.purge.assert_called_once()
-        producer_mock.flush.call_count == 2
+            producer_mock.flush.assert_called_once_with(5.0)
+        producer_mock.purge.assert_not_called()
+        assert producer_mock.flush.call_count == 2
+
+def test_messenger_context_manager_purges_messages_left_at_deadline_on_exception():
+    # Arrange
+    logger = Logger("consumer")
+    producer_mock = MagicMock(spec=Producer)
+    producer_mock.flush.side_effect = [0, 3]
+    with patch("src.py.messenger.messenger.Producer", return_value=producer_mock):
+        # Act
+        with pytest.raises(RuntimeError):
+            with Messenger(logger, "broker:9092", "test-client-id", "test-topic", flush_timeout=5.0):
+                raise RuntimeError("Processing failed")
+    # Assert
+    producer_mock.flush.assert_called_with(5.0)
+    producer_mock.purge.assert_called_once()
 
 class TestProduceMessageAndCallback(TestCase):
     def test_produce_message_and_callback(self):
@@ -51,7 +71,7 @@ class TestProduceMessageAndCallback(TestCase):
                 self.assertTrue("DEBUG:consumer.messenger:Message '{'key': 'value'}' successfully delivered to topic test-topic and partition 0" in lcm.output)
         producer_mock.poll.assert_called_once_with(1.1)
         producer_mock.produce.assert_called_once_with("test-topic", str({"key": "value"}).encode("utf-8"), callback=_sut.callback)
-        producer_mock.flush.assert_called_once()
+        producer_mock.flush.assert_called_once_with(30.0)
 
     def test_produce_message_raises(self):
         # Arrange
@@ -108,4 +128,244 @@ class TestProduceMessageAndCallback(TestCase):
                 _sut.callback(kafka_error_mock, fail_message_mock)
             # Assert
             self.assertEqual(["ERROR:consumer.messenger:Failed to deliver message '{'key': 'value'}' to topic test-topic and partition 0: Some fatal error"], lcm.output)
-            self.assertEqual("Some fatal error", str(ecm.exception))
\ No newline at end of file
+            self.assertEqual("Some fatal error", str(ecm.exception))
+
+class TestProduceDeadLetters(TestCase):
+    def test_produce_dead_letters_with_headers(self):
+        # Arrange
+        logger = Logger("consumer")
+        rejected_messages = [RejectedMessage("not a message", PARSE_ERROR, "SyntaxError: invalid syntax")]
+        producer_mock = MagicMock(spec=Producer)
+        producer_mock.produce.side_effect = [BufferError(), None]
+        with (patch("src.py.messenger.messenger.Producer", return_value=producer_mock),
+              patch("src.py.messenger.messenger.time.time", return_value=1694479551.5)):
+            _sut = Messenger(logger, "broker:9092", "test-client-id", "test-topic", "test-dead-letter-topic")
+            # Act
+            _sut.produce_dead_letters(rejected_messages, "source-topic")
+        # Assert
+        headers = [("error.reason", b"parse_error"), ("error.message", b"SyntaxError: invalid syntax"), ("source.topic", b"source-topic"), ("rejected.at", b"1694479551500")]
+        self.assertEqual(2, producer_mock.produce.call_count)
+        producer_mock.produce.assert_called_with("test-dead-letter-topic", b"not a message", headers=headers, callback=_sut.callback)
+        producer_mock.poll.assert_called_with(0)
+        producer_mock.flush.assert_not_called()
+
+    def test_produce_dead_letters_with_original_bytes(self):
+        # Arrange
+        logger = Logger("consumer")
+        rejected_messages = [RejectedMessage("not a \ufffd", PARSE_ERROR, "SyntaxError: invalid syntax", b"not a \xff")]
+        producer_mock = MagicMock(spec=Producer)
+        with patch("src.py.messenger.messenger.Producer", return_value=producer_mock):
+            _sut = Messenger(logger, "broker:9092", "test-client-id", "test-topic", "test-dead-letter-topic")
+            # Act
+            _sut.produce_dead_letters(rejected_messages, "source-topic")
+        # Assert
+        self.assertEqual(b"not a \xff", producer_mock.produce.call_args.args[1])
+
+    def test_produce_dead_letters_without_topic_drops_messages(self):
+        # Arrange
+        logger = Logger("consumer")
+        rejected_messages = [RejectedMessage("not a message", PARSE_ERROR, "SyntaxError: invalid syntax")]
+        producer_mock = MagicMock(spec=Producer)
+        with patch("src.py.messenger.messenger.Producer", return_value=producer_mock):
+            _sut = Messenger(logger, "broker:9092", "test-client-id", "test-topic")
+            with self.assertLogs(_sut.logger, level="WARNING") as lcm:
+                # Act
+                _sut.produce_dead_letters(rejected_messages, "source-topic")
+            # Assert
+            self.assertEqual(["WARNING:consumer.messenger:Dropping 1 rejected messages, no dead letter topic is configured..."], lcm.output)
+        producer_mock.produce.assert_not_called()
+
+class TestDeliveryTracking(TestCase):
+    def test_produce_reports_each_delivery(self):
+        # Arrange
+        logger = Logger("consumer")
+        deliveries = []
+        rejected_messages = [RejectedMessage("not a message", PARSE_ERROR, "SyntaxError: invalid syntax")]
+        producer_mock = MagicMock(spec=Producer)
+        message_mock = MagicMock(spec=Message)
+        message_mock.value.return_value = b"value"
+        with patch("src.py.messenger.messenger.Producer", return_value=producer_mock):
+            _sut = Messenger(logger, "broker:9092", "test-client-id", "test-topic", "test-dead-letter-topic")
+            _sut.produce_messages([{"key": "value"}], 0, False, deliveries.append)
+            dead_letter_count = _sut.produce_dead_letters(rejected_messages, "source-topic", deliveries.append)
+            callbacks = [produce_call.kwargs["callback"] for produce_call in producer_mock.produce.call_args_list]
+            # Act
+            callbacks[0](None, message_mock)
+            with self.assertLogs(_sut.logger, level="ERROR"):
+                callbacks[1](KafkaError(KafkaError._MSG_TIMED_OUT, "Message timed out"), message_mock)
+        # Assert
+        self.assertEqual(1, dead_letter_count)
+        self.assertEqual([True, False], deliveries)
+
+    def test_drain_purges_messages_left_at_deadline(self):
+        # Arrange
+        logger = Logger("consumer")
+        producer_mock = MagicMock(spec=Producer)
+        producer_mock.__len__.return_value = 3
+        producer_mock.flush.return_value = 2
+        with patch("src.py.messenger.messenger.Producer", return_value=producer_mock):
+            _sut = Messenger(logger, "broker:9092", "test-client-id", "test-topic")
+            with self.assertLogs(_sut.logger, level="WARNING") as lcm:
+                # Act
+                undelivered_count = _sut.drain(0.5)
+        # Assert
+        self.assertEqual(2, undelivered_count)
+        self.assertEqual(["WARNING:consumer.messenger:Purging 2 messages left undelivered after the shutdown deadline..."], lcm.output)
+        producer_mock.flush.assert_called_once_with(0.5)
+        producer_mock.purge.assert_called_once()
+        producer_mock.poll.assert_called_once_with(0)
+
+    def test_drain_without_undelivered_messages_doesnt_purge(self):
+        # Arrange
+        logger = Logger("consumer")
+        producer_mock = MagicMock(spec=Producer)
+        producer_mock.__len__.return_value = 0
+        producer_mock.flush.return_value = 0
+        with patch("src.py.messenger.messenger.Producer", return_value=producer_mock):
+            _sut = Messenger(logger, "broker:9092", "test-client-id", "test-topic")
+            # Act
+            undelivered_count = _sut.drain(0.5)
+        # Assert
+        self.assertEqual(0, undelivered_count)
+        producer_mock.purge.assert_not_called()
+
+class TestProduceAlerts(TestCase):
+    def test_produce_alerts_keyed_by_user(self):
+        # Arrange
+        logger = Logger("consumer")
+        alerts = [{"user_id": "test-id", "reasons": ["login_rate"]}]
+        producer_mock = MagicMock(spec=Producer)
+        with patch("src.py.messenger.messenger.Producer", return_value=producer_mock):
+            _sut = Messenger(logger, "broker:9092", "test-client-id", "test-topic", alert_topic_name="test-alert-topic")
+            # Act
+            _sut.produce_alerts(alerts)
+        # Assert
+        producer_mock.produce.assert_called_once_with("test-alert-topic", b'{"user_id": "test-id", "reasons": ["login_rate"]}', b"test-id", callback=_sut.callback)
+        producer_mock.poll.assert_called_with(0)
+        producer_mock.flush.assert_not_called()
+
+    def test_produce_alerts_without_topic_drops_alerts(self):
+        # Arrange
+        logger = Logger("consumer")
+        producer_mock = MagicMock(spec=Producer)
+        with patch("src.py.messenger.messenger.Producer", return_value=producer_mock):
+            _sut = Messenger(logger, "broker:9092", "test-client-id", "test-topic")
+            with self.assertLogs(_sut.logger, level="WARNING") as lcm:
+                # Act
+                _sut.produce_alerts([{"user_id": "test-id"}])
+            # Assert
+            self.assertEqual(["WARNING:consumer.messenger:Dropping 1 alerts, no alert topic is configured..."], lcm.output)
+        producer_mock.produce.assert_not_called()
+
+class TestProduceKeyedMessages(TestCase):
+    def test_keyed_messenger_uses_murmur2_partitioner(self):
+        # Arrange
+        logger_mock = MagicMock(spec=Logger)
+        with patch("src.py.messenger.messenger.Producer") as MockProducer:
+            # Act
+            _sut = Messenger(logger_mock, "broker:9092", "test-client-id", "test-topic", key_field="user_id")
+        # Assert
+        MockProducer.assert_called_once_with({
+            "bootstrap.servers": "broker:9092",
+            "client.id": "test-client-id",
+            "partitioner": "murmur2_random"
+        })
+        self.assertEqual("user_id", _sut.key_field)
+
+    def test_unknown_key_field_raises(self):
+        # Arrange
+        logger_mock = MagicMock(spec=Logger)
+        with patch("src.py.messenger.messenger.Producer"):
+            # Act / Assert
+            with self.assertRaises(ValueError):
+                Messenger(logger_mock, "broker:9092", "test-client-id", "test-topic", key_field="ip")
+
+    def test_produce_keyed_messages_grouped_by_partition(self):
+        # Arrange
+        logger = Logger("consumer")
+        user_ids = [f"user-{i}" for i in range(12)]
+        messages = [{"user_id": user_id, "index": str(i)} for i, user_id in enumerate(user_ids + user_ids)]
+        producer_mock = MagicMock(spec=Producer)
+        producer_mock.list_topics.return_value.topics = {"test-topic": MagicMock(error=None, partitions={0: None, 1: None, 2: None})}
+        with patch("src.py.messenger.messenger.Producer", return_value=producer_mock):
+            _sut = Messenger(logger, "broker:9092", "test-client-id", "test-topic", key_field="user_id")
+            # Act
+            _sut.produce_messages(messages, 0.5)
+            _sut.produce_messages(messages[:1], 0.5)
+        # Assert
+        produced = [produce_call.args for produce_call in producer_mock.produce.call_args_list[:len(messages)]]
+        partitions = [partition for _, _, _, partition in produced]
+        partition_runs = [partition for i, partition in enumerate(partitions) if i == 0 or partitions[i - 1] != partition]
+        self.assertEqual(len(set(partitions)), len(partition_runs))
+        self.assertEqual(len(partition_runs), producer_mock.poll.call_count - 1)
+        for topic, value, key, partition in produced:
+            self.assertEqual("test-topic", topic)
+            self.assertEqual(partition_for_key(key, 3), partition)
+        for user_id in user_ids:
+            user_indexes = [ast.literal_eval(value.decode("utf-8"))["index"] for _, value, key, _ in produced if key == user_id.encode("utf-8")]
+            self.assertEqual(sorted(user_indexes, key=int), user_indexes)
+        producer_mock.list_topics.assert_called_once_with("test-topic", timeout=10)
+        self.assertEqual(2, producer_mock.flush.call_count)
+
+    def test_produce_keyed_messages_without_metadata_leaves_partitioning_to_producer(self):
+        # Arrange
+        logger = Logger("consumer")
+        producer_mock = MagicMock(spec=Producer)
+        producer_mock.list_topics.return_value.topics = {}
+        with patch("src.py.messenger.messenger.Producer", return_value=producer_mock):
+            _sut = Messenger(logger, "broker:9092", "test-client-id", "test-topic", key_field="device_id")
+            with self.assertLogs(_sut.logger, level="WARNING"):
+                # Act
+                _sut.produce_messages([{"device_id": "device-1"}], 0.5)
+        # Assert
+        producer_mock.produce.assert_called_once_with("test-topic", str({"device_id": "device-1"}).encode("utf-8"), b"device-1", callback=_sut.callback)
+        self.assertIsNone(_sut.partition_count)
+class TestProduceUnderFlowControl(TestCase):
+    def test_produce_messages_waits_for_room_in_full_queue(self):
+        # Arrange
+        logger = Logger("consumer")
+        producer_mock = MagicMock(spec=Producer)
+        producer_mock.produce.side_effect = [BufferError(), BufferError(), None]
+        with patch("src.py.messenger.messenger.Producer", return_value=producer_mock):
+            _sut = Messenger(logger, "broker:9092", "test-client-id", "test-topic")
+            # Act
+            _sut.produce_messages([{"key": "value"}], 0.5)
+        # Assert
+        self.assertEqual(3, producer_mock.produce.call_count)
+        producer_mock.produce.assert_called_with("test-topic", str({"key": "value"}).encode("utf-8"), callback=_sut.callback)
+        self.assertEqual([((0.5,),), ((0.1,),), ((0.1,),)], producer_mock.poll.call_args_list)
+        self.assertGreaterEqual(_sut.queue_full_seconds, 0.0)
+        producer_mock.flush.assert_called_once_with(30.0)
+
+    def test_produce_messages_drops_messages_without_room_once_deadline_passed(self):
+        # Arrange
+        logger = Logger("consumer")
+        producer_mock = MagicMock(spec=Producer)
+        producer_mock.produce.side_effect = BufferError()
+        producer_mock.flush.return_value = 0
+        deadline = Deadline(0.0)
+        deadline.start()
+        with patch("src.py.messenger.messenger.Producer", return_value=producer_mock):
+            with Messenger(logger, "broker:9092", "test-client-id", "test-topic", flush_timeout=5.0, deadline=deadline) as _sut:
+                # Act
+                _sut.produce_messages([{"key": "value"}, {"key": "other value"}], 0.5, flush=False)
+        # Assert
+        self.assertEqual(2, _sut.dropped_count)
+        self.assertEqual(2, producer_mock.produce.call_count)
+        producer_mock.flush.assert_called_with(0.0)
+
+    def test_produce_messages_without_flush_leaves_messages_queued(self):
+        # Arrange
+        logger = Logger("consumer")
+        producer_mock = MagicMock(spec=Producer)
+        producer_mock.__len__.return_value = 2
+        with patch("src.py.messenger.messenger.Producer", return_value=producer_mock):
+            _sut = Messenger(logger, "broker:9092", "test-client-id", "test-topic")
+            # Act
+            _sut.produce_messages([{"key": "value"}, {"key": "other value"}], 0.5, flush=False)
+            queue_length = _sut.poll()
+        # Assert
+        self.assertEqual(2, queue_length)
+        self.assertEqual(2, producer_mock.produce.call_count)
+        producer_mock.poll.assert_called_with(0)
+        producer_mock.flush.assert_not_called()
\ No newline at end of file
@@ -0,0 +1,13 @@
+from src.py.messenger.partitioner import murmur2, partition_for_key
+
+def test_murmur2_matches_java_client():
+    # Act / Assert
+    assert murmur2(b"21") == -973932308 & 0xFFFFFFFF
+
+def test_partition_for_key_matches_java_client():
+    # Arrange
+    keys = [b"", b"a", b"ab", b"abc", b"123456789", b"\x00 "]
+    # Act
+    partitions = [partition_for_key(key, 1000) for key in keys]
+    # Assert
+    assert partitions == [681, 524, 434, 107, 566, 742]
\ No newline at end of file
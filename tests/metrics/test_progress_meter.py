@@ -0,0 +1,42 @@
+from unittest import TestCase
+from unittest.mock import patch
+from logging import Logger
+from src.py.metrics.progress_meter import ProgressMeter
+
+class TestProgressMeter(TestCase):
+    def test_update_reports_rate_and_eta_once_per_interval(self):
+        # Arrange
+        logger = Logger("consumer")
+        with patch("src.py.metrics.progress_meter.time.perf_counter", side_effect=[100.0, 110.0, 112.0, 116.0]):
+            _sut = ProgressMeter(logger, 400, 5.0)
+            with self.assertLogs(_sut.logger, level="INFO") as lcm:
+                # Act
+                _sut.update(100)
+                _sut.update(120)
+                _sut.update(240)
+        # Assert
+        self.assertEqual([
+            "INFO:consumer.progress_meter:Processed 100 of 400 messages (25.0%) at 10.0 messages per second, 0m 30s remaining...",
+            "INFO:consumer.progress_meter:Processed 240 of 400 messages (60.0%) at 15.0 messages per second, 0m 10s remaining..."
+        ], lcm.output)
+
+    def test_update_always_reports_completion(self):
+        # Arrange
+        logger = Logger("consumer")
+        with patch("src.py.metrics.progress_meter.time.perf_counter", side_effect=[100.0, 102.0, 103.0]):
+            _sut = ProgressMeter(logger, 30, 5.0)
+            with self.assertLogs(_sut.logger, level="INFO") as lcm:
+                # Act
+                _sut.update(10)
+                _sut.update(30)
+        # Assert
+        self.assertEqual("INFO:consumer.progress_meter:Processed 30 of 30 messages (100.0%) at 10.0 messages per second, 0m 00s remaining...", lcm.output[-1])
+
+    def test_eta_is_unknown_before_any_progress(self):
+        # Arrange
+        logger = Logger("consumer")
+        _sut = ProgressMeter(logger, 30)
+        # Act
+        eta_seconds = _sut.eta_seconds()
+        # Assert
+        self.assertIsNone(eta_seconds)
\ No newline at end of file
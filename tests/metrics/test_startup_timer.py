@@ -0,0 +1,28 @@
+from unittest import TestCase
+from unittest.mock import patch
+from logging import Logger
+from src.py.metrics.startup_timer import StartupTimer
+
+class TestStartupTimer(TestCase):
+    def test_mark_keeps_first_time_reached(self):
+        # Arrange
+        logger = Logger("consumer")
+        with patch("src.py.metrics.startup_timer.time.perf_counter", side_effect=[1.0, 1.5]):
+            _sut = StartupTimer(logger, start_time=0.5)
+            # Act
+            _sut.mark("first message consumed")
+            _sut.mark("first message consumed")
+        # Assert
+        self.assertEqual({"first message consumed": 0.5}, _sut.marks)
+
+    def test_report_logs_phase_breakdown_once(self):
+        # Arrange
+        logger = Logger("consumer")
+        _sut = StartupTimer(logger, start_time=0.0)
+        _sut.marks = {"modules imported": 0.1, "first message produced": 0.35}
+        with self.assertLogs(_sut.logger, level="INFO") as lcm:
+            # Act
+            _sut.report()
+            _sut.report()
+        # Assert
+        self.assertEqual(["INFO:consumer.startup_timer:Startup timing:\n\tmodules imported: 100.0 ms (+100.0 ms)\n\tfirst message produced: 350.0 ms (+250.0 ms)"], lcm.output)
\ No newline at end of file
@@ -0,0 +1,29 @@
+from unittest import TestCase
+from unittest.mock import patch
+from logging import Logger
+from src.py.metrics.throughput_meter import ThroughputMeter
+
+class TestThroughputMeter(TestCase):
+    def test_meter_measures_from_first_batch_start_to_last_batch_end(self):
+        # Arrange
+        logger = Logger("consumer")
+        _sut = ThroughputMeter(logger)
+        with patch("src.py.metrics.throughput_meter.time.time", side_effect=[100.0, 101.0, 104.0]):
+            # Act
+            _sut.start_batch()
+            _sut.end_batch(10)
+            _sut.start_batch()
+            _sut.end_batch(30)
+        # Assert
+        self.assertEqual({"message_count": 40, "first_message_at": 100.0, "last_message_at": 104.0}, _sut.snapshot())
+        self.assertEqual(10.0, _sut.messages_per_second())
+
+    def test_meter_without_batches_reports_zero(self):
+        # Arrange
+        logger = Logger("consumer")
+        _sut = ThroughputMeter(logger)
+        with self.assertLogs(_sut.logger, level="INFO") as lcm:
+            # Act
+            _sut.report()
+        # Assert
+        self.assertEqual(["INFO:consumer.throughput_meter:Processed 0 messages in 0.00 seconds, 0.0 messages per second..."], lcm.output)
\ No newline at end of file
@@ -0,0 +1,83 @@
+import pytest
+import time
+from unittest import TestCase
+from logging import Logger
+from src.py.processor.deduplicator import BloomFilter, Deduplicator
+
+def test_bloom_filter_stays_within_false_positive_rate():
+    # Arrange
+    _sut = BloomFilter(10000, 0.01)
+    for i in range(10000):
+        _sut.add(f"added-{i}".encode("utf-8"))
+    # Act
+    false_positives = sum(_sut.add(f"not-added-{i}".encode("utf-8")) for i in range(1000))
+    # Assert
+    assert _sut.add(b"added-0")
+    assert false_positives < 30
+
+class TestDeduplicator(TestCase):
+    def test_is_duplicate_matches_user_device_and_timestamp(self):
+        # Arrange
+        _sut = Deduplicator(Logger("consumer"), 600, 1000, 0.001)
+        # Act
+        results = [_sut.is_duplicate("user", "device", 1000), _sut.is_duplicate("user", "device", 1000), _sut.is_duplicate("user", "other device", 1000),
+                   _sut.is_duplicate("user", "device", 1001), _sut.is_duplicate("other user", "device", 1000)]
+        # Assert
+        self.assertEqual([False, True, False, False, False], results)
+        self.assertEqual(5, _sut.checked_count)
+        self.assertEqual(1, _sut.duplicate_count)
+
+    def test_window_drops_old_buckets_and_lets_expired_events_through(self):
+        # Arrange
+        _sut = Deduplicator(Logger("consumer"), 600, 1000, 0.001)
+        _sut.is_duplicate("user", "device", 1000)
+        # Act
+        _sut.is_duplicate("user", "device", 1700)
+        expired_result = _sut.is_duplicate("user", "device", 1000)
+        # Assert
+        self.assertFalse(expired_result)
+        self.assertEqual(1, _sut.expired_count)
+        self.assertEqual([17], list(_sut.buckets))
+        self.assertLessEqual(len(_sut.buckets), _sut.bucket_count)
+
+    def test_future_event_doesnt_move_the_window(self):
+        # Arrange
+        _sut = Deduplicator(Logger("consumer"), 600, 1000, 0.001)
+        now = int(time.time())
+        _sut.is_duplicate("user", "device", now)
+        # Act
+        outlier_result = _sut.is_duplicate("user", "device", now + 10 ** 9)
+        duplicate_result = _sut.is_duplicate("user", "device", now)
+        # Assert
+        self.assertFalse(outlier_result)
+        self.assertTrue(duplicate_result)
+        self.assertEqual(1, _sut.future_count)
+        self.assertEqual(0, _sut.expired_count)
+        self.assertEqual(now // _sut.bucket_seconds, _sut.newest_bucket)
+
+    def test_drop_duplicates_keeps_first_of_each_event_in_order(self):
+        # Arrange
+        _sut = Deduplicator(Logger("consumer"), 600, 1000, 0.001)
+        messages = [{"user_id": "a", "device_id": "d", "timestamp": "10"}, {"user_id": "b", "device_id": "d", "timestamp": "10"},
+                    {"user_id": "a", "device_id": "d", "timestamp": "10"}]
+        # Act
+        result = _sut.drop_duplicates(messages)
+        # Assert
+        self.assertEqual(messages[:2], result)
+
+    def test_report_includes_hit_rate(self):
+        # Arrange
+        _sut = Deduplicator(Logger("consumer"), 600, 1000, 0.001)
+        _sut.is_duplicate("user", "device", 1000)
+        _sut.is_duplicate("user", "device", 1000)
+        with self.assertLogs(_sut.logger, level="INFO") as lcm:
+            # Act
+            _sut.report()
+        # Assert
+        self.assertTrue(lcm.output[0].startswith("INFO:consumer.deduplicator:Dropped 1 duplicates of 2 messages checked (50.00%), let 0 messages older than the window and 0 from the future through"))
+
+@pytest.mark.parametrize("window_seconds, capacity, false_positive_rate", [(0, 1000, 0.001), (600, 0, 0.001), (600, 1000, 0), (600, 1000, 1)])
+def test_invalid_settings_raise(window_seconds, capacity, false_positive_rate):
+    # Arrange / Act / Assert
+    with pytest.raises(ValueError):
+        Deduplicator(Logger("consumer"), window_seconds, capacity, false_positive_rate)
\ No newline at end of file
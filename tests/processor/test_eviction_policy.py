@@ -0,0 +1,175 @@
+import json
+import pytest
+import sys
+import time
+from logging import Logger
+from src.py.processor.data.device_data_manager import DeviceDataManager
+from src.py.processor.data.eviction_policy import EvictionFileSink, EvictionPolicy
+from src.py.processor.data.ip_data_manager import IpDataManager
+from src.py.processor.data.user_data_manager import UserDataManager
+from src.py.processor.sharded_aggregator import ShardedAggregator
+
+def test_eviction_policy_rejects_invalid_settings():
+    # Act / Assert
+    with pytest.raises(ValueError):
+        EvictionPolicy("random", max_entries=1)
+    with pytest.raises(ValueError):
+        EvictionPolicy("ttl")
+    with pytest.raises(ValueError):
+        EvictionPolicy("lru")
+
+def test_lru_policy_evicts_least_recently_updated():
+    # Arrange
+    _sut = EvictionPolicy("lru", max_entries=2)
+    _sut.touch("a", 1, 10)
+    _sut.touch("b", 2, 10)
+    _sut.touch("a", 3, 10)
+    # Act
+    _sut.touch("c", 4, 10)
+    evicted = _sut.pop_evictions()
+    # Assert
+    assert evicted == ["b"]
+    assert list(_sut.entries) == ["a", "c"]
+    assert _sut.total_bytes == 20
+
+def test_count_policy_evicts_first_inserted():
+    # Arrange
+    _sut = EvictionPolicy("count", max_entries=2)
+    _sut.touch("a", 1, 10)
+    _sut.touch("b", 2, 10)
+    _sut.touch("a", 3, 10)
+    # Act
+    _sut.touch("c", 4, 10)
+    evicted = _sut.pop_evictions()
+    # Assert
+    assert evicted == ["a"]
+
+def test_ttl_policy_evicts_expired_entries():
+    # Arrange
+    _sut = EvictionPolicy("ttl", ttl_seconds=100)
+    _sut.touch("a", 1000, 10)
+    _sut.touch("b", 1050, 10)
+    # Act
+    _sut.touch("c", 1120, 10)
+    evicted = _sut.pop_evictions()
+    # Assert
+    assert evicted == ["a"]
+
+def test_ttl_policy_ignores_far_future_timestamps():
+    # Arrange
+    _sut = EvictionPolicy("ttl", ttl_seconds=100)
+    now = int(time.time())
+    _sut.touch("a", now - 50, 10)
+    _sut.touch("b", now - 10, 10)
+    # Act
+    _sut.touch("c", now + 10 ** 9, 10)
+    evicted = _sut.pop_evictions()
+    _sut.touch("d", now, 10)
+    later_evicted = _sut.pop_evictions()
+    # Assert
+    assert evicted == []
+    assert later_evicted == []
+    assert _sut.newest_timestamp == now
+
+def test_byte_budget_evicts_until_under_budget():
+    # Arrange
+    _sut = EvictionPolicy("lru", max_bytes=25)
+    _sut.touch("a", 1, 10)
+    _sut.touch("b", 2, 10)
+    # Act
+    _sut.touch("b", 3, 20)
+    evicted = _sut.pop_evictions()
+    # Assert
+    assert evicted == ["a"]
+    assert _sut.total_bytes == 20
+
+def test_clone_splits_limits_into_shares():
+    # Arrange
+    policy = EvictionPolicy("lru", max_entries=10, max_bytes=1001)
+    policy.touch("a", 1, 10)
+    # Act
+    _sut = policy.clone(4)
+    # Assert
+    assert (_sut.max_entries, _sut.max_bytes) == (3, 251)
+    assert not _sut.entries
+
+def test_data_managers_evict_and_flush_entries(tmp_path):
+    # Arrange
+    logger = Logger("consumer")
+    sink_path = tmp_path / "evicted.ndjson"
+    sink = EvictionFileSink(str(sink_path))
+    user_data_manager = UserDataManager(logger, EvictionPolicy("lru", max_entries=1), sink)
+    device_data_manager = DeviceDataManager(logger, EvictionPolicy("ttl", ttl_seconds=10), sink)
+    ip_data_manager = IpDataManager(logger, EvictionPolicy("count", max_entries=1), sink)
+    # Act
+    user_data_manager.compile_user_data("user-1", 100, "device-1")
+    user_data_manager.compile_user_data("user-2", 200, "device-2")
+    device_data_manager.compile_device_data("device-1", "android", "2.3.0", "10.0.0.1", "RU", 100)
+    device_data_manager.compile_device_data("device-2", "iOS", "2.3.0", "10.0.0.2", "US", 200)
+    ip_data_manager.compile_ip_data("10.0.0.1", 100)
+    ip_data_manager.compile_ip_data("10.0.0.2", 200)
+    sink.close()
+    # Assert
+    assert list(user_data_manager.user_logins) == ["user-2"]
+    assert list(user_data_manager.users_and_devices) == ["user-2"]
+    assert list(device_data_manager.devices) == ["device-2"]
+    assert list(ip_data_manager.ip_logins) == ["10.0.0.2"]
+    assert (user_data_manager.evicted_entries, device_data_manager.evicted_entries, ip_data_manager.evicted_entries) == (1, 1, 1)
+    assert user_data_manager.memory_usage()[0] == 1
+    assert [json.loads(line) for line in sink_path.read_text().splitlines()] == [
+        {"manager": "user", "user_id": "user-1", "total_logins": 1, "last_login": 100, "devices": ["device-1"]},
+        {"manager": "device", "device_id": "device-1", "device_type": "android", "app_version": "2.3.0", "ip": "10.0.0.1", "locale": "RU"},
+        {"manager": "ip", "ip": "10.0.0.1", "total_logins": 1, "last_login": 100}
+    ]
+
+def test_memory_usage_without_policy_estimates_every_entry():
+    # Arrange
+    logger = Logger("consumer")
+    _sut = IpDataManager(logger)
+    _sut.compile_ip_data("10.0.0.1", 100)
+    _sut.compile_ip_data("10.0.0.2", 100)
+    # Act
+    entries, estimated_bytes = _sut.memory_usage()
+    # Assert
+    assert entries == 2
+    assert estimated_bytes > 0
+
+def test_memory_usage_follows_entries_as_they_change():
+    # Arrange
+    logger = Logger("consumer")
+    _sut = DeviceDataManager(logger)
+    _sut.compile_device_data("device-1", 0, 0, "10.0.0.1", 0, 100)
+    _, added_bytes = _sut.memory_usage()
+    # Act
+    _sut.compile_device_data("device-1", 0, 0, "10.0.0.100", 0, 101)
+    _, updated_bytes = _sut.memory_usage()
+    # Assert
+    assert updated_bytes - added_bytes == sys.getsizeof("10.0.0.100") - sys.getsizeof("10.0.0.1")
+
+def test_memory_usage_drops_evicted_entries():
+    # Arrange
+    logger = Logger("consumer")
+    _sut = UserDataManager(logger, EvictionPolicy("lru", max_entries=1))
+    _sut.compile_user_data("user-1", 100, "device-1")
+    _, one_user_bytes = _sut.memory_usage()
+    # Act
+    _sut.compile_user_data("user-1", 101, "device-2")
+    _sut.compile_user_data("user-2", 102, "device-3")
+    entries, estimated_bytes = _sut.memory_usage()
+    # Assert
+    assert entries == 1
+    assert estimated_bytes == one_user_bytes
+
+def test_sharded_aggregator_applies_eviction_per_shard():
+    # Arrange
+    logger = Logger("consumer")
+    messages = [{"user_id": f"user-{i}", "app_version": "2.3.0", "device_type": "android", "ip": f"10.0.0.{i}", "locale": "RU",
+                 "device_id": f"device-{i}", "timestamp": str(1694479551 + i)} for i in range(40)]
+    # Act
+    with ShardedAggregator(logger, 2, {"user": EvictionPolicy("lru", max_entries=10)}) as _sut:
+        _sut.compile_statistics(messages)
+        findings = _sut.query_findings()
+    # Assert
+    assert findings["unique_users"] == 10
+    assert findings["memory_usage"]["user"][2] == 30
+    assert findings["unique_devices"] == 40
\ No newline at end of file
@@ -0,0 +1,70 @@
+import json
+import pytest
+from logging import Logger
+from src.py.processor.data.eviction_policy import EvictionPolicy
+from src.py.processor.data.field_encoder import FieldEncoder, build_field_encoders, decode_fields
+from src.py.processor.processor import Processor
+
+def test_encoder_assigns_codes_in_first_seen_order():
+    # Arrange
+    _sut = FieldEncoder()
+    # Act
+    codes = [_sut.encode(value) for value in ["android", "iOS", "android", "iOS", "web"]]
+    # Assert
+    assert codes == [0, 1, 0, 1, 2]
+    assert [_sut.decode(code) for code in codes] == ["android", "iOS", "android", "iOS", "web"]
+
+def test_extend_mirrors_another_encoder():
+    # Arrange
+    encoder = FieldEncoder()
+    for value in ["2.3.0", "2.4.0", "2.3.0"]:
+        encoder.encode(value)
+    _sut = FieldEncoder()
+    # Act
+    _sut.extend(encoder.values[:1])
+    _sut.extend(encoder.values[1:])
+    # Assert
+    assert _sut.codes == encoder.codes
+
+def test_decode_fields_decodes_only_encoded_fields():
+    # Arrange
+    field_encoders = build_field_encoders()
+    entry = {"device_id": "device-1", "device_type": field_encoders["device_type"].encode("android"), "app_version": field_encoders["app_version"].encode("2.3.0"),
+             "ip": "10.0.0.1", "locale": field_encoders["locale"].encode("RU")}
+    # Act
+    result = decode_fields(entry, field_encoders)
+    # Assert
+    assert result == {"device_id": "device-1", "device_type": "android", "app_version": "2.3.0", "ip": "10.0.0.1", "locale": "RU"}
+
+@pytest.mark.asyncio
+async def test_processor_decodes_findings_and_evicted_entries(tmp_path):
+    # Arrange
+    logger = Logger("consumer")
+    sink_path = tmp_path / "evicted.ndjson"
+    messages = [{"user_id": f"user-{i}", "app_version": "2.3.0", "device_type": "android", "ip": f"10.0.0.{i}", "locale": "RU",
+                 "device_id": f"device-{i}", "timestamp": str(1694479551 + i)} for i in range(2)]
+    # Act
+    with Processor(logger, eviction_policies={"device": EvictionPolicy("count", max_entries=1)}, eviction_sink_path=str(sink_path)) as _sut:
+        for message in messages:
+            await _sut.compile_statistics_async(message)
+        findings = _sut.collect_findings()
+    # Assert
+    assert _sut.device_data_manager.devices["device-1"]["device_type"] == 0
+    assert findings["version_activity"] == {"2.3.0": {"android": 2}}
+    assert findings["locale_activity"] == {"RU": {"android": 2}}
+    assert json.loads(sink_path.read_text()) == {"manager": "device", "device_id": "device-0", "device_type": "android", "app_version": "2.3.0", "ip": "10.0.0.0", "locale": "RU"}
+
+def test_processor_opens_eviction_sink_on_entering(tmp_path):
+    # Arrange
+    logger = Logger("consumer")
+    sink_path = tmp_path / "evicted.ndjson"
+    _sut = Processor(logger, eviction_sink_path=str(sink_path))
+    # Act
+    constructed_sink = _sut.eviction_sink
+    with _sut:
+        entered_sink = _sut.eviction_sink
+    # Assert
+    assert constructed_sink is None
+    assert entered_sink.file.closed
+    assert _sut.eviction_sink is None
+    assert sink_path.exists()
\ No newline at end of file
@@ -0,0 +1,59 @@
+from src.py.processor.findings import load_findings_snapshots, merge_findings, merge_throughput, save_findings_snapshot
+
+def test_findings_snapshots_round_trip_and_merge(tmp_path):
+    # Arrange
+    findings = {"unique_users": 2, "unique_devices": 1, "most_active_users": [("a", 5, 1), ("b", 1, 2)], "most_active_ips": [("ip-a", 3, 1)],
+                "version_activity": {"1.0": {"android": 2}}, "locale_activity": {"US": {"android": 2}}, "memory_usage": {"user": [2, 200, 0]}}
+    throughput = {"message_count": 10, "first_message_at": 100.0, "last_message_at": 101.0}
+    save_findings_snapshot(str(tmp_path), "replica-b", findings, throughput)
+    save_findings_snapshot(str(tmp_path), "replica-a", findings, throughput)
+    (tmp_path / "unrelated.json").write_text("{}")
+    # Act
+    snapshots = load_findings_snapshots(str(tmp_path))
+    merged = merge_findings([snapshot["findings"] for snapshot in snapshots], top_n=1)
+    # Assert
+    assert [snapshot["replica"] for snapshot in snapshots] == ["replica-a", "replica-b"]
+    assert snapshots[0]["throughput"] == throughput
+    assert merged["unique_users"] == 4
+    assert merged["most_active_users"] == [["a", 5, 1]]
+
+def test_merge_findings_of_replicas_sums_ip_logins_and_marks_approximate():
+    # Arrange
+    findings_list = [
+        {"unique_users": 1, "unique_devices": 1, "most_active_users": [["a", 5, 1]], "most_active_ips": [["ip-a", 3, 1], ["ip-b", 2, 4]],
+         "version_activity": {}, "locale_activity": {}, "memory_usage": {}},
+        {"unique_users": 1, "unique_devices": 1, "most_active_users": [["b", 2, 3]], "most_active_ips": [["ip-b", 2, 2], ["ip-c", 1, 5]],
+         "version_activity": {}, "locale_activity": {}, "memory_usage": {}}
+    ]
+    # Act
+    merged = merge_findings(findings_list, top_n=2, disjoint_keys=False, disjoint_users=True)
+    # Assert
+    assert merged["unique_devices"] == 2
+    assert merged["most_active_users"] == [["a", 5, 1], ["b", 2, 3]]
+    assert merged["most_active_ips"] == [("ip-b", 4, 4), ("ip-a", 3, 1)]
+    assert merged["approximate"] == ["unique_devices", "most_active_ips"]
+
+def test_merge_findings_of_replicas_sums_logins_of_users_seen_by_both():
+    # Arrange
+    findings_list = [
+        {"unique_users": 2, "unique_devices": 1, "most_active_users": [["a", 3, 1], ["b", 2, 2]], "most_active_ips": [],
+         "version_activity": {}, "locale_activity": {}, "memory_usage": {}},
+        {"unique_users": 1, "unique_devices": 1, "most_active_users": [["b", 2, 5]], "most_active_ips": [],
+         "version_activity": {}, "locale_activity": {}, "memory_usage": {}}
+    ]
+    # Act
+    merged = merge_findings(findings_list, top_n=2, disjoint_keys=False)
+    # Assert
+    assert merged["unique_users"] == 3
+    assert merged["most_active_users"] == [("b", 4, 5), ("a", 3, 1)]
+    assert merged["approximate"] == ["unique_users", "most_active_users", "unique_devices", "most_active_ips"]
+
+def test_merge_throughput_spans_every_replica_window():
+    # Arrange
+    throughputs = [{"message_count": 100, "first_message_at": 10.0, "last_message_at": 20.0},
+                   {"message_count": 150, "first_message_at": 12.0, "last_message_at": 15.0},
+                   {"message_count": 0, "first_message_at": None, "last_message_at": None}]
+    # Act
+    result = merge_throughput(throughputs)
+    # Assert
+    assert result == {"message_count": 250, "first_message_at": 10.0, "last_message_at": 20.0, "messages_per_second": 25.0}
\ No newline at end of file
@@ -2,10 +2,13 @@ import ast
 import pytest
 from logging import Logger
 from src.py.processor.processor import Processor
+from src.py.processor.deduplicator import Deduplicator
+from src.py.processor.data.user_features import UserFeatureTracker
 from src.py.processor.data.activity_data_manager import ActivityDataManager
 from src.py.processor.data.device_data_manager import DeviceDataManager
 from src.py.processor.data.ip_data_manager import IpDataManager
 from src.py.processor.data.user_data_manager import UserDataManager
+from src.py.processor.validation import INVALID_FIELD_TYPE, INVALID_TIMESTAMP, NOT_A_RECORD, PARSE_ERROR, RejectedMessage
 from unittest.mock import AsyncMock, MagicMock, patch
 
 def test_processor_initialization():
@@ -62,10 +65,11 @@ async def test_compile_statistics_async():
         # Act
         await _sut.compile_statistics_async(processed_message)
         # Assert
-        user_manager_mock.compile_user_data_async.assert_awaited_once_with("424cdd21-063a-43a7-b91b-7ca1a833afae", 1694479551, "593-47-5928")
+        user_manager_mock.compile_user_data_async.assert_awaited_once_with("424cdd21-063a-43a7-b91b-7ca1a833afae", 1694479551, "593-47-5928", "199.172.111.135")
         ip_manager_mock.compile_ip_data_async.assert_awaited_once_with("199.172.111.135", 1694479551)
-        device_manager_mock.compile_device_data_async.assert_awaited_once_with("593-47-5928", "android", "2.3.0", "199.172.111.135", "RU")
-        activity_manager_mock.compile_activity_data_async.assert_awaited_once_with("android", "2.3.0", "RU")
+        device_manager_mock.compile_device_data_async.assert_awaited_once_with("593-47-5928", 0, 0, "199.172.111.135", 0, 1694479551)
+        activity_manager_mock.compile_activity_data_async.assert_awaited_once_with(0, 0, 0)
+        assert [_sut.field_encoders[field].decode(0) for field in ("device_type", "app_version", "locale")] == ["android", "2.3.0", "RU"]
 
 @pytest.mark.asyncio
 async def test_process_messages_async():
@@ -79,4 +83,85 @@ async def test_process_messages_async():
     # Act
     result = await _sut.process_messages_async(raw_messages)
     # Assert
-    assert result == expected
\ No newline at end of file
+    assert result == expected
+
+@pytest.mark.asyncio
+async def test_process_messages_async_reuses_started_executor():
+    # Arrange
+    logger = Logger("consumer")
+    raw_messages = ["{\"user_id\": \"test-id\", \"ip\": \"test-ip\", \"device_id\": \"test-device-id\", \"timestamp\":\"111111111\"}"]
+    # Act
+    with Processor(logger) as _sut:
+        executor = _sut.executor
+        first_result = await _sut.process_messages_async(raw_messages)
+        second_result = await _sut.process_messages_async(raw_messages)
+        # Assert
+        assert executor is not None
+        assert _sut.executor is executor
+    assert first_result == second_result
+    assert _sut.executor is None
+    assert _sut.user_data_manager.user_logins["test-id"][0] == 2
+
+@pytest.mark.asyncio
+async def test_process_messages_async_rejects_malformed_messages():
+    # Arrange
+    logger = Logger("consumer")
+    valid_message = "{\"user_id\": \"test-id\", \"ip\": \"test-ip\", \"device_id\": \"test-device-id\", \"timestamp\":\"111111111\"}"
+    raw_messages = ["{\"user_id\": \"test-id\",", valid_message, "{\"user_id\": \"test-id\", \"ip\": \"test-ip\", \"timestamp\":\"111111111\"}",
+                    "[1, 2]", "{\"user_id\": \"test-id\", \"ip\": \"test-ip\", \"device_id\": \"test-device-id\", \"timestamp\":\"soon\"}"]
+    _sut = Processor(logger)
+    # Act
+    result = await _sut.process_messages_async(raw_messages)
+    rejected_messages = _sut.drain_rejected_messages()
+    # Assert
+    assert result == [ast.literal_eval(valid_message) | {"device_type": "unknown device", "locale": "unknown locale", "app_version": "unknown app version"}]
+    assert [rejected.reason for rejected in rejected_messages] == [PARSE_ERROR, "missing_device_id", NOT_A_RECORD, INVALID_TIMESTAMP]
+    assert rejected_messages[1] == RejectedMessage(raw_messages[2], "missing_device_id", "Missing required key 'device_id'")
+    assert _sut.rejection_counts == {PARSE_ERROR: 1, "missing_device_id": 1, NOT_A_RECORD: 1, INVALID_TIMESTAMP: 1}
+    assert _sut.drain_rejected_messages() == []
+    assert list(_sut.user_data_manager.user_logins) == ["test-id"]
+
+@pytest.mark.asyncio
+async def test_process_messages_async_rejects_non_string_values():
+    # Arrange
+    logger = Logger("consumer")
+    valid_message = "{\"user_id\": \"test-id\", \"ip\": \"test-ip\", \"device_id\": \"test-device-id\", \"timestamp\":\"111111111\"}"
+    raw_messages = ["{\"user_id\": [\"test-id\"], \"ip\": \"test-ip\", \"device_id\": \"test-device-id\", \"timestamp\":\"111111111\"}", valid_message,
+                    "{\"user_id\": \"test-id\", \"ip\": \"test-ip\", \"device_id\": \"test-device-id\", \"locale\": {}, \"timestamp\":\"111111111\"}"]
+    _sut = Processor(logger)
+    # Act
+    result = await _sut.process_messages_async(raw_messages)
+    rejected_messages = _sut.drain_rejected_messages()
+    # Assert
+    assert [processed["user_id"] for processed in result] == ["test-id"]
+    assert [(rejected.reason, rejected.error) for rejected in rejected_messages] == [(INVALID_FIELD_TYPE, "Expected a string for key 'user_id', got list"),
+                                                                                    (INVALID_FIELD_TYPE, "Expected a string for key 'locale', got dict")]
+
+@pytest.mark.asyncio
+async def test_process_messages_async_drops_duplicates_before_compiling():
+    # Arrange
+    logger = Logger("consumer")
+    message = "{\"user_id\": \"test-id\", \"ip\": \"test-ip\", \"device_id\": \"test-device-id\", \"timestamp\":\"111111111\"}"
+    retried_message = "{\"timestamp\":\"111111111\", \"device_id\": \"test-device-id\", \"ip\": \"test-ip\", \"user_id\": \"test-id\"}"
+    later_message = "{\"user_id\": \"test-id\", \"ip\": \"test-ip\", \"device_id\": \"test-device-id\", \"timestamp\":\"111111112\"}"
+    _sut = Processor(logger, deduplicator=Deduplicator(logger, 600, 1000, 0.001))
+    # Act
+    result = await _sut.process_messages_async([message, later_message, retried_message, later_message])
+    # Assert
+    assert [processed["timestamp"] for processed in result] == ["111111111", "111111112"]
+    assert _sut.user_data_manager.user_logins["test-id"][0] == 2
+    assert _sut.deduplicator.duplicate_count == 2
+
+@pytest.mark.asyncio
+async def test_process_messages_async_raises_alerts_for_flagged_users():
+    # Arrange
+    logger = Logger("consumer")
+    raw_messages = [f"{{\"user_id\": \"test-id\", \"ip\": \"test-ip-{i}\", \"device_id\": \"test-device-id\", \"timestamp\":\"{111111111 + i}\"}}" for i in range(3)]
+    _sut = Processor(logger, feature_tracker=UserFeatureTracker(3600, 0, 2, 0))
+    # Act
+    await _sut.process_messages_async(raw_messages)
+    alerts = _sut.drain_alerts()
+    # Assert
+    assert [(alert["user_id"], alert["reasons"], alert["distinct_ips"]) for alert in alerts] == [("test-id", ["distinct_ips"], 3)]
+    assert _sut.alert_count == 1
+    assert _sut.drain_alerts() == []
\ No newline at end of file
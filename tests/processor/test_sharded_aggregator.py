@@ -0,0 +1,134 @@
+import asyncio
+import multiprocessing
+import pytest
+import time
+from logging import Logger
+from multiprocessing.connection import Connection
+from unittest.mock import MagicMock
+from src.py.processor.processor import Processor
+from src.py.processor.findings import merge_findings
+from src.py.processor.sharded_aggregator import ShardedAggregator
+from src.py.processor.data.user_features import UserFeatureTracker
+
+def build_messages():
+    # User and ip k log in k times, so most active rankings have no ties
+    messages = []
+    for k in range(1, 21):
+        for i in range(k):
+            messages.append({"user_id": f"user-{k}", "app_version": f"2.{i % 3}.0", "device_type": "android" if i % 2 else "iOS",
+                             "ip": f"10.0.0.{k}", "locale": "RU" if i % 5 else "US", "device_id": f"device-{k}-{i % 2}", "timestamp": str(1694479551 + k * 100 + i)})
+    return messages
+
+def test_sharded_aggregator_initialization_rejects_invalid_shard_count():
+    # Arrange
+    logger = Logger("consumer")
+    # Act / Assert
+    with pytest.raises(ValueError):
+        ShardedAggregator(logger, 0)
+
+def test_sharded_findings_match_in_process_findings():
+    # Arrange
+    logger = Logger("consumer")
+    messages = build_messages()
+    local_processor = Processor(logger)
+    async def compile_locally():
+        for message in messages:
+            await local_processor.compile_statistics_async(message)
+    asyncio.run(compile_locally())
+    expected = local_processor.collect_findings()
+    # Act
+    with ShardedAggregator(logger, 3) as _sut:
+        _sut.compile_statistics(messages[:100])
+        _sut.compile_statistics(messages[100:])
+        result = _sut.query_findings()
+    # Assert
+    assert result == expected
+
+def test_merge_findings_keeps_global_most_active():
+    # Arrange
+    findings_list = [
+        {"unique_users": 2, "unique_devices": 1, "most_active_users": [("a", 5, 1), ("b", 1, 2)], "most_active_ips": [("ip-a", 3, 1)],
+         "version_activity": {"1.0": {"android": 2}}, "locale_activity": {"US": {"android": 2}}, "memory_usage": {"user": [2, 200, 0]}},
+        {"unique_users": 1, "unique_devices": 2, "most_active_users": [("c", 3, 3)], "most_active_ips": [("ip-b", 4, 2)],
+         "version_activity": {"1.0": {"android": 1, "iOS": 1}}, "locale_activity": {"RU": {"iOS": 1}}, "memory_usage": {"user": [1, 100, 3]}}
+    ]
+    # Act
+    result = merge_findings(findings_list, top_n=2)
+    # Assert
+    assert result == {"unique_users": 3, "unique_devices": 3, "most_active_users": [("a", 5, 1), ("c", 3, 3)], "most_active_ips": [("ip-b", 4, 2), ("ip-a", 3, 1)],
+                      "version_activity": {"1.0": {"android": 3, "iOS": 1}}, "locale_activity": {"US": {"android": 2}, "RU": {"iOS": 1}}, "memory_usage": {"user": [3, 300, 3]}}
+
+@pytest.mark.asyncio
+async def test_process_messages_async_with_shards():
+    # Arrange
+    logger = Logger("consumer")
+    raw_messages = ["{\"user_id\": \"424cdd21-063a-43a7-b91b-7ca1a833afae\", \"app_version\": \"2.3.0\", \"device_type\": \"android\", \"ip\": \"199.172.111.135\", \"locale\": \"RU\", \"device_id\": \"593-47-5928\", \"timestamp\":\"1694479551\"}",
+                    "{\"user_id\": \"test-id\", \"ip\": \"test-ip\", \"device_id\": \"test-device-id\", \"timestamp\":\"111111111\"}"]
+    # Act
+    with Processor(logger, shard_count=2) as _sut:
+        result = await _sut.process_messages_async(raw_messages)
+        findings = _sut.collect_findings()
+    # Assert
+    assert len(result) == 2
+    assert findings["unique_users"] == 2
+    assert findings["unique_devices"] == 2
+    assert findings["most_active_users"][0][1] == 1
+
+@pytest.mark.asyncio
+async def test_processor_close_shards_keeps_their_alerts():
+    # Arrange
+    logger = Logger("consumer")
+    raw_messages = [str(message) for message in build_messages()]
+    # Act
+    with Processor(logger, shard_count=2, feature_tracker=UserFeatureTracker(3600, 15, 0, 0)) as _sut:
+        await _sut.process_messages_async(raw_messages)
+        _sut.close_shards()
+        _sut.close_shards()
+        alerts = _sut.drain_alerts()
+    # Assert
+    assert sorted(alert["user_id"] for alert in alerts) == ["user-16", "user-17", "user-18", "user-19", "user-20"]
+    assert _sut.alert_count == 5
+
+def test_sharded_aggregator_collects_alerts_from_shards():
+    # Arrange
+    logger = Logger("consumer")
+    messages = build_messages()
+    # Act
+    with ShardedAggregator(logger, 2, feature_tracker=UserFeatureTracker(3600, 15, 0, 0)) as _sut:
+        _sut.compile_statistics(messages)
+    alerts = _sut.drain_alerts()
+    # Assert
+    assert sorted(alert["user_id"] for alert in alerts) == ["user-16", "user-17", "user-18", "user-19", "user-20"]
+    assert _sut.drain_alerts() == []
+
+def test_query_findings_leaves_out_shards_that_miss_the_timeout():
+    # Arrange
+    logger = Logger("consumer")
+    messages = build_messages()
+    stuck_connection = MagicMock(spec=Connection)
+    stuck_connection.poll.return_value = False
+    # Act
+    with ShardedAggregator(logger, 2) as _sut:
+        _sut.compile_statistics(messages)
+        expected = _sut.query_findings()
+        _sut.connections.append(stuck_connection)
+        result = _sut.query_findings(timeout=0.5)
+        _sut.connections.remove(stuck_connection)
+    # Assert
+    assert result == expected
+    stuck_connection.recv.assert_not_called()
+
+def test_close_terminates_shards_that_miss_the_timeout():
+    # Arrange
+    logger = Logger("consumer")
+    stuck_worker = multiprocessing.Process(target=time.sleep, args=(60,), daemon=True)
+    stuck_worker.start()
+    _sut = ShardedAggregator(logger, 1)
+    _sut.workers.append(stuck_worker)
+    # Act
+    started_at = time.perf_counter()
+    _sut.close(0.5)
+    # Assert
+    assert time.perf_counter() - started_at < 5
+    assert not stuck_worker.is_alive()
+    assert _sut.workers == []
@@ -0,0 +1,118 @@
+import pytest
+from logging import Logger
+from unittest.mock import patch
+from src.py.processor.processor import Processor, parse_message
+from src.py.processor.shared_memory_transport import SharedMemoryParser, SharedRingBuffer
+from src.py.processor.validation import PARSE_ERROR
+
+def test_ring_buffer_push_read_and_release():
+    # Arrange
+    _sut = SharedRingBuffer(2, 64)
+    try:
+        # Act
+        first_slot = _sut.push(b"first")
+        second_slot = _sut.push(b"second")
+        # Assert
+        assert (first_slot, second_slot) == (0, 1)
+        assert _sut.read_slot(0) == b"first"
+        assert _sut.read_slot(1) == b"second"
+        assert _sut.is_full()
+        with pytest.raises(BufferError):
+            _sut.push(b"third")
+        _sut.release(1)
+        assert _sut.push(b"third") == 0
+        assert _sut.read_slot(0) == b"third"
+    finally:
+        _sut.close(unlink=True)
+
+def test_ring_buffer_oversized_payload_is_written_empty():
+    # Arrange
+    _sut = SharedRingBuffer(1, 16)
+    try:
+        # Act
+        _sut.push(b"x" * 64)
+        # Assert
+        assert _sut.read_slot(0) == b""
+    finally:
+        _sut.close(unlink=True)
+
+def test_parse_messages_matches_in_process_parsing():
+    # Arrange
+    logger = Logger("consumer")
+    raw_messages = []
+    for i in range(50):
+        raw_messages.append(f"{{\"user_id\": \"user-{i}\", \"app_version\": \"2.3.0\", \"device_type\": \"android\", \"ip\": \"10.0.0.{i}\", \"locale\": \"RU\", \"device_id\": \"device-{i}\", \"timestamp\":\"{1694479551 + i}\"}}")
+    raw_messages.append("{\"user_id\": \"test-id\", \"ip\": \"test-ip\", \"device_id\": \"test-device-id\", \"timestamp\":\"111111111\"}")
+    raw_messages.append("{\"user_id\": \"int-id\", \"ip\": \"int-ip\", \"device_id\": \"int-device-id\", \"timestamp\": 111111111, \"extra\": \"value\"}")
+    raw_messages.append("{\"user_id\": \"" + "x" * 2048 + "\", \"ip\": \"big-ip\", \"device_id\": \"big-device-id\", \"timestamp\":\"111111111\"}")
+    expected = [parse_message(raw_message) for raw_message in raw_messages]
+    # Act
+    with SharedMemoryParser(logger, slot_count=8, worker_count=2, parse_function=parse_message, task_size=3) as _sut:
+        result = _sut.parse_messages([raw_message.encode("utf-8") for raw_message in raw_messages])
+    # Assert
+    assert result == expected
+    assert [list(message) for message in result] == [list(message) for message in expected]
+
+def test_parse_messages_raises_for_unparseable_message():
+    # Arrange
+    logger = Logger("consumer")
+    # Act / Assert
+    with SharedMemoryParser(logger, slot_count=4, worker_count=1, parse_function=parse_message) as _sut:
+        with pytest.raises(SyntaxError):
+            _sut.parse_messages([b"not a message"])
+
+def test_parse_messages_falls_back_to_in_process_parsing_when_a_worker_dies():
+    # Arrange
+    logger = Logger("consumer")
+    raw_messages = [f"{{\"user_id\": \"user-{i}\", \"ip\": \"10.0.0.{i}\", \"device_id\": \"device-{i}\", \"timestamp\":\"{1694479551 + i}\"}}" for i in range(10)]
+    expected = [parse_message(raw_message) for raw_message in raw_messages]
+    with (patch("src.py.processor.shared_memory_transport.WORKER_CHECK_INTERVAL", 0.1),
+          SharedMemoryParser(logger, slot_count=8, worker_count=1, parse_function=parse_message, task_size=3) as _sut):
+        _sut.workers[0].kill()
+        _sut.workers[0].join()
+        # Act
+        result = _sut.parse_messages([raw_message.encode("utf-8") for raw_message in raw_messages])
+        next_result = _sut.parse_messages([raw_messages[0].encode("utf-8")])
+    # Assert
+    assert result == expected
+    assert next_result == expected[:1]
+    assert _sut.failed
+
+@pytest.mark.asyncio
+async def test_process_raw_messages_async_with_shared_memory():
+    # Arrange
+    logger = Logger("consumer")
+    raw_messages = [b"{\"user_id\": \"424cdd21-063a-43a7-b91b-7ca1a833afae\", \"app_version\": \"2.3.0\", \"device_type\": \"android\", \"ip\": \"199.172.111.135\", \"locale\": \"RU\", \"device_id\": \"593-47-5928\", \"timestamp\":\"1694479551\"}"]
+    expected = [{"user_id": "424cdd21-063a-43a7-b91b-7ca1a833afae", "app_version": "2.3.0", "device_type": "android", "ip": "199.172.111.135", "locale": "RU", "device_id": "593-47-5928", "timestamp": "1694479551"}]
+    # Act
+    with Processor(logger, parser_slot_count=4) as _sut:
+        result = await _sut.process_raw_messages_async(raw_messages)
+    # Assert
+    assert result == expected
+    assert len(_sut.user_data_manager.user_logins) == 1
+
+@pytest.mark.asyncio
+async def test_process_raw_messages_async_with_shared_memory_rejects_malformed_messages():
+    # Arrange
+    logger = Logger("consumer")
+    raw_messages = [b"not a message", b"{\"user_id\": \"test-id\", \"ip\": \"test-ip\", \"device_id\": \"test-device-id\", \"timestamp\":\"111111111\"}"]
+    # Act
+    with Processor(logger, parser_slot_count=4) as _sut:
+        result = await _sut.process_raw_messages_async(raw_messages)
+    # Assert
+    assert [message["user_id"] for message in result] == ["test-id"]
+    assert [(rejected.message, rejected.reason) for rejected in _sut.drain_rejected_messages()] == [("not a message", PARSE_ERROR)]
+
+@pytest.mark.asyncio
+async def test_process_raw_messages_async_keeps_rejected_payloads_as_received():
+    # Arrange
+    logger = Logger("consumer")
+    raw_messages = [b"not a \xff message"]
+    for parser_slot_count in (0, 4):
+        # Act
+        with Processor(logger, parser_slot_count=parser_slot_count) as _sut:
+            await _sut.process_raw_messages_async(raw_messages)
+        # Assert
+        rejected_messages = _sut.drain_rejected_messages()
+        assert [(rejected.message, rejected.raw) for rejected in rejected_messages] == [("not a \ufffd message", b"not a \xff message")]
+        assert rejected_messages[0].payload() == b"not a \xff message"
@@ -0,0 +1,90 @@
+import math
+import pytest
+from unittest import TestCase
+from logging import Logger
+from src.py.processor.data.user_data_manager import UserDataManager
+from src.py.processor.data.user_features import MAX_TRACKED_IPS, UserFeatureTracker
+
+def test_feature_tracker_initialization_rejects_invalid_thresholds():
+    # Act / Assert
+    with pytest.raises(ValueError):
+        UserFeatureTracker(0, 30, 5, 3)
+    with pytest.raises(ValueError):
+        UserFeatureTracker(3600, 30, MAX_TRACKED_IPS, 3)
+
+class TestUserFeatureTracker(TestCase):
+    def test_update_decays_login_rate_and_tracks_gaps(self):
+        # Arrange
+        _sut = UserFeatureTracker(3600, 0, 0, 0)
+        features = _sut.update("user", None, 1000, "ip-1", False)
+        # Act
+        features = _sut.update("user", features, 1100, "ip-1", False)
+        features = _sut.update("user", features, 4700, "ip-1", True)
+        # Assert
+        self.assertAlmostEqual((math.exp(-100 / 3600) + 1) * math.exp(-1) + 1, features.login_rate, places=5)
+        self.assertEqual(1.0, features.new_device_rate)
+        self.assertEqual(3600, features.last_gap)
+        self.assertAlmostEqual(100 * 0.8 + 3600 * 0.2, features.mean_gap)
+        self.assertEqual(4700, features.updated_at)
+
+    def test_distinct_ips_counts_recent_ips_and_caps_tracked_ips(self):
+        # Arrange
+        _sut = UserFeatureTracker(3600, 0, 0, 0)
+        features = _sut.update("user", None, 1000, "old-ip", False)
+        # Act
+        for i in range(MAX_TRACKED_IPS):
+            features = _sut.update("user", features, 5000 + i, f"ip-{i}", False)
+        features = _sut.update("user", features, 6000, "ip-0", False)
+        # Assert
+        self.assertEqual(MAX_TRACKED_IPS, _sut.distinct_ips(features))
+        self.assertEqual(MAX_TRACKED_IPS * 2, len(features.recent_ips))
+        self.assertNotIn("old-ip", features.recent_ips)
+        self.assertEqual(6000, features.recent_ips[features.recent_ips.index("ip-0") + 1])
+
+    def test_alerts_once_per_crossed_threshold_and_rearms(self):
+        # Arrange
+        _sut = UserFeatureTracker(3600, 3, 2, 0)
+        features = None
+        # Act
+        for i in range(5):
+            features = _sut.update("user", features, 1000 + i, f"ip-{i % 3}", False)
+        first_alerts = _sut.drain_alerts()
+        features = _sut.update("user", features, 1000 + 3600 * 10, "ip-0", False)
+        for i in range(4):
+            features = _sut.update("user", features, 1000 + 3600 * 10 + i, "ip-0", False)
+        second_alerts = _sut.drain_alerts()
+        # Assert
+        self.assertEqual([["distinct_ips"], ["login_rate"]], [alert["reasons"] for alert in first_alerts])
+        self.assertEqual({"user_id": "user", "timestamp": 1002, "reasons": ["distinct_ips"], "login_rate": 3.0, "distinct_ips": 3,
+                          "new_device_rate": 0.0, "mean_gap_seconds": 1.0, "last_gap_seconds": 1}, first_alerts[0])
+        self.assertEqual([["login_rate"]], [alert["reasons"] for alert in second_alerts])
+        self.assertEqual(3, _sut.alert_count)
+        self.assertEqual([], _sut.drain_alerts())
+
+    def test_full_alert_queue_drops_oldest_alerts(self):
+        # Arrange
+        _sut = UserFeatureTracker(3600, 0, 0, 1, max_pending_alerts=2)
+        # Act
+        for i in range(3):
+            features = _sut.update(f"user-{i}", None, 1000, None, False)
+            _sut.update(f"user-{i}", features, 1001, None, True)
+            _sut.update(f"user-{i}", features, 1002, None, True)
+        alerts = _sut.drain_alerts()
+        # Assert
+        self.assertEqual(["user-1", "user-2"], [alert["user_id"] for alert in alerts])
+        self.assertEqual(3, _sut.alert_count)
+        self.assertEqual(1, _sut.dropped_alert_count)
+
+def test_user_data_manager_tracks_new_devices_and_forgets_evicted_users():
+    # Arrange
+    _sut = UserDataManager(Logger("consumer"), feature_tracker=UserFeatureTracker(3600, 0, 0, 1))
+    # Act
+    _sut.compile_user_data("user", 1000, "device-1", "ip-1")
+    _sut.compile_user_data("user", 1001, "device-2", "ip-1")
+    _sut.compile_user_data("user", 1002, "device-2", "ip-1")
+    _sut.compile_user_data("user", 1003, "device-3", "ip-2")
+    alerts = _sut.drain_alerts()
+    # Assert
+    assert [alert["reasons"] for alert in alerts] == [["new_devices"]]
+    assert _sut.user_features["user"].login_rate == pytest.approx(4.0, abs=0.01)
+    assert _sut.user_features["user"].new_device_rate == pytest.approx(2.0, abs=0.01)
\ No newline at end of file